@@ -6,14 +6,18 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from app.database.FDataBase import Base
 from config import DATABASE_TEST_URI
 
+# Адрес базы: alembic -x db_uri=... upgrade head, по умолчанию тестовая
+DB_URI = context.get_x_argument(as_dictionary=True).get(
+    "db_uri", DATABASE_TEST_URI)
+
 # Создание асинхронного движка
-engine = create_async_engine(DATABASE_TEST_URI, poolclass=pool.NullPool)
+engine = create_async_engine(DB_URI, poolclass=pool.NullPool)
 
 
 # Настройка Alembic
 def run_migrations_offline():
     context.configure(
-        url=DATABASE_TEST_URI,
+        url=DB_URI,
         target_metadata=Base.metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
@@ -22,15 +26,19 @@ def run_migrations_offline():
         context.run_migrations()
 
 
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=Base.metadata,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 async def run_migrations_online():
     async with engine.connect() as connection:
-        await connection.run_sync(
-            lambda conn: context.configure(
-                connection=conn,
-                target_metadata=Base.metadata,
-            )
-        )
-        await connection.run_sync(lambda _: context.run_migrations())
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
 
 if context.is_offline_mode():
     run_migrations_offline()
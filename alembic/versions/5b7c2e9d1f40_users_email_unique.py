@@ -0,0 +1,45 @@
+"""Users email unique index
+
+Revision ID: 5b7c2e9d1f40
+Revises: d41a7e3b9c28
+Create Date: 2026-10-18 21:05:12.334871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7c2e9d1f40'
+down_revision: Union[str, None] = 'd41a7e3b9c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Дубликаты не удаляются автоматически: какую из строк оставить,
+    # решает владелец данных.
+    duplicates = op.get_bind().scalar(sa.text(
+        "SELECT count(*) FROM (SELECT email FROM users "
+        "WHERE email IS NOT NULL GROUP BY email HAVING count(*) > 1) d"))
+    if duplicates:
+        raise RuntimeError(
+            f"В таблице users {duplicates} email встречаются больше одного "
+            "раза, уникальный индекс не создать. Найти их: SELECT email, "
+            "array_agg(id) FROM users GROUP BY email HAVING count(*) > 1")
+    # CONCURRENTLY не блокирует запись в users на время построения,
+    # но не выполняется в транзакции. Если построение прервалось,
+    # невалидный индекс удаляется перед повтором.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email', table_name='users',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email', table_name='users',
+                      postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Users list indexes
+
+Revision ID: 698e104e5dd0
+Revises: 49cbba933f32
+Create Date: 2026-10-18 10:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '698e104e5dd0'
+down_revision: Union[str, None] = '49cbba933f32'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в users на время построения,
+    # но не выполняется в транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_age', 'users', ['age'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_users_salary', 'users', ['salary'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_users_last_name', 'users', ['last_name'],
+                        unique=False,
+                        postgresql_ops={'last_name': 'text_pattern_ops'},
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_last_name', table_name='users',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_users_salary', table_name='users',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_users_age', table_name='users',
+                      postgresql_concurrently=True)
@@ -0,0 +1,53 @@
+"""Users trigram search indexes
+
+Revision ID: 8f2d6b1c4a93
+Revises: 3c0f9a4e2b71
+Create Date: 2026-10-18 18:41:05.227318
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d6b1c4a93'
+down_revision: Union[str, None] = '3c0f9a4e2b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def trigram_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).scalar() is not None
+
+
+def upgrade() -> None:
+    if not trigram_available():
+        logging.getLogger('alembic').warning(
+            'pg_trgm недоступно, индексы поиска не созданы')
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # GIN-индекс на большой таблице строится долго: CONCURRENTLY не
+    # блокирует запись в users, но не выполняется в транзакции.
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.create_index(f'ix_users_{column}_trgm', 'users', [column],
+                            unique=False, postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'},
+                            postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in reversed(COLUMNS):
+            op.drop_index(f'ix_users_{column}_trgm', table_name='users',
+                          if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,307 @@
+"""
+Контроль нагрузки на обработчики (admission control).
+
+Запрос на чтение (GET, HEAD) или запись занимает место в бюджете
+своего класса, а если маршрут есть в ADMISSION_ROUTE_LIMITS - сначала
+и в бюджете маршрута. Без свободного места запрос ждёт в ограниченной
+очереди не дольше ADMISSION_QUEUE_TIMEOUT. Если очередь заполнена,
+время ожидания вышло или пул соединений перегружен, запрос сразу
+получает 503 с Retry-After и не занимает соединение с базой.
+
+Classes:
+
+    Overloaded: Отказ в обслуживании из-за перегрузки
+    ConcurrencyLimiter: Ограничение одновременных запросов с очередью
+    AdmissionControl: Бюджеты чтения, записи и маршрутов
+    AdmissionMiddleware: ASGI middleware, пропускающий запросы по бюджетам
+
+Func:
+
+    overloaded_response: Ответ 503 на Overloaded
+
+Args:
+
+    admission: Контроль нагрузки с настройками из config
+
+Notes:
+    Бюджет записи по умолчанию - POOL_SIZE, бюджет чтения -
+    POOL_SIZE + POOL_MAX_OVERFLOW: всплеск записи не займёт все
+    соединения пула, и чтение продолжит проходить. Перегрузка пула
+    (ADMISSION_MAX_POOL_WAITING, ADMISSION_MAX_POOL_WAIT) для чтения
+    проверяется по здоровым репликам, если они есть.
+
+    Место занимает middleware, а не зависимость обработчика:
+    зависимость с yield завершается до отправки потокового тела
+    (export_users), и ограничение маршрута ничего бы не ограничивало.
+"""
+import asyncio
+import contextlib
+from collections import deque
+from typing import AsyncIterator
+
+from sqlalchemy.pool import Pool
+from starlette.routing import BaseRoute, Match
+
+from app import metrics as app_metrics
+from app.database.FDataBase import engine, READ_METHODS
+from app.database.replicas import replica_set
+from app.responses import FastJSONResponse
+from config import (ADMISSION_READ_LIMIT, ADMISSION_WRITE_LIMIT,
+                    ADMISSION_ROUTE_LIMITS, ADMISSION_QUEUE_SIZE,
+                    ADMISSION_QUEUE_TIMEOUT, ADMISSION_MAX_POOL_WAITING,
+                    ADMISSION_MAX_POOL_WAIT, ADMISSION_RETRY_AFTER)
+
+
+MESSAGES = {
+    "queue_full": "Слишком много запросов, повторите позже!",
+    "queue_timeout": "Слишком много запросов, повторите позже!",
+    "pool_waiting": "База данных перегружена, повторите позже!",
+    "pool_wait": "База данных перегружена, повторите позже!",
+}
+
+REJECTED = app_metrics.Counter(
+    "admission_rejected_total", "Запросы, отклонённые контролем нагрузки",
+    ("budget", "reason"))
+
+
+class Overloaded(Exception):
+    """
+    Отказ в обслуживании из-за перегрузки.
+
+    Args:
+
+        reason: queue_full, queue_timeout, pool_waiting или pool_wait
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(MESSAGES[reason])
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+    Ограничение одновременных запросов с очередью ожидания.
+
+    Места освобождаются в порядке очереди: новый запрос не обгоняет
+    ожидающие.
+
+    Args:
+
+        limit: Максимум одновременных запросов
+        queue_size: Максимум ожидающих запросов
+    """
+
+    def __init__(self, limit: int, queue_size: int) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.admitted = self.queued = self.rejected = self.timeouts = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: float) -> None:
+        """
+        Занятие места: сразу, после ожидания в очереди или Overloaded.
+
+        Args:
+
+            timeout: Сколько секунд ждать места в очереди
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise Overloaded("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            async with asyncio.timeout(timeout):
+                await waiter
+        except (TimeoutError, asyncio.CancelledError) as ex:
+            if waiter.done() and not waiter.cancelled():
+                # Место передано в момент отмены: возвращаем его.
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(ex, asyncio.CancelledError):
+                raise
+            self.timeouts += 1
+            raise Overloaded("queue_timeout") from None
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Освобождение места: оно переходит первому в очереди."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        """Счётчики ограничения."""
+        return {"limit": self.limit,
+                "active": self.active,
+                "waiting": len(self._waiters),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts}
+
+
+class AdmissionControl:
+    """
+    Бюджеты чтения, записи и отдельных маршрутов.
+
+    Args:
+
+        read_limit: Одновременных запросов на чтение
+        write_limit: Одновременных запросов на запись
+        route_limits: {"МЕТОД /путь": ограничение} для маршрутов
+        queue_size: Размер очереди каждого бюджета
+        queue_timeout: Сколько секунд запрос ждёт места
+        max_pool_waiting: Отказ, если столько запросов ждут соединения
+            пула (0 - не проверять)
+        max_pool_wait: Отказ, если соединения пула ждут дольше стольких
+            секунд (0 - не проверять)
+    """
+
+    def __init__(self, read_limit: int = ADMISSION_READ_LIMIT,
+                 write_limit: int = ADMISSION_WRITE_LIMIT,
+                 route_limits: dict[str, int] = ADMISSION_ROUTE_LIMITS,
+                 queue_size: int = ADMISSION_QUEUE_SIZE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+                 max_pool_waiting: int = ADMISSION_MAX_POOL_WAITING,
+                 max_pool_wait: float = ADMISSION_MAX_POOL_WAIT) -> None:
+        self.budgets = {"read": ConcurrencyLimiter(read_limit, queue_size),
+                        "write": ConcurrencyLimiter(write_limit, queue_size)}
+        self.routes = {route: ConcurrencyLimiter(limit, queue_size)
+                       for route, limit in route_limits.items()}
+        self.queue_timeout = queue_timeout
+        self.max_pool_waiting = max_pool_waiting
+        self.max_pool_wait = max_pool_wait
+
+    def pool_pressure(self, pool: Pool) -> str | None:
+        """Причина перегрузки пула или None."""
+        metrics = getattr(pool, "metrics", None)
+        if metrics is None:
+            return None
+        if self.max_pool_waiting and metrics.waiting >= self.max_pool_waiting:
+            return "pool_waiting"
+        if self.max_pool_wait and metrics.longest_wait() >= self.max_pool_wait:
+            return "pool_wait"
+        return None
+
+    def _pools(self, budget: str) -> list[Pool]:
+        if budget == "read":
+            replicas = [replica.engine.pool
+                        for replica in replica_set.replicas
+                        if replica.healthy]
+            if replicas:
+                return replicas
+        return [engine.pool]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, method: str, route: str) -> AsyncIterator[None]:
+        """
+        Место для запроса на время его обработки.
+
+        Args:
+
+            method: HTTP-метод запроса
+            route: Шаблон пути маршрута, например /user/get_user/{user_id}
+
+        Raises:
+
+            Overloaded: Место не получено
+        """
+        budget = "read" if method in READ_METHODS else "write"
+        route_key = f"{method} {route}"
+        limiters = [self.budgets[budget]]
+        if route_key in self.routes:
+            limiters.insert(0, self.routes[route_key])
+        acquired = []
+        try:
+            reasons = [self.pool_pressure(pool)
+                       for pool in self._pools(budget)]
+            if all(reasons):
+                raise Overloaded(reasons[0])
+            deadline = asyncio.get_running_loop().time() + self.queue_timeout
+            for limiter in limiters:
+                await limiter.acquire(
+                    max(deadline - asyncio.get_running_loop().time(), 0))
+                acquired.append(limiter)
+        except BaseException as ex:
+            for limiter in acquired:
+                limiter.release()
+            if isinstance(ex, Overloaded):
+                REJECTED.inc(budget, ex.reason)
+            raise
+        try:
+            yield
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    def stats(self) -> dict:
+        """Счётчики бюджетов и маршрутов."""
+        return {**{name: limiter.stats()
+                   for name, limiter in self.budgets.items()},
+                "routes": {route: limiter.stats()
+                           for route, limiter in self.routes.items()}}
+
+
+admission = AdmissionControl()
+
+
+def overloaded_response(ex: Overloaded) -> FastJSONResponse:
+    """Ответ 503 с Retry-After на Overloaded."""
+    return FastJSONResponse(
+        {"message": str(ex), "status_code": 503}, status_code=503,
+        headers={"Retry-After": str(ADMISSION_RETRY_AFTER)})
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware, пропускающий запросы по бюджетам admission.
+
+    Место занимается до маршрутизации, поэтому отклонённый запрос не
+    берёт сессию и соединение с базой, а освобождается после отправки
+    всего ответа, включая потоковое тело.
+
+    Args:
+
+        app: Приложение ASGI
+        routes: Маршруты приложения для шаблона пути
+            (/user/get_user/{user_id})
+        prefix: Ограничиваются только пути с этим началом
+    """
+
+    def __init__(self, app, routes: list[BaseRoute],
+                 prefix: str = "") -> None:
+        self.app = app
+        self.routes = routes
+        self.prefix = prefix
+
+    def _route(self, scope) -> str:
+        for route in self.routes:
+            if route.matches(scope)[0] == Match.FULL:
+                return getattr(route, "path", scope["path"])
+        return scope["path"]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (scope["type"] != "http"
+                or not scope["path"].startswith(self.prefix)):
+            await self.app(scope, receive, send)
+            return
+        async with contextlib.AsyncExitStack() as stack:
+            try:
+                await stack.enter_async_context(
+                    admission.slot(scope["method"], self._route(scope)))
+            except Overloaded as ex:
+                await overloaded_response(ex)(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
@@ -5,29 +5,61 @@ Models:
 
     Product: Содержит основную инфу о пользователе:
         id, first_name, last_name, age, salary, email
+    UserStats: Сводка по корзинам возраста и зарплаты
+    UserStatsState: Состояние сводки (устарела с, перестроена в)
 
 Func:
 
     create_tables: Cозданин таблиц
     drop_all_tables: Удаление таблиц
+    age_bucket: Корзина возраста для сводки
+    salary_bucket: Корзина зарплаты для сводки
+    salary_bucket_bounds: Границы корзины зарплаты
+    dialect_insert: INSERT с ON CONFLICT для диалекта сессии
+    mark_stats_dirty: Отметка, что сводку надо перестроить
     get_session: Получение асинхронной сессии базы данных
+    get_session_factory: Получение фабрики асинхронных сессий
     get_one_user: Получение информации о пользователе
+    get_user_version: Версия и время изменения пользователя
+    get_many_users: Получение информации о нескольких пользователях
+    get_users_page: Постраничный список пользователей с фильтрами
+    stream_users: Потоковое чтение всех пользователей
     add_one_user: Добавление пользователя в базу данных
+    add_many_users: Пакетное добавление пользователей в базу данных
+    upsert_users: Добавление или изменение пользователей по email
     update_user_info: Обновление информации о пользователе
+    update_many_users: Пакетное обновление информации о пользователях
     delete_one_user: Удаление пользователя из базы данных
+    delete_many_users: Пакетное удаление пользователей из базы данных
 """
 import logging
-from typing import AsyncGenerator
-from fastapi import Depends
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import AsyncGenerator, AsyncIterator
+from asyncpg import PostgresError
+from fastapi import Depends, Request, Response
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import (
     DeclarativeBase, sessionmaker)
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy import (Column, Integer, String, Float, select)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy import (Column, Integer, String, Float, DateTime, Index,
+                        DDL, event, select, insert, update, delete, any_,
+                        bindparam, case, func, text)
 
-from config import DATABASE_URI
+from app.database.cache import CACHE_MISS, user_cache
+from app.database.pool import build_engine
+from app.database.replicas import replica_set
+from app.database.single_flight import user_reads
+from config import (DATABASE_URI, BATCH_READ_CHUNK, BULK_BATCH_SIZE,
+                    READ_YOUR_WRITES_SECONDS, USER_STATS_ENABLED,
+                    USER_STATS_AGE_BUCKET, USER_STATS_SALARY_BUCKETS)
 
 
-engine = create_async_engine(DATABASE_URI)
+engine = build_engine(DATABASE_URI)
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -35,11 +67,32 @@ AsyncSessionLocal = sessionmaker(
 )
 logger = logging.getLogger(__name__)
 
+READ_METHODS = ("GET", "HEAD")
+# Cookie со временем, до которого клиент читает с основной базы.
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+
 
 class Base(DeclarativeBase):
     ...
 
 
+def _trigram_available(ddl, target, bind, **kwargs) -> bool:
+    """Доступно ли в PostgreSQL расширение pg_trgm для индексов поиска."""
+    if bind is None or bind.dialect.name != "postgresql":
+        return False
+    return bind.execute(text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).scalar() is not None
+
+
+def _trigram_index(column: str) -> Index:
+    """GIN-индекс по триграммам столбца (только при наличии pg_trgm)."""
+    return Index(f"ix_users_{column}_trgm", column,
+                 postgresql_using="gin",
+                 postgresql_ops={column: "gin_trgm_ops"}
+                 ).ddl_if(callable_=_trigram_available)
+
+
 class User(Base):
     """
     Таблица с общей информацией о пользователе.
@@ -51,9 +104,21 @@ class User(Base):
         last_name: Фамилия пользователя
         age: Количество полных лет пользователя
         salary: Заработная плата пользователя
-        email: Электронная почта пользователя
+        email: Электронная почта пользователя (уникальна)
+        version: Номер версии, растёт при каждом изменении
+        updated_at: Время последнего изменения
     """
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_age", "age"),
+        Index("ix_users_salary", "salary"),
+        Index("ix_users_email", "email", unique=True),
+        Index("ix_users_last_name", "last_name",
+              postgresql_ops={"last_name": "text_pattern_ops"}),
+        _trigram_index("first_name"),
+        _trigram_index("last_name"),
+        _trigram_index("email"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     first_name = Column(String, nullable=False)
@@ -61,6 +126,277 @@ class User(Base):
     age = Column(Integer, nullable=False, default=0)
     salary = Column(Float, nullable=True, default=0.0)
     email = Column(String, nullable=True)
+    version = Column(Integer, nullable=False, server_default="1")
+    updated_at = Column(DateTime(timezone=True), nullable=False,
+                        server_default=func.now())
+
+
+event.listen(User.__table__, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"
+                 ).execute_if(callable_=_trigram_available))
+
+
+class UserStats(Base):
+    """
+    Сводка пользователей по корзинам возраста и зарплаты.
+
+    Args:
+
+        age_bucket: Номер корзины возраста (age // USER_STATS_AGE_BUCKET)
+        salary_bucket: Номер корзины зарплаты (см. salary_bucket)
+        users: Количество пользователей
+        salary_count: Количество пользователей с указанной зарплатой
+        salary_sum: Сумма зарплат
+        salary_min: Наименьшая зарплата в корзине
+        salary_max: Наибольшая зарплата в корзине
+    """
+    __tablename__ = "user_stats"
+
+    age_bucket = Column(Integer, primary_key=True, autoincrement=False)
+    salary_bucket = Column(Integer, primary_key=True, autoincrement=False)
+    users = Column(Integer, nullable=False, default=0)
+    salary_count = Column(Integer, nullable=False, default=0)
+    salary_sum = Column(Float, nullable=False, default=0.0)
+    salary_min = Column(Float, nullable=True)
+    salary_max = Column(Float, nullable=True)
+
+
+class UserStatsState(Base):
+    """
+    Состояние сводки user_stats (одна строка с id = 1).
+
+    Args:
+
+        dirty_since: С какого времени сводка не учитывает пакетные
+            изменения (None - сводка актуальна)
+        rebuilt_at: Время последнего полного пересчёта
+    """
+    __tablename__ = "user_stats_state"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    dirty_since = Column(DateTime(timezone=True), nullable=True)
+    rebuilt_at = Column(DateTime(timezone=True), nullable=True)
+
+
+USER_FIELDS = ("first_name", "last_name", "age", "salary", "email")
+# Столбцы таблицы (Core), а не атрибуты ORM: запрос по ним не проходит
+# через ORM-компиляцию и выполняется быстрее на коротких чтениях.
+USER_COLUMNS = tuple(User.__table__.c[field] for field in ("id", *USER_FIELDS))
+VERSION_COLUMNS = (User.__table__.c.version, User.__table__.c.updated_at)
+# Изменение пользователя: новая версия и время изменения.
+NEW_VERSION = {"version": User.version + 1, "updated_at": func.now()}
+
+
+def _timestamp(value: datetime) -> float:
+    """Время в секундах UTC (SQLite отдаёт время без часового пояса)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# Корзина пользователей без зарплаты и с зарплатой меньше 1.
+NO_SALARY_BUCKET = -2
+LOW_SALARY_BUCKET = -1
+STATS_STATE_ID = 1
+
+
+def age_bucket(age: int) -> int:
+    """Корзина возраста для сводки."""
+    return age // USER_STATS_AGE_BUCKET
+
+
+def salary_bucket(salary: float | None) -> int:
+    """
+    Корзина зарплаты для сводки.
+
+    Корзины логарифмические: USER_STATS_SALARY_BUCKETS на каждый
+    десятичный порядок, поэтому ширина корзины - постоянная доля
+    зарплаты, а не постоянная сумма.
+    """
+    if salary is None:
+        return NO_SALARY_BUCKET
+    if salary < 1:
+        return LOW_SALARY_BUCKET
+    return math.floor(math.log10(salary) * USER_STATS_SALARY_BUCKETS)
+
+
+def salary_bucket_bounds(bucket: int) -> tuple[float, float]:
+    """Границы корзины зарплаты [нижняя, верхняя)."""
+    if bucket == LOW_SALARY_BUCKET:
+        return -math.inf, 1.0
+    return (10 ** (bucket / USER_STATS_SALARY_BUCKETS),
+            10 ** ((bucket + 1) / USER_STATS_SALARY_BUCKETS))
+
+
+def dialect_insert(session: AsyncSession):
+    """INSERT с ON CONFLICT для диалекта сессии."""
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def _keep_extreme(current, new, smaller: bool):
+    """Новый минимум/максимум корзины, None в new - без изменений."""
+    better = new < current if smaller else new > current
+    return case((new.is_(None), current),
+                ((current.is_(None)) | better, new),
+                else_=current)
+
+
+async def _record_stats(session: AsyncSession,
+                        added: list[tuple] = (),
+                        removed: list[tuple] = ()) -> None:
+    """
+    Изменение сводки user_stats в транзакции записи пользователя.
+
+    Args:
+
+        added: Пары (возраст, зарплата) добавленных пользователей
+        removed: Пары (возраст, зарплата) удалённых пользователей
+
+    Notes:
+        Счётчики и сумма меняются на разницу, минимум и максимум
+        при добавлении - через сравнение. Если удалённая зарплата
+        была минимумом или максимумом корзины, они пересчитываются
+        по пользователям этой корзины (через индексы age и salary).
+    """
+    if not USER_STATS_ENABLED:
+        return
+    deltas = defaultdict(lambda: {"users": 0, "salary_count": 0,
+                                  "salary_sum": 0.0, "salary_min": None,
+                                  "salary_max": None})
+    for sign, pairs in ((1, added), (-1, removed)):
+        for age, salary in pairs:
+            delta = deltas[age_bucket(age), salary_bucket(salary)]
+            delta["users"] += sign
+            if salary is not None:
+                delta["salary_count"] += sign
+                delta["salary_sum"] += sign * salary
+                if sign > 0 and delta["salary_min"] is None:
+                    delta["salary_min"] = delta["salary_max"] = salary
+                elif sign > 0:
+                    delta["salary_min"] = min(delta["salary_min"], salary)
+                    delta["salary_max"] = max(delta["salary_max"], salary)
+    removed_salaries = defaultdict(list)
+    for age, salary in removed:
+        if salary is not None:
+            removed_salaries[age_bucket(age), salary_bucket(salary)].append(
+                salary)
+    for cell in await _add_stats_deltas(session, deltas):
+        salaries = removed_salaries.get(
+            (cell.age_bucket, cell.salary_bucket), ())
+        if any(salary in (cell.salary_min, cell.salary_max)
+               for salary in salaries):
+            await _recompute_extremes(session, cell.age_bucket,
+                                      cell.salary_bucket)
+
+
+async def _add_stats_deltas(session: AsyncSession, deltas: dict) -> list:
+    """
+    Прибавление разниц к корзинам сводки одним запросом.
+
+    Args:
+
+        deltas: {(корзина возраста, корзина зарплаты): словарь users,
+            salary_count, salary_sum, salary_min, salary_max}; минимум
+            и максимум None - без изменений
+
+    Returns:
+
+        Изменённые корзины (age_bucket, salary_bucket, salary_min,
+        salary_max).
+    """
+    if not deltas:
+        return []
+    table = UserStats.__table__
+    # Строки идут по порядку ключей, чтобы одновременные записи
+    # блокировали корзины в одном порядке.
+    query = dialect_insert(session)(table).values([
+        {"age_bucket": age_key, "salary_bucket": salary_key, **delta}
+        for (age_key, salary_key), delta in sorted(deltas.items())])
+    query = query.on_conflict_do_update(
+        index_elements=[table.c.age_bucket, table.c.salary_bucket],
+        set_={"users": table.c.users + query.excluded.users,
+              "salary_count": (table.c.salary_count
+                               + query.excluded.salary_count),
+              "salary_sum": table.c.salary_sum + query.excluded.salary_sum,
+              "salary_min": _keep_extreme(
+                  table.c.salary_min, query.excluded.salary_min, True),
+              "salary_max": _keep_extreme(
+                  table.c.salary_max, query.excluded.salary_max, False)}
+    ).returning(table.c.age_bucket, table.c.salary_bucket,
+                table.c.salary_min, table.c.salary_max)
+    return (await session.execute(query)).all()
+
+
+async def _recompute_extremes(session: AsyncSession, age_key: int,
+                              salary_key: int) -> None:
+    """Пересчёт минимума и максимума зарплаты одной корзины."""
+    low, high = salary_bucket_bounds(salary_key)
+    # Границы расширены: корзину точно определяет salary_bucket,
+    # а не сравнение с округлёнными границами в SQL.
+    conditions = [User.age >= age_key * USER_STATS_AGE_BUCKET,
+                  User.age < (age_key + 1) * USER_STATS_AGE_BUCKET,
+                  User.salary < high * (1 + 1e-9)]
+    if low > -math.inf:
+        conditions.append(User.salary >= low * (1 - 1e-9))
+    salaries = [salary for salary in await session.scalars(
+        select(User.salary).where(*conditions))
+        if salary_bucket(salary) == salary_key]
+    table = UserStats.__table__
+    await session.execute(
+        update(table)
+        .where(table.c.age_bucket == age_key,
+               table.c.salary_bucket == salary_key)
+        .values(salary_min=min(salaries, default=None),
+                salary_max=max(salaries, default=None)))
+
+
+async def mark_stats_dirty(session: AsyncSession) -> None:
+    """
+    Отметка, что сводка не учитывает часть изменений.
+
+    Вызывается в транзакции записи, которая не может посчитать разницу
+    для сводки (upsert, у которого гонка отняла прежние значения
+    строки); сводку перестраивает
+    app.database.stats в пределах USER_STATS_MAX_STALENESS. В одной
+    транзакции вызывается до _record_stats: так строки состояния и
+    сводки блокируются в одном порядке.
+    """
+    if not USER_STATS_ENABLED:
+        return
+    table = UserStatsState.__table__
+    query = dialect_insert(session)(table).values(
+        id=STATS_STATE_ID, dirty_since=func.now())
+    await session.execute(query.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={"dirty_since": func.coalesce(table.c.dirty_since,
+                                           func.now())}))
+
+
+def escape_like(value: str) -> str:
+    """Экранирование %, _ и \\ для LIKE с escape="\\"."""
+    return (value.replace("\\", "\\\\")
+            .replace("%", "\\%").replace("_", "\\_"))
+
+
+def _user_filters(min_age: int = None, max_age: int = None,
+                  min_salary: float = None, max_salary: float = None,
+                  last_name_prefix: str = None) -> list:
+    """Условия WHERE для фильтров по возрасту, зарплате и фамилии."""
+    conditions = []
+    if min_age is not None:
+        conditions.append(User.age >= min_age)
+    if max_age is not None:
+        conditions.append(User.age <= max_age)
+    if min_salary is not None:
+        conditions.append(User.salary >= min_salary)
+    if max_salary is not None:
+        conditions.append(User.salary <= max_salary)
+    if last_name_prefix:
+        conditions.append(User.last_name.like(
+            escape_like(last_name_prefix) + "%", escape="\\"))
+    return conditions
 
 
 async def create_tables() -> None:
@@ -75,13 +411,53 @@ async def drop_all_tables() -> None:
         await conn.run_sync(Base.metadata.drop_all)
 
 
-async def get_session() -> AsyncGenerator[AsyncGenerator,
+def _session_factory(request: Request | None,
+                     response: Response | None) -> sessionmaker:
+    """
+    Фабрика сессий основной базы или реплики для запроса.
+
+    GET и HEAD читают с реплики, если есть здоровая реплика и клиент
+    не записывал данные последние READ_YOUR_WRITES_SECONDS секунд.
+    Остальные запросы идут в основную базу и отмечают запись cookie.
+    """
+    if request is None or not replica_set.replicas:
+        return AsyncSessionLocal
+    if request.method not in READ_METHODS:
+        if READ_YOUR_WRITES_SECONDS > 0 and response is not None:
+            response.set_cookie(
+                READ_YOUR_WRITES_COOKIE,
+                str(time.time() + READ_YOUR_WRITES_SECONDS),
+                max_age=math.ceil(READ_YOUR_WRITES_SECONDS), httponly=True)
+        return AsyncSessionLocal
+    try:
+        read_primary_until = float(
+            request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        read_primary_until = 0
+    replica = (replica_set.choose()
+               if read_primary_until < time.time() else None)
+    return replica.session_factory if replica else AsyncSessionLocal
+
+
+async def get_session(request: Request = None, response: Response = None
+                      ) -> AsyncGenerator[AsyncGenerator,
                                           None]:
-    """Функция получения асинхронной сессии."""
-    async with AsyncSessionLocal() as session:
+    """Функция получения асинхронной сессии (основной базы или реплики)."""
+    async with _session_factory(request, response)() as session:
         yield session
 
 
+def get_session_factory(request: Request = None) -> sessionmaker:
+    """
+    Функция получения фабрики асинхронных сессий.
+
+    Нужна потоковым ответам: зависимость get_session закрывает
+    сессию до отправки тела ответа, поэтому генератор ответа
+    открывает свою сессию сам.
+    """
+    return _session_factory(request, None)
+
+
 async def get_one_user(user_id: int,
                        session: AsyncSession = Depends(get_session)
                        ) -> dict | str:
@@ -97,24 +473,213 @@ async def get_one_user(user_id: int,
         Возвращает словарь с информацией о пользователе,
         если пользователь присутствует в базе, иначе строку
         'Пользователя нет в базе!'
+
+    Notes:
+        Результат (в том числе отсутствие пользователя) сохраняется
+        в user_cache, если кэш включён и чтение шло с основной базы:
+        отстающая реплика не должна класть в общий кэш старые данные,
+        которые запись уже сбросила. Одновременные чтения одного
+        ID объединяются в один запрос (single_flight.user_reads),
+        который выполняется своей сессией. Выбираются только столбцы
+        ответа кортежем, без создания ORM-объекта User. Кроме полей
+        ответа словарь содержит version и updated_at (секунды UTC)
+        для заголовков ETag и Last-Modified. Транзакция session
+        перед чтением завершается: запрос не держит второе соединение
+        пула, пока ждёт общее чтение.
     """
-    result = await session.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-    if isinstance(user, User):
-        return {"id": user.id,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "age": user.age,
-                "salary": user.salary,
-                "email": user.email}
+    cached = await user_cache.get(user_id)
+    if cached is not CACHE_MISS:
+        return cached
+    if session.in_transaction():
+        await session.commit()
+    cache = not replica_set.is_replica(session.bind)
+    return await user_reads.do(
+        user_id, lambda: _load_user(user_id, session.bind, cache),
+        group=session.bind)
+
+
+async def _load_user(user_id: int, bind: AsyncEngine,
+                     cache: bool = True) -> dict | str:
+    """
+    Чтение пользователя для get_one_user отдельной сессией.
+
+    Результат сохраняется в user_cache, только если cache и
+    пользователя не изменили, пока шло чтение: в этом процессе
+    (user_reads.is_current) и в других воркерах (generation ключа
+    в общем кэше).
+    """
+    generation = await user_cache.generation(user_id) if cache else None
+    async with AsyncSession(bind) as session:
+        result = await session.execute(
+            select(*USER_COLUMNS, *VERSION_COLUMNS)
+            .where(User.__table__.c.id == user_id)
+        )
+        row = result.one_or_none()
+    cache = cache and user_reads.is_current(user_id)
+    if row is not None:
+        data = row._asdict()
+        data["updated_at"] = _timestamp(data["updated_at"])
+        if cache:
+            await user_cache.set(user_id, data, generation=generation)
+        return data
     else:
         logger.info(
-            f"Попытка получения несущуствующего пользователя ID: {user_id}")
+            "Попытка получения несущуствующего пользователя ID: %s", user_id,
+            extra={"sample": True})
+        if cache:
+            await user_cache.set(user_id, "Пользователя нет в базе!",
+                                 ttl=user_cache.negative_ttl,
+                                 generation=generation)
         return "Пользователя нет в базе!"
 
 
+async def _invalidate_user(user_id: int) -> None:
+    """Сброс кэша и чтения в полёте после изменения пользователя."""
+    user_reads.forget(user_id)
+    await user_cache.invalidate(user_id)
+
+
+async def get_user_version(user_id: int,
+                           session: AsyncSession = Depends(get_session)
+                           ) -> tuple[int, float] | None:
+    """
+    Версия и время изменения пользователя.
+
+    Нужна для условных запросов (If-None-Match): читаются только
+    два столбца, а если пользователь есть в user_cache - ни одного.
+
+    Args:
+
+        user_id: ID пользователя в базе данных
+
+    Returns:
+
+        Кортеж (version, updated_at в секундах UTC) или None,
+        если пользователя нет в базе.
+    """
+    cached = await user_cache.get(user_id)
+    if isinstance(cached, dict) and "version" in cached:
+        return cached["version"], cached["updated_at"]
+    result = await session.execute(
+        select(*VERSION_COLUMNS).where(User.__table__.c.id == user_id))
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return row.version, _timestamp(row.updated_at)
+
+
+async def get_many_users(user_ids: list[int],
+                         session: AsyncSession = Depends(get_session)
+                         ) -> dict:
+    """
+    Получение информации о нескольких пользователях.
+
+    ID запрашиваются частями по BATCH_READ_CHUNK, каждая часть -
+    одним запросом WHERE id = ANY(:ids) (IN для других СУБД).
+    Выбираются только колонки, без создания ORM-объектов.
+
+    Args:
+
+        user_ids: Список ID пользователей в базе данных
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Возвращает словарь с ключами 'users' - найденные пользователи
+        по ID и 'missing' - список ID, которых нет в базе.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    connection = await session.connection()
+    users = {}
+    for start in range(0, len(user_ids), BATCH_READ_CHUNK):
+        chunk = user_ids[start:start + BATCH_READ_CHUNK]
+        if connection.dialect.name == "postgresql":
+            condition = User.id == any_(
+                bindparam("user_ids", chunk, type_=ARRAY(Integer)))
+        else:
+            condition = User.id.in_(chunk)
+        result = await session.execute(
+            select(*USER_COLUMNS).where(condition))
+        for row in result:
+            users[row.id] = row._asdict()
+    missing = [user_id for user_id in user_ids if user_id not in users]
+    return {"users": users, "missing": missing}
+
+
+async def get_users_page(cursor: int = 0, limit: int = 100,
+                         min_age: int = None, max_age: int = None,
+                         min_salary: float = None, max_salary: float = None,
+                         last_name_prefix: str = None,
+                         session: AsyncSession = Depends(get_session)
+                         ) -> dict:
+    """
+    Постраничный список пользователей с фильтрами.
+
+    Пагинация по ключу: страница начинается после ID из cursor,
+    поэтому любая страница читается через индекс так же быстро,
+    как первая.
+
+    Args:
+
+        cursor: ID, после которого начинается страница
+        limit: Размер страницы
+        min_age, max_age: Диапазон возраста
+        min_salary, max_salary: Диапазон заработной платы
+        last_name_prefix: Начало фамилии
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Возвращает словарь с ключами 'users' - список пользователей
+        и 'next_cursor' - cursor следующей страницы или None,
+        если страница последняя.
+    """
+    query = select(*USER_COLUMNS).where(
+        User.id > cursor,
+        *_user_filters(min_age, max_age, min_salary, max_salary,
+                       last_name_prefix))
+    result = await session.execute(
+        query.order_by(User.id).limit(limit + 1))
+    users = [row._asdict() for row in result]
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = users[-1]["id"]
+    return {"users": users, "next_cursor": next_cursor}
+
+
+async def stream_users(session_factory: sessionmaker,
+                       chunk_rows: int = 1000
+                       ) -> AsyncIterator[list[dict]]:
+    """
+    Потоковое чтение всех пользователей.
+
+    Строки читаются серверным курсором порциями по chunk_rows,
+    поэтому расход памяти не зависит от размера таблицы.
+
+    Args:
+
+        session_factory: Фабрика асинхронных сессий
+        chunk_rows: Количество строк в одной порции
+
+    Yields:
+
+        Списки словарей с информацией о пользователях.
+    """
+    async with session_factory() as session:
+        result = await session.stream(
+            select(*USER_COLUMNS).order_by(User.id)
+            .execution_options(yield_per=chunk_rows))
+        async for partition in result.partitions():
+            yield [row._asdict() for row in partition]
+
+
+def _email_taken(email: str) -> dict:
+    """Ответ на нарушение уникальности email."""
+    return {"message": f"Пользователь с email {email} уже существует!",
+            "status_code": 409}
+
+
 async def add_one_user(first_name: str, last_name: str,
                        age: int, salary: float, email: str,
                        session: AsyncSession = Depends(get_session)
@@ -134,7 +699,8 @@ async def add_one_user(first_name: str, last_name: str,
     Returns:
 
         Возвращает словарь с ключём 'message' - сообщение об успехе
-        или провале операции, а так же 'status_code'.
+        или провале операции, а так же 'status_code' (409, если
+        пользователь с таким email уже есть).
     """
     user = User(first_name=first_name, last_name=last_name,
                 age=age, salary=salary, email=email)
@@ -144,7 +710,13 @@ async def add_one_user(first_name: str, last_name: str,
         user.salary and user.email
     ):
         session.add(user)
-        await session.commit()
+        try:
+            await _record_stats(session, added=[(age, salary)])
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return _email_taken(email)
+        await _invalidate_user(user.id)
         return {"message": "Пользователь добавлен!", "status_code": 200}
     else:
         logger.debug(
@@ -154,9 +726,171 @@ async def add_one_user(first_name: str, last_name: str,
             "status_code": 422}
 
 
+async def _insert_users(session: AsyncSession,
+                        rows: list[dict]) -> list[int]:
+    """
+    Вставка пачки строк одним запросом.
+
+    Для asyncpg используется COPY, для остальных драйверов -
+    многострочный INSERT ... RETURNING. COPY выполняется
+    в транзакции сессии: строки не сохранятся, если сессия
+    откатится. COPY не возвращает ID, поэтому они читаются
+    по уникальным email вставленных строк.
+
+    Returns:
+
+        Возвращает ID добавленных пользователей.
+    """
+    connection = await session.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw = await connection.get_raw_connection()
+        # Адаптер asyncpg открывает транзакцию только при первом
+        # запросе через него, а COPY идёт мимо адаптера.
+        if not raw.dbapi_connection._started:
+            await raw.dbapi_connection._start_transaction()
+        await raw.driver_connection.copy_records_to_table(
+            User.__tablename__,
+            records=[tuple(row[field] for field in USER_FIELDS)
+                     for row in rows],
+            columns=USER_FIELDS)
+        result = await session.execute(
+            select(User.id).where(User.email.in_(
+                [row["email"] for row in rows])))
+    else:
+        result = await session.execute(insert(User).returning(User.id),
+                                       rows)
+    return list(result.scalars())
+
+
+async def add_many_users(rows: list[tuple[int, dict]],
+                         session: AsyncSession = Depends(get_session)
+                         ) -> dict:
+    """
+    Пакетное добавление пользователей в базу данных.
+
+    Вся пачка записывается в одной транзакции. Если база отклонила
+    пачку, строки повторно вставляются по одной (через SAVEPOINT),
+    чтобы отбросить только ошибочные. После записи кэш и чтения
+    в полёте для новых ID сбрасываются, как при других изменениях:
+    иначе в кэше до negative_ttl оставался бы ответ "нет в базе".
+
+    Args:
+
+        rows: Список пар (номер строки, данные пользователя)
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Возвращает словарь с ключами 'inserted' - количество
+        добавленных пользователей и 'rejected' - список отклонённых
+        строк с описанием ошибок.
+    """
+    try:
+        user_ids = await _insert_users(session, [row for _, row in rows])
+        await _record_stats(session, added=[(row["age"], row["salary"])
+                                            for _, row in rows])
+        await session.commit()
+        for user_id in user_ids:
+            await _invalidate_user(user_id)
+        return {"inserted": len(rows), "rejected": []}
+    except (SQLAlchemyError, PostgresError) as ex:
+        await session.rollback()
+        logger.debug("Пачка пользователей отклонена базой: %s", ex)
+
+    inserted, rejected, user_ids = [], [], []
+    for number, row in rows:
+        try:
+            async with session.begin_nested():
+                user_ids.append(await session.scalar(
+                    insert(User).values(**row).returning(User.id)))
+            inserted.append((row["age"], row["salary"]))
+        except IntegrityError:
+            rejected.append({"row": number,
+                             "errors": [_email_taken(row["email"])[
+                                 "message"]]})
+        except SQLAlchemyError as ex:
+            rejected.append({"row": number,
+                             "errors": [str(getattr(ex, "orig", ex))]})
+    await _record_stats(session, added=inserted)
+    await session.commit()
+    for user_id in user_ids:
+        await _invalidate_user(user_id)
+    return {"inserted": len(inserted), "rejected": rejected}
+
+
+async def upsert_users(rows: list[dict],
+                       session: AsyncSession = Depends(get_session)
+                       ) -> list[dict]:
+    """
+    Добавление или изменение пользователей по email.
+
+    Каждая пачка до BULK_BATCH_SIZE строк - один запрос
+    INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING id:
+    нет ни проверки перед вставкой, ни гонки между ними, а повтор
+    того же запроса не создаёт дубликатов.
+
+    Args:
+
+        rows: Данные пользователей (поля USER_FIELDS)
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Список словарей 'id', 'email' и 'created' (True - добавлен,
+        False - изменён) в порядке rows.
+
+    Notes:
+        Из строк с одинаковым email записывается последняя. Добавленный
+        пользователь получает версию 1, изменённый - следующую, по ней
+        и определяется 'created'. Прежние возраст и зарплату пачка
+        берёт с блокировкой строк до записи и меняет сводку user_stats
+        по разнице; строку, добавленную параллельно между выборкой и
+        записью, сводка не учтёт, и она отмечается устаревшей.
+    """
+    table = User.__table__
+    unique = list({row["email"]: row for row in rows}.values())
+    results = {}
+    for start in range(0, len(unique), BULK_BATCH_SIZE):
+        chunk = unique[start:start + BULK_BATCH_SIZE]
+        old = {row.email: (row.age, row.salary)
+               for row in await session.execute(
+                   select(User.email, User.age, User.salary)
+                   .where(User.email.in_([row["email"] for row in chunk]))
+                   .with_for_update())}
+        query = dialect_insert(session)(table).values(chunk)
+        query = query.on_conflict_do_update(
+            index_elements=[table.c.email],
+            set_={**{field: query.excluded[field] for field in USER_FIELDS
+                     if field != "email"},
+                  "version": table.c.version + 1,
+                  "updated_at": func.now()},
+        ).returning(table.c.id, table.c.email, table.c.version,
+                    table.c.age, table.c.salary)
+        written, added, removed, raced = [], [], [], False
+        for row in await session.execute(query):
+            written.append({"id": row.id, "email": row.email,
+                            "created": row.version == 1})
+            if row.email in old:
+                removed.append(old[row.email])
+            elif row.version != 1:
+                raced = True
+                continue
+            added.append((row.age, row.salary))
+        if raced:
+            await mark_stats_dirty(session)
+        await _record_stats(session, added=added, removed=removed)
+        await session.commit()
+        for result in written:
+            results[result["email"]] = result
+            await _invalidate_user(result["id"])
+    return [results[row["email"]] for row in rows]
+
+
 async def update_user_info(user_id: int, first_name: str = None,
                            last_name: str = None, age: int = None,
                            salary: float = None, email: str = None,
+                           expected_versions: list[int] = None,
+                           match_any: bool = False,
                            session: AsyncSession = Depends(get_session)
                            ) -> dict:
     """
@@ -169,34 +903,95 @@ async def update_user_info(user_id: int, first_name: str = None,
         age: Количество полных лет пользователя
         salary: Заработная плата пользователя
         email: Электронная почта пользователя
+        expected_versions: Изменять, только если текущая версия
+            пользователя одна из этих (If-Match)
+        match_any: If-Match: * - если пользователя нет, status_code
+            412, а не 404
         session: Асинхронная сессия для базы данных.
 
     Returns:
 
         Возвращает словарь с ключём 'message' - сообщение об успехе
-        или провале операции, а так же 'status_code'.
+        или провале операции, а так же 'status_code'. При успехе
+        в словаре есть новые 'version' и 'updated_at'.
+
+    Notes:
+        Изменение выполняется одним запросом
+        UPDATE ... WHERE id = :id RETURNING id только по переданным
+        (не None) полям, без предварительной загрузки пользователя.
+        Проверка версии - условие того же запроса, поэтому
+        одновременным изменениям не нужны блокировки строк. Прежние
+        возраст и зарплату для сводки user_stats в PostgreSQL
+        возвращает тот же UPDATE, сводка меняется ещё одним запросом.
     """
-    result = await session.execute(
-        select(User).filter_by(id=user_id)
-    )
-    user = result.scalar_one_or_none()
-    if user is not None:
-        if first_name is not None:
-            user.first_name = first_name
-        if last_name is not None:
-            user.last_name = last_name
-        if age is not None:
-            user.age = age
-        if salary is not None:
-            user.salary = salary
-        if email is not None:
-            user.email = email
+    values = {field: value for field, value in (
+        ("first_name", first_name), ("last_name", last_name),
+        ("age", age), ("salary", salary), ("email", email))
+        if value is not None}
+    track_stats = USER_STATS_ENABLED and (
+        age is not None or salary is not None)
+    old = None
+    if track_stats and session.bind.dialect.name == "postgresql":
+        # Прежние возраст и зарплата для сводки возвращает сам UPDATE:
+        # подзапрос блокирует строку и читает её последнюю версию.
+        previous = (select(User.id, User.age, User.salary)
+                    .where(User.id == user_id).with_for_update()
+                    .subquery("old"))
+        # Без synchronize_session=False ORM добавляет в RETURNING
+        # первичный ключ, и столбцы ответа сдвигаются.
+        query = (update(User).where(User.id == previous.c.id)
+                 .values(**values, **NEW_VERSION)
+                 .returning(User.version, User.updated_at,
+                            previous.c.age.label("old_age"),
+                            previous.c.salary.label("old_salary"))
+                 .execution_options(synchronize_session=False))
+    elif values:
+        if track_stats:
+            # SQLite не отдаёт в RETURNING столбцы из FROM: прежние
+            # значения читаются отдельно в той же транзакции.
+            old = (await session.execute(
+                select(User.age, User.salary).where(User.id == user_id)
+                )).one_or_none()
+        query = (update(User).where(User.id == user_id)
+                 .values(**values, **NEW_VERSION)
+                 .returning(User.version, User.updated_at))
+    else:
+        query = select(User.version, User.updated_at).where(
+            User.id == user_id)
+    if expected_versions is not None:
+        query = query.where(User.version.in_(expected_versions))
+    try:
+        row = (await session.execute(query)).one_or_none()
+    except IntegrityError:
+        await session.rollback()
+        return _email_taken(email)
+    if row is not None:
+        if "old_age" in row._fields:
+            old = (row.old_age, row.old_salary)
+        if old is not None:
+            old = tuple(old)
+            new = (old[0] if age is None else age,
+                   old[1] if salary is None else salary)
+            if new != old:
+                await _record_stats(session, added=[new], removed=[old])
         await session.commit()
+        await _invalidate_user(user_id)
         return {"message": f"Данные пользователя с ID: {user_id} изменены!",
-                "status_code": 200}
+                "status_code": 200,
+                "version": row.version,
+                "updated_at": _timestamp(row.updated_at)}
+    elif match_any:
+        return {"message": f"Пользователь с ID: {user_id} не найден!",
+                "status_code": 412}
+    elif expected_versions is not None and await session.scalar(
+            select(User.id).where(User.id == user_id)) is not None:
+        return {"message": (f"Данные пользователя с ID: {user_id} "
+                            "уже изменены другим запросом!"),
+                "status_code": 412}
     else:
         logger.info(
-            f"Попытка получения несущуствующего пользователя ID: {user_id}")
+            "Попытка получения несущуствующего пользователя ID: %s", user_id,
+            extra={"sample": True})
         return {"message": f"Пользователь с ID: {user_id} не найден!",
                 "status_code": 404}
 
@@ -216,18 +1011,180 @@ async def delete_one_user(user_id: int,
 
         Возвращает словарь с ключём 'message' - сообщение об успехе
         или провале операции, а так же 'status_code'.
+
+    Notes:
+        Удаление выполняется одним запросом
+        DELETE ... WHERE id = :id RETURNING id, age, salary,
+        возраст и зарплата нужны для сводки user_stats.
     """
     result = await session.execute(
-        select(User).filter_by(id=user_id)
+        delete(User).where(User.id == user_id)
+        .returning(User.id, User.age, User.salary)
     )
-    user = result.scalar_one_or_none()
-    if isinstance(user, User):
-        await session.delete(user)
+    row = result.one_or_none()
+    if row is not None:
+        await _record_stats(session, removed=[(row.age, row.salary)])
         await session.commit()
+        await _invalidate_user(user_id)
         return {"message": f"Пользователь с ID: {user_id} удалён!",
                 "status_code": 200}
     else:
         logger.info(
-            f"Попытка получения несущуствующего пользователя ID: {user_id}")
+            "Попытка получения несущуствующего пользователя ID: %s", user_id,
+            extra={"sample": True})
         return {"message": f"Пользователь с ID: {user_id} не найден!",
                 "status_code": 404}
+
+
+async def update_many_users(updates: list[dict],
+                            session: AsyncSession = Depends(get_session)
+                            ) -> dict:
+    """
+    Пакетное обновление информации о пользователях.
+
+    Изменения обрабатываются частями по BULK_BATCH_SIZE, каждая часть -
+    в своей транзакции: существующие ID блокируются одним
+    SELECT ... FOR UPDATE, затем изменения с одинаковым набором полей
+    отправляются одним executemany UPDATE по первичному ключу,
+    а версия изменённых пользователей растёт одним UPDATE.
+
+    Args:
+
+        updates: Список словарей с ключом 'id' и изменяемыми полями
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Возвращает словарь с ключами 'updated' - количество
+        обновлённых пользователей (без тех, для кого передан только
+        ID) и 'missing' - список ID, которых нет в базе. Если email
+        уже занят другим пользователем, часть с ним откатывается и
+        возвращается ответ _email_taken (status_code 409); изменения
+        предыдущих частей остаются в базе.
+    """
+    updated, missing = 0, []
+    for start in range(0, len(updates), BULK_BATCH_SIZE):
+        chunk = updates[start:start + BULK_BATCH_SIZE]
+        ids = {row["id"] for row in chunk}
+        old = {row.id: (row.age, row.salary)
+               for row in await session.execute(
+                   select(User.id, User.age, User.salary)
+                   .where(User.id.in_(ids)).with_for_update())}
+        existing = set(old)
+        groups, changed, new = {}, set(), dict(old)
+        for row in chunk:
+            if row["id"] in existing and len(row) > 1:
+                groups.setdefault(tuple(sorted(row)), []).append(row)
+                changed.add(row["id"])
+                age, salary = new[row["id"]]
+                new[row["id"]] = (row.get("age", age),
+                                  row.get("salary", salary))
+        try:
+            for rows in groups.values():
+                await session.execute(update(User), rows)
+        except IntegrityError:
+            await session.rollback()
+            return _email_taken(await _taken_email(chunk, session))
+        if changed:
+            await session.execute(
+                update(User).where(User.id.in_(changed))
+                .values(**NEW_VERSION), execution_options={
+                    "synchronize_session": False})
+            moved = [user_id for user_id in changed
+                     if new[user_id] != old[user_id]]
+            await _record_stats(
+                session, added=[new[user_id] for user_id in moved],
+                removed=[old[user_id] for user_id in moved])
+        await session.commit()
+        for user_id in changed:
+            await _invalidate_user(user_id)
+        updated += len(changed)
+        missing.extend(sorted(ids - existing))
+    return {"updated": updated, "missing": missing}
+
+
+async def _taken_email(chunk: list[dict],
+                       session: AsyncSession) -> str | None:
+    """Email из пачки изменений, занятый другим пользователем."""
+    owners = {}
+    for row in chunk:
+        if row.get("email") is not None:
+            if owners.setdefault(row["email"], row["id"]) != row["id"]:
+                return row["email"]
+    result = await session.execute(
+        select(User.id, User.email).where(User.email.in_(owners)))
+    return next((email for user_id, email in result
+                 if owners[email] != user_id), next(iter(owners), None))
+
+
+async def delete_many_users(user_ids: list[int] = None,
+                            min_age: int = None, max_age: int = None,
+                            min_salary: float = None,
+                            max_salary: float = None,
+                            last_name_prefix: str = None,
+                            session: AsyncSession = Depends(get_session)
+                            ) -> dict:
+    """
+    Пакетное удаление пользователей из базы данных.
+
+    Удаляются пользователи из списка user_ids либо все, подходящие
+    под фильтры. Удаление идёт частями по BULK_BATCH_SIZE строк
+    запросами DELETE ... RETURNING id, каждая часть - в своей
+    транзакции, чтобы не держать долгих блокировок.
+
+    Args:
+
+        user_ids: Список ID пользователей
+        min_age, max_age: Диапазон возраста
+        min_salary, max_salary: Диапазон заработной платы
+        last_name_prefix: Начало фамилии
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Возвращает словарь с ключами 'deleted' - количество
+        удалённых пользователей и 'missing' - список ID из user_ids,
+        которых нет в базе.
+    """
+    deleted, missing = 0, []
+    if user_ids is not None:
+        user_ids = list(dict.fromkeys(user_ids))
+        for start in range(0, len(user_ids), BULK_BATCH_SIZE):
+            chunk = user_ids[start:start + BULK_BATCH_SIZE]
+            removed = await _delete_returning(session, User.id.in_(chunk))
+            deleted += len(removed)
+            missing.extend(user_id for user_id in chunk
+                           if user_id not in removed)
+        return {"deleted": deleted, "missing": missing}
+
+    conditions = _user_filters(min_age, max_age, min_salary, max_salary,
+                               last_name_prefix)
+    while True:
+        chunk = (select(User.id).where(*conditions)
+                 .limit(BULK_BATCH_SIZE).scalar_subquery())
+        removed = await _delete_returning(session, User.id.in_(chunk))
+        deleted += len(removed)
+        if len(removed) < BULK_BATCH_SIZE:
+            return {"deleted": deleted, "missing": missing}
+
+
+async def _delete_returning(session: AsyncSession,
+                            condition) -> set[int]:
+    """
+    Удаление по условию в отдельной транзакции, возвращает ID.
+
+    Удалённые строки (возраст и зарплата из RETURNING) вычитаются
+    из сводки user_stats в той же транзакции.
+    """
+    result = await session.execute(
+        delete(User).where(condition)
+        .returning(User.id, User.age, User.salary)
+        .execution_options(synchronize_session=False))
+    rows = result.all()
+    removed = {row.id for row in rows}
+    await _record_stats(session, removed=[(row.age, row.salary)
+                                          for row in rows])
+    await session.commit()
+    for user_id in removed:
+        await _invalidate_user(user_id)
+    return removed
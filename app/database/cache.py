@@ -0,0 +1,288 @@
+"""
+Кэш пользователей.
+
+Classes:
+
+    CacheBackend: Интерфейс хранилища кэша
+    MemoryCache: LRU-кэш в памяти процесса
+    RedisCache: Общий для всех воркеров кэш в Redis
+
+Func:
+
+    create_user_cache: Создание кэша по настройкам из config
+
+Args:
+
+    CACHE_MISS: Признак отсутствия записи в кэше
+    user_cache: Кэш, используемый функциями модуля FDataBase
+
+Notes:
+    MemoryCache живёт в каждом процессе отдельно, поэтому при
+    запуске нескольких воркеров uvicorn изменение пользователя
+    в одном воркере не сбросит кэш в остальных. RedisCache хранит
+    одну копию записи для всех воркеров: invalidate удаляет ключ
+    в Redis, и следующее чтение в любом воркере идёт в базу.
+    Чтобы воркер, начавший чтение до чужого изменения, не вернул
+    в Redis устаревшую запись, перед чтением из базы берётся
+    generation ключа, а set с ней ничего не сохраняет, если ключ
+    с тех пор сбросили.
+"""
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+
+from config import (USER_CACHE_ENABLED, USER_CACHE_SIZE, USER_CACHE_TTL,
+                    USER_CACHE_NEGATIVE_TTL, USER_CACHE_BACKEND, REDIS_URL)
+
+
+CACHE_MISS = object()
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Интерфейс хранилища кэша.
+
+    Args:
+
+        ttl: Время жизни записи в секундах
+        negative_ttl: Время жизни записи об отсутствующем пользователе
+        enabled: Включён ли кэш
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float,
+                 enabled: bool = True) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable) -> Any:
+        """Получение записи, CACHE_MISS если её нет или она устарела."""
+        if not self.enabled:
+            return CACHE_MISS
+        value = await self._get(key)
+        if value is CACHE_MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def generation(self, key: Hashable) -> Any:
+        """
+        Метка ключа, меняющаяся при каждом invalidate.
+
+        Берётся перед чтением из базы и передаётся в set. None -
+        проверка не нужна, CACHE_MISS - метку получить не удалось.
+        """
+        if not self.enabled:
+            return None
+        return await self._generation(key)
+
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None,
+                  generation: Any = None) -> None:
+        """
+        Сохранение записи.
+
+        С generation запись сохраняется, только если ключ не
+        сбрасывали после её получения.
+        """
+        if not self.enabled or generation is CACHE_MISS:
+            return
+        await self._set(key, value, self.ttl if ttl is None else ttl,
+                        generation)
+
+    async def _generation(self, key: Hashable) -> Any:
+        return None
+
+    @abstractmethod
+    async def _get(self, key: Hashable) -> Any:
+        ...
+
+    @abstractmethod
+    async def _set(self, key: Hashable, value: Any, ttl: float,
+                   generation: Any = None) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, key: Hashable) -> None:
+        """Удаление записи."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Очистка кэша и счётчиков."""
+
+    async def stats(self) -> dict:
+        """Счётчики попаданий и промахов."""
+        return {"backend": type(self).__name__,
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses}
+
+
+class MemoryCache(CacheBackend):
+    """
+    LRU-кэш в памяти процесса.
+
+    generation не используется: сброс записи в том же процессе
+    отслеживает single_flight.user_reads.
+
+    Args:
+
+        max_size: Максимальное количество записей
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float,
+                 enabled: bool = True) -> None:
+        super().__init__(ttl, negative_ttl, enabled)
+        self.max_size = max_size
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def _get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return CACHE_MISS
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return CACHE_MISS
+        self._data.move_to_end(key)
+        return value
+
+    async def _set(self, key: Hashable, value: Any, ttl: float,
+                   generation: Any = None) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    async def stats(self) -> dict:
+        """Счётчики попаданий, промахов и вытеснений."""
+        return {**await super().stats(),
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "evictions": self.evictions,
+                "expirations": self.expirations}
+
+
+class RedisCache(CacheBackend):
+    """
+    Общий для всех воркеров кэш в Redis.
+
+    Значения хранятся в JSON, время жизни задаётся через SET PX.
+    Вытеснением при нехватке памяти управляет сам Redis
+    (maxmemory-policy). Ошибки Redis не ломают чтение: запись
+    считается отсутствующей, запрос уходит в базу.
+
+    invalidate вместе с удалением записи увеличивает счётчик
+    "<ключ>:generation", а set с generation сохраняет запись
+    в транзакции WATCH/MULTI, только если счётчик не изменился.
+
+    Args:
+
+        client: Асинхронный клиент Redis
+        prefix: Префикс ключей
+    """
+
+    def __init__(self, client: Redis, ttl: float, negative_ttl: float,
+                 enabled: bool = True, prefix: str = "user:") -> None:
+        super().__init__(ttl, negative_ttl, enabled)
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+
+    async def _get(self, key: Hashable) -> Any:
+        try:
+            raw = await self.client.get(f"{self.prefix}{key}")
+        except RedisError as ex:
+            self.errors += 1
+            logger.warning("Ошибка чтения из Redis: %s", ex)
+            return CACHE_MISS
+        return CACHE_MISS if raw is None else json.loads(raw)
+
+    async def _generation(self, key: Hashable) -> Any:
+        try:
+            return await self.client.get(
+                f"{self.prefix}{key}:generation") or b""
+        except RedisError as ex:
+            self.errors += 1
+            logger.warning("Ошибка чтения из Redis: %s", ex)
+            return CACHE_MISS
+
+    async def _set(self, key: Hashable, value: Any, ttl: float,
+                   generation: Any = None) -> None:
+        name, counter = f"{self.prefix}{key}", f"{self.prefix}{key}:generation"
+        px = max(int(ttl * 1000), 1)
+        try:
+            if generation is None:
+                await self.client.set(name, json.dumps(value), px=px)
+                return
+            async with self.client.pipeline() as pipe:
+                await pipe.watch(counter)
+                if (await pipe.get(counter) or b"") != generation:
+                    return
+                pipe.multi()
+                pipe.set(name, json.dumps(value), px=px)
+                await pipe.execute()
+        except WatchError:
+            return
+        except RedisError as ex:
+            self.errors += 1
+            logger.warning("Ошибка записи в Redis: %s", ex)
+
+    async def invalidate(self, key: Hashable) -> None:
+        counter = f"{self.prefix}{key}:generation"
+        try:
+            async with self.client.pipeline() as pipe:
+                pipe.delete(f"{self.prefix}{key}")
+                pipe.incr(counter)
+                pipe.pexpire(counter, max(int(self.ttl * 1000), 1))
+                await pipe.execute()
+        except RedisError as ex:
+            self.errors += 1
+            logger.error("Не удалось сбросить ключ %s в Redis: %s", key, ex)
+
+    async def clear(self) -> None:
+        self.hits = self.misses = self.errors = 0
+        try:
+            async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+                await self.client.delete(key)
+        except RedisError as ex:
+            self.errors += 1
+            logger.error("Не удалось очистить кэш в Redis: %s", ex)
+
+    async def stats(self) -> dict:
+        """Счётчики попаданий, промахов и ошибок Redis этого воркера."""
+        return {**await super().stats(), "errors": self.errors}
+
+
+def create_user_cache() -> CacheBackend:
+    """Создание кэша пользователей по настройкам из config."""
+    if USER_CACHE_BACKEND == "redis":
+        return RedisCache(Redis.from_url(REDIS_URL), ttl=USER_CACHE_TTL,
+                          negative_ttl=USER_CACHE_NEGATIVE_TTL,
+                          enabled=USER_CACHE_ENABLED)
+    return MemoryCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL,
+                       negative_ttl=USER_CACHE_NEGATIVE_TTL,
+                       enabled=USER_CACHE_ENABLED)
+
+
+user_cache = create_user_cache()
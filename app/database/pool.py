@@ -0,0 +1,141 @@
+"""
+Пул соединений с базой данных.
+
+Classes:
+
+    PoolMetrics: Метрики ожидания соединений пула
+    InstrumentedPool: Пул соединений, замеряющий ожидание соединения
+
+Func:
+
+    build_engine: Создание асинхронного движка по настройкам из config
+    pool_stats: Текущее состояние пула движка
+
+Notes:
+    Соединения пулов не переживают fork: в дочернем процессе пулы всех
+    созданных через build_engine движков сбрасываются без закрытия
+    соединений родителя, и каждый воркер открывает свои.
+"""
+import itertools
+import os
+import time
+import weakref
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.metrics import Histogram
+from config import (POOL_SIZE, POOL_MAX_OVERFLOW, POOL_TIMEOUT, POOL_RECYCLE,
+                    POOL_PRE_PING, PREPARED_STATEMENT_CACHE_SIZE)
+
+
+class PoolMetrics:
+    """Метрики ожидания соединений пула."""
+
+    def __init__(self) -> None:
+        self.waiting = 0
+        self.timeouts = 0
+        self.wait_time = Histogram()
+        self.waiting_since: dict[int, float] = {}
+        self._wait_keys = itertools.count()
+
+    def longest_wait(self) -> float:
+        """Сколько секунд ждёт соединение самый давний из ожидающих."""
+        if not self.waiting_since:
+            return 0.0
+        return time.perf_counter() - min(self.waiting_since.values())
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, замеряющий ожидание соединения.
+
+    Каждая выдача соединения учитывается в metrics: количество
+    ожидающих в данный момент, время ожидания и таймауты.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        self.metrics.waiting += 1
+        start = time.perf_counter()
+        key = next(self.metrics._wait_keys)
+        self.metrics.waiting_since[key] = start
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.waiting -= 1
+            del self.metrics.waiting_since[key]
+            self.metrics.wait_time.observe(time.perf_counter() - start)
+
+
+_engines: "weakref.WeakSet[AsyncEngine]" = weakref.WeakSet()
+
+
+def _reset_pools_after_fork() -> None:
+    """Сброс пулов в дочернем процессе, соединения остаются у родителя."""
+    for engine in list(_engines):
+        engine.sync_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def build_engine(uri: str, **kwargs) -> AsyncEngine:
+    """
+    Создание асинхронного движка по настройкам из config.
+
+    Args:
+
+        uri: Адрес базы данных
+        kwargs: Параметры create_async_engine поверх настроек из config
+
+    Returns:
+
+        Движок с пулом InstrumentedPool.
+    """
+    connect_args = {}
+    if make_url(uri).get_driver_name() == "asyncpg":
+        connect_args["prepared_statement_cache_size"] = (
+            PREPARED_STATEMENT_CACHE_SIZE)
+    options = {"poolclass": InstrumentedPool,
+               "pool_size": POOL_SIZE,
+               "max_overflow": POOL_MAX_OVERFLOW,
+               "pool_timeout": POOL_TIMEOUT,
+               "pool_recycle": POOL_RECYCLE,
+               "pool_pre_ping": POOL_PRE_PING,
+               "connect_args": connect_args}
+    options.update(kwargs)
+    engine = create_async_engine(uri, **options)
+    _engines.add(engine)
+    return engine
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    """
+    Текущее состояние пула движка.
+
+    Returns:
+
+        Словарь с размером пула, количеством выданных соединений,
+        переполнением, ожидающими, таймаутами и гистограммой
+        времени ожидания соединения.
+    """
+    pool = engine.pool
+    stats = {"size": pool.size(),
+             "checked_out": pool.checkedout(),
+             "checked_in": pool.checkedin(),
+             "overflow": pool.overflow()}
+    if isinstance(pool, InstrumentedPool):
+        stats.update({"waiting": pool.metrics.waiting,
+                      "timeouts": pool.metrics.timeouts,
+                      "wait_time": pool.metrics.wait_time.snapshot()})
+    return stats
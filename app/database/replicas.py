@@ -0,0 +1,139 @@
+"""
+Реплики базы данных для чтения.
+
+Classes:
+
+    Replica: Реплика с собственным движком и фабрикой сессий
+    ReplicaSet: Выбор здоровой реплики и проверка их состояния
+
+Args:
+
+    replica_set: Реплики из DATABASE_REPLICA_URIS
+
+Notes:
+    Реплика, не ответившая на проверку, исключается из выбора до
+    следующей успешной проверки. Если здоровых реплик нет, чтение
+    идёт с основной базы.
+"""
+import asyncio
+import itertools
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database.pool import InstrumentedPool, build_engine
+from config import (DATABASE_REPLICA_URIS, REPLICA_SELECTION,
+                    REPLICA_HEALTH_INTERVAL, REPLICA_HEALTH_TIMEOUT)
+
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """
+    Реплика с собственным движком и фабрикой сессий.
+
+    Args:
+
+        uri: Адрес реплики
+    """
+
+    def __init__(self, uri: str) -> None:
+        self.name = make_url(uri).render_as_string(hide_password=True)
+        self.engine = build_engine(uri)
+        self.session_factory = sessionmaker(
+            bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.healthy = True
+
+    def load(self) -> int:
+        """Выданные соединения пула и ожидающие соединения запросы."""
+        pool = self.engine.pool
+        waiting = (pool.metrics.waiting
+                   if isinstance(pool, InstrumentedPool) else 0)
+        return pool.checkedout() + waiting
+
+
+class ReplicaSet:
+    """
+    Выбор здоровой реплики и проверка их состояния.
+
+    Args:
+
+        uris: Адреса реплик
+        selection: round_robin - по очереди, least_busy - реплика
+            с наименьшим числом занятых соединений
+    """
+
+    def __init__(self, uris: list[str],
+                 selection: str = "round_robin") -> None:
+        self.replicas = [Replica(uri) for uri in uris]
+        self.selection = selection
+        self._counter = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    def choose(self) -> Replica | None:
+        """Реплика для чтения или None, если здоровых реплик нет."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.selection == "least_busy":
+            return min(healthy, key=Replica.load)
+        return healthy[next(self._counter) % len(healthy)]
+
+    def is_replica(self, bind) -> bool:
+        """Относится ли движок bind к одной из реплик."""
+        return any(replica.engine is bind for replica in self.replicas)
+
+    async def _check(self, replica: Replica, timeout: float) -> None:
+        try:
+            async with asyncio.timeout(timeout):
+                async with replica.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as ex:
+            if replica.healthy:
+                logger.warning("Реплика %s недоступна: %s", replica.name, ex)
+            replica.healthy = False
+        else:
+            if not replica.healthy:
+                logger.info("Реплика %s снова доступна", replica.name)
+            replica.healthy = True
+
+    async def check(self, timeout: float = REPLICA_HEALTH_TIMEOUT) -> None:
+        """Проверка всех реплик запросом SELECT 1."""
+        await asyncio.gather(*(self._check(replica, timeout)
+                               for replica in self.replicas))
+
+    async def _run_checks(self, interval: float) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = REPLICA_HEALTH_INTERVAL) -> None:
+        """Запуск периодической проверки реплик (если они есть)."""
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run_checks(interval))
+
+    async def stop(self) -> None:
+        """Остановка проверки и закрытие соединений с репликами."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> list[dict]:
+        """Состояние реплик."""
+        return [{"name": replica.name,
+                 "healthy": replica.healthy,
+                 "load": replica.load()}
+                for replica in self.replicas]
+
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URIS, REPLICA_SELECTION)
@@ -0,0 +1,246 @@
+"""
+Нечёткий поиск пользователей по имени, фамилии и электронной почте.
+
+Classes:
+
+    TrigramIndex: Триграммный индекс в памяти процесса
+
+Func:
+
+    trigrams: Триграммы строки по правилам pg_trgm
+    search_users: Поиск пользователей с ранжированием
+
+Notes:
+    В PostgreSQL с расширением pg_trgm поиск идёт по GIN-индексам
+    ix_users_*_trgm: совпадение подстроки (ILIKE) или похожесть слова
+    (оператор <%), ранг - наибольшая word_similarity по трём полям.
+    В PostgreSQL без расширения остаётся только совпадение подстроки
+    (ILIKE без индекса, опечатки не находятся), об этом один раз
+    пишется предупреждение в лог. В SQLite (тесты, локальный запуск)
+    используется TrigramIndex в памяти процесса с тем же порогом и
+    приближённым рангом. Он перестраивается, когда меняется отпечаток
+    таблицы: количество строк, последний ID и сумма версий (version
+    растёт при каждом изменении пользователя).
+"""
+import asyncio
+import heapq
+import logging
+import re
+import weakref
+from array import array
+from collections import Counter
+
+from sqlalchemy import Select, func, literal, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.database.FDataBase import User, USER_COLUMNS, escape_like
+
+
+logger = logging.getLogger(__name__)
+
+WORD_SIMILARITY_THRESHOLD = 0.6  # pg_trgm.word_similarity_threshold
+SEARCH_COLUMNS = ("first_name", "last_name", "email")
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def trigrams(value: str) -> set[str]:
+    """
+    Триграммы строки по правилам pg_trgm.
+
+    Строка приводится к нижнему регистру и делится на слова из букв
+    и цифр, каждое слово дополняется двумя пробелами в начале и одним
+    в конце.
+    """
+    result = set()
+    for word in _WORD_RE.findall(value.lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def _word_similarity(query_trigrams: set[str], value: str | None) -> float:
+    """Доля триграмм запроса в значении (приближение word_similarity)."""
+    if not value:
+        return 0.0
+    return len(query_trigrams & trigrams(value)) / len(query_trigrams)
+
+
+class TrigramIndex:
+    """
+    Триграммный индекс в памяти процесса.
+
+    Args:
+
+        rows: Строки с id и полями SEARCH_COLUMNS
+    """
+
+    def __init__(self, rows) -> None:
+        self.users: dict[int, dict] = {}
+        postings: dict[str, list[int]] = {}
+        for row in rows:
+            user = dict(row)
+            self.users[user["id"]] = user
+            user_trigrams = set()
+            for column in SEARCH_COLUMNS:
+                user_trigrams |= trigrams(user[column] or "")
+            for trigram in user_trigrams:
+                postings.setdefault(trigram, []).append(user["id"])
+        self.postings = {trigram: array("l", ids)
+                         for trigram, ids in postings.items()}
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        """
+        Пользователи, похожие на запрос, по убыванию ранга.
+
+        Подходит пользователь, в поле которого есть запрос как
+        подстрока или доля триграмм запроса не меньше
+        WORD_SIMILARITY_THRESHOLD. Ранг - наибольшая по полям доля
+        триграмм запроса.
+        """
+        query = query.lower()
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+        # Триграммы без пробелов есть у любого значения, содержащего
+        # запрос как подстроку: по ним отсекаются остальные кандидаты.
+        inner = [trigram for trigram in query_trigrams if " " not in trigram]
+        hits, inner_hits = Counter(), Counter()
+        for trigram in query_trigrams:
+            ids = self.postings.get(trigram, ())
+            hits.update(ids)
+            if " " not in trigram:
+                inner_hits.update(ids)
+        enough = WORD_SIMILARITY_THRESHOLD * len(query_trigrams)
+        matches = []
+        for user_id, count in hits.items():
+            if count < enough and inner_hits[user_id] < len(inner):
+                continue
+            user = self.users[user_id]
+            values = [user[column] for column in SEARCH_COLUMNS]
+            score = max(_word_similarity(query_trigrams, value)
+                        for value in values)
+            if score >= WORD_SIMILARITY_THRESHOLD or any(
+                    query in value.lower() for value in values if value):
+                matches.append((score, user_id))
+        best = heapq.nsmallest(limit, matches,
+                               key=lambda match: (-match[0], match[1]))
+        return [{**self.users[user_id], "score": round(score, 4)}
+                for score, user_id in best]
+
+
+class _FallbackIndex:
+    """Индекс движка и отпечаток таблицы, по которому он построен."""
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.fingerprint = None
+        self.index: TrigramIndex | None = None
+
+
+_search_modes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_fallback: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+async def _search_mode(session: AsyncSession) -> str:
+    """
+    Способ поиска для базы сессии (проверяется один раз на движок).
+
+    Returns:
+
+        'trigram' - PostgreSQL с pg_trgm, 'ilike' - PostgreSQL без
+        pg_trgm, 'memory' - остальные базы (TrigramIndex).
+    """
+    key = session.bind.sync_engine
+    if key not in _search_modes:
+        mode = "memory"
+        if session.bind.dialect.name == "postgresql":
+            mode = "trigram" if await session.scalar(text(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )) is not None else "ilike"
+        if mode == "ilike":
+            logger.warning("Расширение pg_trgm не установлено: поиск "
+                           "пользователей только по подстроке без индекса")
+        _search_modes[key] = mode
+    return _search_modes[key]
+
+
+async def _fallback_index(session: AsyncSession,
+                          engine: AsyncEngine) -> TrigramIndex:
+    """Индекс в памяти, перестроенный при изменении таблицы."""
+    fallback = _fallback.setdefault(engine.sync_engine, _FallbackIndex())
+    async with fallback.lock:
+        fingerprint = tuple((await session.execute(
+            select(func.count(), func.max(User.id),
+                   func.sum(User.version)))).one())
+        if fallback.index is None or fingerprint != fallback.fingerprint:
+            result = await session.execute(select(*USER_COLUMNS))
+            fallback.index = await asyncio.to_thread(
+                TrigramIndex, result.mappings().all())
+            fallback.fingerprint = fingerprint
+        return fallback.index
+
+
+async def search_users(query: str, limit: int,
+                       session: AsyncSession) -> list[dict]:
+    """
+    Поиск пользователей по имени, фамилии и электронной почте.
+
+    Args:
+
+        query: Часть имени, фамилии или электронной почты
+        limit: Максимум пользователей в ответе
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Список пользователей с полем score (0..1) по убыванию
+        ранга, при равном ранге - по ID.
+    """
+    mode = await _search_mode(session)
+    if mode == "memory":
+        index = await _fallback_index(session, session.bind)
+        return index.search(query, limit)
+    if mode == "ilike":
+        return await _ilike_search(query, limit, session)
+    result = await session.execute(_trigram_query(query, limit))
+    return [{**row._asdict(), "score": round(row.score, 4)}
+            for row in result]
+
+
+def _trigram_query(query: str, limit: int) -> Select:
+    """Запрос поиска по индексам pg_trgm."""
+    columns = [User.__table__.c[column] for column in SEARCH_COLUMNS]
+    pattern = f"%{escape_like(query)}%"
+    score = func.greatest(*(func.word_similarity(query, column)
+                            for column in columns)).label("score")
+    return (select(*USER_COLUMNS, score)
+            .where(or_(*(condition for column in columns
+                         for condition in (
+                             column.ilike(pattern, escape="\\"),
+                             literal(query).op("<%")(column)))))
+            .order_by(score.desc(), User.__table__.c.id)
+            .limit(limit))
+
+
+async def _ilike_search(query: str, limit: int,
+                        session: AsyncSession) -> list[dict]:
+    """
+    Поиск по подстроке в PostgreSQL без pg_trgm.
+
+    Берутся первые по ID limit совпадений, ранг считается в процессе
+    как в TrigramIndex.
+    """
+    pattern = f"%{escape_like(query)}%"
+    result = await session.execute(
+        select(*USER_COLUMNS)
+        .where(or_(*(User.__table__.c[column].ilike(pattern, escape="\\")
+                     for column in SEARCH_COLUMNS)))
+        .order_by(User.__table__.c.id)
+        .limit(limit))
+    query_trigrams = trigrams(query)
+    found = [{**row._asdict(), "score": round(max(
+        _word_similarity(query_trigrams, getattr(row, column))
+        for column in SEARCH_COLUMNS), 4) if query_trigrams else 0.0}
+        for row in result]
+    return sorted(found, key=lambda user: (-user["score"], user["id"]))
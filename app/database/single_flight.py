@@ -0,0 +1,87 @@
+"""
+Объединение одновременных одинаковых чтений (single flight).
+
+Одновременные чтения по одному ключу ждут один запрос к базе и
+получают один результат или одно исключение.
+
+Classes:
+
+    SingleFlight: Один запрос в полёте на ключ
+
+Args:
+
+    user_reads: Чтения пользователей по ID (get_one_user)
+
+Notes:
+    Запрос выполняется отдельной задачей: отмена запроса клиента,
+    начавшего чтение, не прерывает его для остальных. После записи
+    ключ забывается (forget): чтения, начатые после записи, не
+    присоединяются к запросу, начатому до неё, а сам этот запрос
+    узнаёт об этом через is_current и не сохраняет результат в кэш.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Один запрос в полёте на ключ."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, tuple[asyncio.Task, Hashable]] = {}
+        self.calls = self.shared = self.bypassed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 group: Hashable = None) -> Any:
+        """
+        Результат fn(), общий для одновременных вызовов с ключом key.
+
+        Args:
+
+            key: Ключ чтения
+            fn: Функция без аргументов, выполняющая чтение
+            group: Вызовы присоединяются к запросу в полёте, только
+                если group совпадает (например, база или реплика)
+
+        Returns:
+
+            Результат fn() запроса в полёте или нового запроса.
+        """
+        call = self._calls.get(key)
+        if call is not None and call[1] == group:
+            self.shared += 1
+            return await asyncio.shield(call[0])
+        if call is not None:
+            # Ключ занят чтением из другой базы: читаем отдельно.
+            self.bypassed += 1
+            return await fn()
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task, group
+        task.add_done_callback(lambda done: self._done(key, done))
+        self.calls += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # все ожидавшие могли уже быть отменены
+
+    def is_current(self, key: Hashable) -> bool:
+        """Выполняется ли вызывающая задача как запрос ключа key."""
+        call = self._calls.get(key)
+        return call is not None and call[0] is asyncio.current_task()
+
+    def forget(self, key: Hashable) -> None:
+        """Забыть запрос в полёте после записи по ключу."""
+        self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        """Счётчики: запросы к базе, объединённые и отдельные чтения."""
+        return {"calls": self.calls,
+                "shared": self.shared,
+                "bypassed": self.bypassed,
+                "in_flight": len(self._calls)}
+
+
+user_reads = SingleFlight()
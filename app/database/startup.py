@@ -0,0 +1,132 @@
+"""
+Подготовка базы данных при запуске приложения.
+
+Func:
+
+    alembic_heads: Последние ревизии миграций из alembic/versions
+    verify_schema: Проверка ревизии схемы базы одним запросом
+    prepare_schema: Подготовка схемы по STARTUP_SCHEMA_MODE
+    warm_up: Прогрев пула соединений и подготовленных запросов
+    ping: Проверка доступности базы
+
+Notes:
+    STARTUP_SCHEMA_MODE=create (по умолчанию) создаёт недостающие
+    таблицы через create_all, как раньше. Режим verify только
+    сверяет alembic_version с последней миграцией, а схему меняет
+    alembic upgrade head до запуска приложения. Режим skip ничего
+    не проверяет.
+"""
+import asyncio
+import contextlib
+import functools
+import logging
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.FDataBase import (engine, create_tables, User,
+                                    USER_COLUMNS, VERSION_COLUMNS)
+from config import (STARTUP_SCHEMA_MODE, STARTUP_WARMUP_CONNECTIONS,
+                    READY_CHECK_TIMEOUT)
+
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+# Запросы горячих путей чтения (get_one_user, get_user_version): тот же
+# вид запроса попадает в кэш компиляции SQLAlchemy и в кэш
+# подготовленных запросов asyncpg каждого соединения.
+WARMUP_STATEMENTS = (
+    select(*USER_COLUMNS, *VERSION_COLUMNS)
+    .where(User.__table__.c.id == 0),
+    select(*VERSION_COLUMNS).where(User.__table__.c.id == 0),
+)
+
+
+@functools.cache
+def alembic_heads() -> frozenset[str]:
+    """Последние ревизии миграций из alembic/versions."""
+    alembic_config = Config()
+    alembic_config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return frozenset(ScriptDirectory.from_config(alembic_config).get_heads())
+
+
+async def verify_schema(db_engine: AsyncEngine = engine) -> None:
+    """
+    Проверка ревизии схемы базы одним запросом.
+
+    Raises:
+
+        RuntimeError: Ревизия базы не совпадает с последней миграцией
+            или миграции к базе не применялись.
+    """
+    heads = alembic_heads()
+    try:
+        async with db_engine.connect() as conn:
+            result = await conn.execute(
+                text("SELECT version_num FROM alembic_version"))
+            revisions = frozenset(result.scalars())
+    except Exception as ex:
+        raise RuntimeError(
+            f"Не удалось прочитать ревизию схемы базы: {ex}") from ex
+    if revisions != heads:
+        raise RuntimeError(
+            f"Ревизия схемы базы {sorted(revisions)} не совпадает с "
+            f"последней миграцией {sorted(heads)}, "
+            f"выполните alembic upgrade head")
+
+
+async def prepare_schema(mode: str = STARTUP_SCHEMA_MODE) -> None:
+    """Подготовка схемы: create, verify или skip."""
+    if mode == "create":
+        await create_tables()
+    elif mode == "verify":
+        await verify_schema()
+    elif mode != "skip":
+        raise ValueError(f"Неизвестный STARTUP_SCHEMA_MODE: {mode}")
+
+
+async def warm_up(db_engine: AsyncEngine = engine,
+                  connections: int = STARTUP_WARMUP_CONNECTIONS) -> None:
+    """
+    Прогрев пула соединений и подготовленных запросов.
+
+    Args:
+
+        db_engine: Движок, пул которого прогревается
+        connections: Количество одновременно открываемых соединений
+
+    Notes:
+        gather ждёт все соединения (return_exceptions): иначе
+        открывшиеся после ошибки соседнего попали бы в уже закрытый
+        стек и не вернулись в пул.
+    """
+    if connections <= 0:
+        return
+    async with contextlib.AsyncExitStack() as stack:
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(db_engine.connect())
+              for _ in range(connections)), return_exceptions=True)
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                raise conn
+        for conn in opened:
+            for statement in WARMUP_STATEMENTS:
+                await conn.execute(statement)
+
+
+async def ping(db_engine: AsyncEngine = engine,
+               timeout: float = READY_CHECK_TIMEOUT) -> bool:
+    """Проверка доступности базы запросом SELECT 1."""
+    try:
+        async with asyncio.timeout(timeout):
+            async with db_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except Exception as ex:
+        logger.warning("База данных недоступна: %s", ex)
+        return False
+    return True
@@ -0,0 +1,323 @@
+"""
+Сводка пользователей по возрасту и зарплате.
+
+Сводка user_stats хранит по каждой паре корзин (возраст, зарплата)
+количество пользователей, сумму, минимум и максимум зарплаты.
+Запись пользователей меняет её в своей транзакции на разницу; только
+upsert, у которого гонка отняла прежние значения строки, отмечает
+сводку устаревшей, и она перестраивается не позже чем через
+USER_STATS_MAX_STALENESS секунд.
+
+Classes:
+
+    StatsRefresher: Фоновая перестройка устаревшей сводки
+
+Func:
+
+    get_salary_stats: Статистика зарплат по корзинам возраста
+    stats_state: Состояние сводки
+    rebuild_stats: Полная перестройка сводки
+
+Args:
+
+    stats_refresher: Перестройка сводки приложения
+
+Запуск полной перестройки:
+
+    python -m app.database.stats rebuild
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from sqlalchemy import delete, insert, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database.FDataBase import (User, UserStats, UserStatsState,
+                                    AsyncSessionLocal, engine,
+                                    STATS_STATE_ID, NO_SALARY_BUCKET,
+                                    age_bucket, salary_bucket,
+                                    dialect_insert, _add_stats_deltas,
+                                    _recompute_extremes, _timestamp)
+from config import USER_STATS_AGE_BUCKET, USER_STATS_MAX_STALENESS
+
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = {"salary_p50": 0.5, "salary_p90": 0.9, "salary_p99": 0.99}
+REBUILD_CHUNK_ROWS = 10000
+
+
+def _percentile(cells: list, rank: float) -> float:
+    """
+    Процентиль по гистограмме корзин зарплаты.
+
+    Внутри корзины значение берётся линейно между её минимумом
+    и максимумом, поэтому 0-й и 100-й процентили точные.
+    """
+    position = rank * (sum(cell.salary_count for cell in cells) - 1)
+    seen = 0
+    for cell in cells:
+        if position < seen + cell.salary_count:
+            share = (position - seen) / max(cell.salary_count - 1, 1)
+            return cell.salary_min + (
+                cell.salary_max - cell.salary_min) * share
+        seen += cell.salary_count
+    return cells[-1].salary_max
+
+
+def _age_bucket_stats(bucket: int, cells: list) -> dict:
+    """Статистика одной корзины возраста."""
+    stats = {"age_from": bucket * USER_STATS_AGE_BUCKET,
+             "age_to": (bucket + 1) * USER_STATS_AGE_BUCKET - 1,
+             "users": sum(cell.users for cell in cells),
+             "salary_avg": None, "salary_min": None, "salary_max": None,
+             **dict.fromkeys(PERCENTILES)}
+    cells = sorted((cell for cell in cells
+                    if cell.salary_bucket != NO_SALARY_BUCKET
+                    and cell.salary_count > 0),
+                   key=lambda cell: cell.salary_bucket)
+    if cells:
+        count = sum(cell.salary_count for cell in cells)
+        stats.update(
+            salary_avg=sum(cell.salary_sum for cell in cells) / count,
+            salary_min=cells[0].salary_min,
+            salary_max=cells[-1].salary_max,
+            **{name: _percentile(cells, rank)
+               for name, rank in PERCENTILES.items()})
+    return {key: round(value, 2) if isinstance(value, float) else value
+            for key, value in stats.items()}
+
+
+async def stats_state(session: AsyncSession) -> dict:
+    """
+    Состояние сводки.
+
+    Returns:
+
+        Словарь с 'stale_since' - с какого времени (секунды UTC)
+        сводка не учитывает часть изменений (None - актуальна)
+        и 'rebuilt_at' - время последней полной перестройки
+        (None - сводка ещё не строилась).
+    """
+    state = (await session.execute(
+        select(UserStatsState.dirty_since, UserStatsState.rebuilt_at)
+        .where(UserStatsState.id == STATS_STATE_ID))).one_or_none()
+    if state is None:
+        return {"stale_since": None, "rebuilt_at": None}
+    return {"stale_since": (_timestamp(state.dirty_since)
+                            if state.dirty_since else None),
+            "rebuilt_at": (_timestamp(state.rebuilt_at)
+                           if state.rebuilt_at else None)}
+
+
+async def get_salary_stats(session: AsyncSession) -> dict:
+    """
+    Статистика зарплат по корзинам возраста.
+
+    Читается только сводка user_stats, поэтому время ответа зависит
+    от количества корзин, а не от количества пользователей.
+
+    Args:
+
+        session: Асинхронная сессия для базы данных.
+
+    Returns:
+
+        Словарь с 'buckets' - список корзин возраста (age_from, age_to,
+        users, salary_avg, salary_min, salary_max, salary_p50,
+        salary_p90, salary_p99), 'stale_since' и 'rebuilt_at'.
+    """
+    result = await session.execute(
+        select(UserStats.__table__).where(UserStats.users > 0))
+    by_age = defaultdict(list)
+    for cell in result:
+        by_age[cell.age_bucket].append(cell)
+    return {"buckets": [_age_bucket_stats(bucket, by_age[bucket])
+                        for bucket in sorted(by_age)],
+            **await stats_state(session)}
+
+
+async def _scan_cells(connection) -> dict:
+    """Корзины сводки по всем пользователям (чтение частями)."""
+    cells = defaultdict(lambda: {"users": 0, "salary_count": 0,
+                                 "salary_sum": 0.0, "salary_min": None,
+                                 "salary_max": None})
+    result = await connection.stream(
+        select(User.age, User.salary)
+        .execution_options(yield_per=REBUILD_CHUNK_ROWS))
+    async for partition in result.partitions():
+        for age, salary in partition:
+            cell = cells[age_bucket(age), salary_bucket(salary)]
+            cell["users"] += 1
+            if salary is None:
+                continue
+            cell["salary_count"] += 1
+            cell["salary_sum"] += salary
+            if cell["salary_min"] is None or salary < cell["salary_min"]:
+                cell["salary_min"] = salary
+            if cell["salary_max"] is None or salary > cell["salary_max"]:
+                cell["salary_max"] = salary
+    return cells
+
+
+async def _correct_stats(session: AsyncSession) -> None:
+    """
+    Исправление сводки по снимку без блокировки таблиц (PostgreSQL).
+
+    Сводка и пользователи читаются в одном снимке REPEATABLE READ
+    отдельного соединения, а в сводку прибавляется разница между ними:
+    изменения, записанные после снимка, уже есть в сводке и
+    сохраняются. Минимум и максимум корзин, разошедшихся со снимком,
+    пересчитываются по таблице users.
+    """
+    async with session.bind.connect() as connection:
+        connection = await connection.execution_options(
+            isolation_level="REPEATABLE READ")
+        async with connection.begin():
+            stored = {(cell.age_bucket, cell.salary_bucket): cell
+                      for cell in await connection.execute(
+                          select(UserStats.__table__))}
+            cells = await _scan_cells(connection)
+    corrections, extremes = {}, []
+    for key in set(cells) | set(stored):
+        cell, old = cells[key], stored.get(key)
+        delta = {field: cell[field] - (getattr(old, field) if old else 0)
+                 for field in ("users", "salary_count", "salary_sum")}
+        if any(delta.values()):
+            corrections[key] = {**delta, "salary_min": None,
+                                "salary_max": None}
+        if old is None or (cell["salary_min"], cell["salary_max"]) != (
+                old.salary_min, old.salary_max):
+            corrections.setdefault(key, {
+                "users": 0, "salary_count": 0, "salary_sum": 0.0,
+                "salary_min": None, "salary_max": None})
+            extremes.append(key)
+    await _add_stats_deltas(session, corrections)
+    for age_key, salary_key in sorted(extremes):
+        await _recompute_extremes(session, age_key, salary_key)
+
+
+async def rebuild_stats(session: AsyncSession,
+                        only_if_dirty: bool = False) -> bool:
+    """
+    Полная перестройка сводки по таблице users.
+
+    Строка состояния блокируется на время перестройки: запись,
+    отметившая сводку устаревшей в это время, дождётся конца
+    перестройки и отметит её снова. Таблицы не блокируются: в
+    PostgreSQL сводка исправляется по снимку (_correct_stats), и
+    одиночные изменения ждут только исправляемые корзины.
+
+    Args:
+
+        session: Асинхронная сессия для базы данных.
+        only_if_dirty: Перестраивать, только если сводка устарела
+            или ещё не строилась
+
+    Returns:
+
+        True, если сводка перестроена.
+    """
+    state_table = UserStatsState.__table__
+    await session.execute(
+        dialect_insert(session)(state_table)
+        .values(id=STATS_STATE_ID, dirty_since=func.now())
+        .on_conflict_do_nothing(index_elements=[state_table.c.id]))
+    state = (await session.execute(
+        select(state_table).where(state_table.c.id == STATS_STATE_ID)
+        .with_for_update())).one()
+    if only_if_dirty and state.dirty_since is None and state.rebuilt_at:
+        await session.rollback()
+        return False
+
+    if session.bind.dialect.name == "postgresql":
+        await _correct_stats(session)
+    else:
+        cells = await _scan_cells(session)
+        await session.execute(delete(UserStats))
+        if cells:
+            await session.execute(insert(UserStats), [
+                {"age_bucket": age_key, "salary_bucket": salary_key,
+                 **cell}
+                for (age_key, salary_key), cell in cells.items()])
+    await session.execute(
+        update(state_table).where(state_table.c.id == STATS_STATE_ID)
+        .values(dirty_since=None, rebuilt_at=func.now()))
+    await session.commit()
+    return True
+
+
+class StatsRefresher:
+    """
+    Фоновая перестройка устаревшей сводки.
+
+    Args:
+
+        max_staleness: Сводка перестраивается, когда устарела больше
+            чем на половину max_staleness; проверка - каждую четверть
+    """
+
+    def __init__(self, max_staleness: float = USER_STATS_MAX_STALENESS
+                 ) -> None:
+        self.max_staleness = max_staleness
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self, session_factory: sessionmaker) -> bool:
+        """Перестройка сводки, если она устарела; True - перестроена."""
+        async with session_factory() as session:
+            state = await stats_state(session)
+            stale_since = state["stale_since"]
+            if state["rebuilt_at"] is not None and (
+                    stale_since is None
+                    or time.time() - stale_since < self.max_staleness / 2):
+                return False
+            return await rebuild_stats(session, only_if_dirty=True)
+
+    async def _run(self, session_factory: sessionmaker) -> None:
+        while True:
+            try:
+                if await self.refresh(session_factory):
+                    logger.info("Сводка user_stats перестроена")
+            except Exception as ex:
+                logger.error("Сводка user_stats не перестроена: %s", ex)
+            await asyncio.sleep(self.max_staleness / 4)
+
+    def start(self, session_factory: sessionmaker) -> None:
+        """Запуск периодической проверки сводки."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self) -> None:
+        """Остановка периодической проверки."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+stats_refresher = StatsRefresher()
+
+
+async def _rebuild_command() -> None:
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        await rebuild_stats(session)
+        cells = await session.scalar(
+            select(func.count()).select_from(UserStats))
+    await engine.dispose()
+    print(f"Сводка user_stats перестроена за "
+          f"{time.perf_counter() - start:.1f} с, корзин: {cells}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    asyncio.run(_rebuild_command())
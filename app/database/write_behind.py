@@ -0,0 +1,196 @@
+"""
+Отложенная пакетная запись пользователей.
+
+Запрос на добавление пользователя только ставится в очередь и сразу
+получает номер заявки, а фоновая задача собирает заявки в пачки
+(по размеру или по времени) и записывает их одной вставкой.
+
+Classes:
+
+    WriteBehindQueue: Очередь отложенной записи пользователей
+
+Args:
+
+    write_behind: Очередь приложения с настройками из config
+
+Notes:
+    Очередь живёт в памяти процесса: заявки, не записанные до
+    аварийного завершения процесса, теряются. При штатной
+    остановке (stop) очередь дописывается в базу.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database.FDataBase import add_many_users
+from config import (WRITE_BEHIND_QUEUE_SIZE, WRITE_BEHIND_BATCH_SIZE,
+                    WRITE_BEHIND_FLUSH_INTERVAL, WRITE_BEHIND_TICKET_TTL,
+                    WRITE_BEHIND_DRAIN_TIMEOUT)
+
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Очередь отложенной записи пользователей.
+
+    Args:
+
+        max_size: Максимум заявок в очереди, сверх него submit
+            отказывает (HTTP 429)
+        batch_size: Максимум пользователей в одной вставке
+        flush_interval: Сколько секунд ждать наполнения пачки
+        ticket_ttl: Сколько секунд хранить статус заявки
+    """
+
+    def __init__(self, max_size: int = WRITE_BEHIND_QUEUE_SIZE,
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+                 ticket_ttl: float = WRITE_BEHIND_TICKET_TTL) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ticket_ttl = ticket_ttl
+        self.tickets: OrderedDict[str, dict] = OrderedDict()
+        self.batches = self.inserted = self.rejected = self.failed = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Принимает ли очередь заявки."""
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory: sessionmaker) -> None:
+        """Запуск фоновой записи пачек через сессии session_factory."""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_size)
+            self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self, timeout: float = WRITE_BEHIND_DRAIN_TIMEOUT
+                   ) -> None:
+        """Остановка приёма заявок и запись оставшихся в очереди."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout)
+            await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            logger.error("Очередь записи не дописана за %s с, "
+                         "потеряно заявок: %s", timeout, self._queue.qsize())
+            task.cancel()
+
+    def submit(self, user: dict) -> str | None:
+        """
+        Постановка пользователя в очередь.
+
+        Args:
+
+            user: Проверенные данные пользователя
+
+        Returns:
+
+            Номер заявки или None, если очередь заполнена.
+        """
+        self._expire_tickets()
+        ticket = uuid.uuid4().hex
+        try:
+            self._queue.put_nowait((ticket, user))
+        except asyncio.QueueFull:
+            return None
+        self.tickets[ticket] = {"status": "pending",
+                                "created": time.monotonic()}
+        return ticket
+
+    def status(self, ticket: str) -> dict | None:
+        """Статус заявки: pending, inserted, rejected или failed."""
+        info = self.tickets.get(ticket)
+        if info is None:
+            return None
+        return {key: value for key, value in info.items()
+                if key != "created"}
+
+    def stats(self) -> dict:
+        """Счётчики очереди."""
+        return {"running": self.running,
+                "queued": self._queue.qsize() if self._queue else 0,
+                "max_size": self.max_size,
+                "batches": self.batches,
+                "inserted": self.inserted,
+                "rejected": self.rejected,
+                "failed": self.failed}
+
+    def _expire_tickets(self) -> None:
+        deadline = time.monotonic() - self.ticket_ttl
+        while self.tickets:
+            ticket, info = next(iter(self.tickets.items()))
+            if info["created"] > deadline or info["status"] == "pending":
+                break
+            self.tickets.popitem(last=False)
+
+    async def _next_batch(self) -> tuple[list, bool]:
+        """Пачка заявок и признак остановки."""
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(),
+                                                  remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, session_factory: sessionmaker,
+                     batch: list) -> None:
+        rows = [(number, user) for number, (_, user) in enumerate(batch)]
+        try:
+            async with session_factory() as session:
+                result = await add_many_users(rows, session=session)
+        except Exception as ex:
+            logger.error("Пачка из %s пользователей не записана: %s",
+                         len(batch), ex)
+            for ticket, _ in batch:
+                self.tickets[ticket].update(status="failed",
+                                            errors=[str(ex)])
+            self.failed += len(batch)
+            return
+        errors = {item["row"]: item["errors"] for item in result["rejected"]}
+        for number, (ticket, _) in enumerate(batch):
+            if number in errors:
+                self.tickets[ticket].update(status="rejected",
+                                            errors=errors[number])
+            else:
+                self.tickets[ticket]["status"] = "inserted"
+        self.batches += 1
+        self.inserted += result["inserted"]
+        self.rejected += len(errors)
+
+    async def _run(self, session_factory: sessionmaker) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(session_factory, batch)
+
+
+write_behind = WriteBehindQueue()
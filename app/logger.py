@@ -0,0 +1,208 @@
+"""
+Асинхронное журналирование приложения.
+
+Записи из кода попадают в ограниченную очередь (QueueHandler), а в
+файл их пишет отдельный поток QueueListener, поэтому обработка
+запросов не ждёт диска. Если очередь переполнена, запись
+отбрасывается и учитывается в счётчике, а не блокирует цикл событий.
+
+Classes:
+
+    JsonFormatter: Форматирование записи в одну строку JSON
+    SamplingFilter: Прореживание частых сообщений
+    NonBlockingQueueHandler: QueueHandler, не блокирующийся на полной очереди
+
+Func:
+
+    log_handler: Обработчик записи журнала в stderr или файл
+    setup_logging: Настройка журналирования по переменным из config
+    stop_logging: Остановка потока записи с выгрузкой очереди
+
+Notes:
+    Ротацию файла RotatingFileHandler делает без учёта других
+    процессов, поэтому воркеры python -m app.serve пишут каждый в свой
+    файл (LOG_PER_PROCESS), а LOG_FILE="-" направляет журнал в stderr.
+
+    Частые сообщения помечаются при вызове
+    logger.info(..., extra={"sample": True}) и проходят в журнал
+    через одно из LOG_SAMPLE_RATE, с полем sampled - сколько
+    записей было пропущено с прошлой.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+from config import (LOG_LEVEL, LOG_FILE, LOG_PER_PROCESS, LOG_FORMAT,
+                    LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_QUEUE_SIZE,
+                    LOG_SAMPLE_RATE)
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {
+    "message", "asctime", "sample"}
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: "NonBlockingQueueHandler | None" = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирование записи в одну строку JSON.
+
+    Кроме времени, уровня, логгера и сообщения в запись попадают
+    поля, переданные через extra.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Прореживание частых сообщений.
+
+    Args:
+
+        rate: В журнал попадает одна запись из rate (1 - все)
+
+    Notes:
+        Учитываются только записи с extra={"sample": True},
+        счётчик ведётся по шаблону сообщения.
+    """
+
+    def __init__(self, rate: int) -> None:
+        super().__init__()
+        self.rate = max(rate, 1)
+        self.counters: dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sample", False) or self.rate == 1:
+            return True
+        key = str(record.msg)
+        seen = self.counters.get(key, 0)
+        self.counters[key] = seen + 1
+        if seen % self.rate:
+            return False
+        if seen:
+            record.sampled = self.rate - 1
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, не блокирующийся на полной очереди.
+
+    Args:
+
+        queue: Ограниченная очередь записей
+
+    Notes:
+        Сообщение собирается из шаблона и аргументов до постановки
+        в очередь, чтобы поток записи не трогал изменяемые объекты
+        из запроса. Отброшенные записи считаются в dropped.
+    """
+
+    def __init__(self, queue: queue.Queue) -> None:
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def log_handler(path: str = LOG_FILE,
+                per_process: bool = LOG_PER_PROCESS) -> logging.Handler:
+    """
+    Обработчик записи журнала в stderr или файл.
+
+    Args:
+
+        path: Файл журнала, "-" - stderr
+        per_process: Добавить к имени файла PID процесса
+            (project.log -> project.1234.log)
+
+    Returns:
+
+        StreamHandler или RotatingFileHandler с ротацией по размеру.
+    """
+    if path == "-":
+        return logging.StreamHandler(sys.stderr)
+    if per_process:
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{os.getpid()}{ext}"
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8")
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Настройка журналирования по переменным из config.
+
+    Корневому логгеру назначается NonBlockingQueueHandler, поток
+    QueueListener пишет записи через log_handler. Повторный вызов
+    возвращает уже запущенный поток.
+
+    Returns:
+
+        Запущенный QueueListener.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+    handler = log_handler()
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json"
+                         else logging.Formatter(TEXT_FORMAT))
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """Остановка потока записи с выгрузкой очереди."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _queue_handler = None
@@ -3,29 +3,66 @@ import uvicorn
 import logging
 from fastapi import FastAPI
 
+from app.admission import AdmissionMiddleware
+from app.logger import setup_logging
+from app.metrics import MetricsMiddleware, instrument_engine
+from app.profiling import install_slow_query_log
 from app.routers.router import router_user
-from app.database.FDataBase import create_tables
+from app.routers.service import router_service, router_metrics
+from app.database.FDataBase import engine, AsyncSessionLocal
+from app.database.startup import prepare_schema, warm_up
+from app.database.write_behind import write_behind
+from app.database.stats import stats_refresher
+from app.database.replicas import replica_set
+from config import (METRICS_ENABLED, SLOW_QUERY_MS, WRITE_BEHIND_ENABLED,
+                    USER_STATS_ENABLED, ADMISSION_ENABLED)
 
 
-logging.basicConfig(
-    filename="project.log",
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
 async def lifespan(app: FastAPI):
+    app.state.ready = False
     try:
         # Здесь выполняем асинхронную инициализацию
-        await create_tables()
-        yield
+        await prepare_schema()
+        await warm_up()
     except Exception as ex:
-        logger.error(f"Error during table creation: {ex}")
+        logger.error("Error during database startup: %s", ex)
         raise
+    for replica in replica_set.replicas:
+        try:
+            await warm_up(replica.engine)
+        except Exception as ex:
+            logger.warning("Реплика %s не прогрета: %s", replica.name, ex)
+    replica_set.start()
+    if WRITE_BEHIND_ENABLED:
+        write_behind.start(AsyncSessionLocal)
+    if USER_STATS_ENABLED:
+        stats_refresher.start(AsyncSessionLocal)
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await write_behind.stop()
+    await stats_refresher.stop()
+    await replica_set.stop()
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(router=router_user)
+app.include_router(router=router_service)
+app.include_router(router=router_metrics)
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, routes=app.routes,
+                       prefix=router_user.prefix)
+engines = [engine, *(replica.engine for replica in replica_set.replicas)]
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    for instrumented in engines:
+        instrument_engine(instrumented)
+if SLOW_QUERY_MS > 0:
+    for instrumented in engines:
+        install_slow_query_log(instrumented)
 
 
 if __name__ == "__main__":
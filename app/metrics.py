@@ -0,0 +1,272 @@
+"""
+Метрики приложения в формате Prometheus.
+
+Classes:
+
+    Histogram: Гистограмма с фиксированными границами корзин
+    Counter: Счётчик с метками
+    Gauge: Текущее значение с метками
+    HistogramMetric: Гистограммы с метками
+    MetricsMiddleware: ASGI middleware замера запросов
+
+Func:
+
+    register_collector: Регистрация функции, отдающей метрики при выгрузке
+    instrument_engine: Замер времени выполнения SQL-запросов движка
+    render: Выгрузка всех метрик в текстовом формате Prometheus
+
+Notes:
+    Метрики хранятся в памяти процесса, обновление - несколько
+    операций со словарём, без блокировок (всё работает в одном
+    цикле событий), поэтому их можно держать включёнными всегда.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics: list["Metric"] = []
+_collectors: list[Callable[[], Iterable["Metric"]]] = []
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин.
+
+    Args:
+
+        buckets: Верхние границы корзин по возрастанию
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Учёт одного значения."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        """Накопленные счётчики по корзинам (как в Prometheus)."""
+        cumulative, buckets = 0, {}
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+
+class Metric:
+    """
+    Семейство метрик с одним именем и набором меток.
+
+    Args:
+
+        name: Имя метрики
+        documentation: Описание для # HELP
+        labelnames: Имена меток
+        register: Добавить ли метрику в общую выгрузку
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple[str, ...] = (),
+                 register: bool = True) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, object] = {}
+        if register:
+            _metrics.append(self)
+
+    def _labels(self, labels: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"'
+                 for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{self._labels(labels)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    """Счётчик с метками."""
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Текущее значение с метками."""
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class HistogramMetric(Metric):
+    """
+    Гистограммы с метками.
+
+    Args:
+
+        buckets: Верхние границы корзин по возрастанию
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                 register: bool = True) -> None:
+        super().__init__(name, documentation, labelnames, register)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str) -> None:
+        histogram = self.values.get(labels)
+        if histogram is None:
+            histogram = self.values[labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for labels, histogram in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, "+Inf"),
+                                    histogram.counts):
+                cumulative += count
+                le = self._labels(labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(
+                f"{self.name}_sum{self._labels(labels)} {histogram.sum}")
+            lines.append(
+                f"{self.name}_count{self._labels(labels)} {histogram.count}")
+        return lines
+
+
+def _escape(value: object) -> str:
+    return (str(value).replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n"))
+
+
+def register_collector(collector: Callable[[], Iterable[Metric]]) -> None:
+    """
+    Регистрация функции, отдающей метрики при выгрузке.
+
+    Нужна для значений, которые дешевле прочитать в момент выгрузки
+    (состояние пула, счётчики кэша), чем обновлять на каждом запросе.
+    """
+    _collectors.append(collector)
+
+
+def render() -> str:
+    """Выгрузка всех метрик в текстовом формате Prometheus."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for metric in collector():
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests = Counter(
+    "http_requests_total", "Количество HTTP-запросов",
+    ("method", "route", "status"))
+http_request_duration = HistogramMetric(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса",
+    ("method", "route"))
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Количество запросов в обработке")
+db_statement_duration = HistogramMetric(
+    "db_statement_duration_seconds", "Время выполнения SQL-запроса",
+    ("operation",))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware замера запросов.
+
+    Учитывает количество запросов в обработке, а после ответа -
+    время обработки и статус по шаблону пути (/user/get_user/{user_id}),
+    чтобы число рядов метрик не зависело от ID в пути.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(elapsed, scope["method"], path)
+            http_requests.inc(scope["method"], path, str(status))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters,
+                           context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters,
+                          context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    operation = (statement.split(None, 1) or ["?"])[0].upper()
+    db_statement_duration.observe(elapsed, operation)
+
+
+def _handle_error(context) -> None:
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Замер времени выполнения SQL-запросов движка по типу запроса."""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute",
+                          _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute",
+                     _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute",
+                     _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
@@ -3,14 +3,50 @@
 
 Classes:
 
+    UserFields: Поля пользователя с проверками pydantic-core
     UserInfo: Пользователь
+    UserIds: Список ID пользователей
+    UserPatch: Частичное изменение пользователя по ID
+    UsersDelete: ID или фильтры пакетного удаления пользователей
+    UserOut: Пользователь в ответе API
+    UserResponse: Ответ с одним пользователем
+    UsersFound: Найденные и отсутствующие пользователи
+    UsersResponse: Ответ с несколькими пользователями
+    UsersPage: Страница списка пользователей
+    UsersPageResponse: Ответ со страницей списка пользователей
+    UserMatch: Найденный пользователь с рангом совпадения
+    UsersSearchResponse: Ответ со списком найденных пользователей
+    AgeBucketStats: Статистика зарплат одной корзины возраста
+    SalaryStats: Статистика зарплат по корзинам возраста
+    SalaryStatsResponse: Ответ со статистикой зарплат
+    UpsertResult: Итог добавления или изменения пользователя по email
+    UpsertResponse: Ответ с итогом добавления или изменения
+    MessageResponse: Ответ с сообщением об операции
+    TicketResponse: Ответ с сообщением и номером заявки
+
+Func:
+
+    validate_users: Пакетная проверка пользователей
 """
 import re
-from typing import Union
-from pydantic import BaseModel, field_validator, ConfigDict
+from typing import Annotated, Any, Optional, Union
+from pydantic import (BaseModel, field_validator, model_validator,
+                      ConfigDict, Field, TypeAdapter, ValidationError)
+
+
+EMAIL_RE = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+# То же, что EMAIL_RE, но только для ASCII: \w в regex pydantic-core
+# шире, чем в re (включает, например, диакритические знаки).
+ASCII_EMAIL_PATTERN = r'^[A-Za-z0-9_.-]+@[A-Za-z0-9_.-]+\.[A-Za-z0-9_]+$'
+
 
+class _UserInfoChecks(BaseModel):
+    """
+    Проверки пользователя на Python.
 
-class UserInfo(BaseModel):
+    Задают допустимые значения и тексты ошибок UserInfo,
+    используются только для данных, не прошедших UserFields.
+    """
     model_config = ConfigDict(from_orm=True)
     first_name: str
     last_name: str
@@ -58,6 +94,231 @@ class UserInfo(BaseModel):
 
     @field_validator('email')
     def validate_email(cls, value: str) -> str:
-        if not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', value):
+        if not EMAIL_RE.match(value):
             raise ValueError('Неверный формат почты')
         return value
+
+
+class UserFields(BaseModel):
+    """
+    Поля пользователя с проверками pydantic-core.
+
+    Те же ограничения, что в _UserInfoChecks, но без вызова
+    Python-кода. Типы строгие, а почта - только ASCII, поэтому модель
+    не пропускает ничего, что отклонил бы _UserInfoChecks; обратное
+    (возраст 25.0, почта на кириллице) досматривает UserInfo.
+    """
+    model_config = ConfigDict(from_attributes=True)
+    first_name: Annotated[str, Field(strict=True, min_length=3)]
+    last_name: Annotated[str, Field(strict=True, min_length=3)]
+    age: Annotated[int, Field(strict=True, ge=0, le=120)]
+    salary: Union[Annotated[int, Field(strict=True, ge=0)],
+                  Annotated[float, Field(strict=True, ge=0)]]
+    email: Annotated[str, Field(strict=True, pattern=ASCII_EMAIL_PATTERN)]
+
+
+class UserInfo(UserFields):
+    """
+    Пользователь.
+
+    Данные проверяются ограничениями UserFields, а если они не
+    прошли - повторно _UserInfoChecks: так сохраняются прежние
+    тексты ошибок и прежний набор допустимых значений.
+    """
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def check_rejected(cls, data, handler) -> "UserInfo":
+        try:
+            return handler(data)
+        except ValidationError:
+            return cls.from_checks(data)
+
+    @classmethod
+    def from_checks(cls, data) -> "UserInfo":
+        """Проверка данных, уже не прошедших UserFields."""
+        checked = _UserInfoChecks.model_validate(data)
+        return cls.model_construct(**checked.model_dump())
+
+
+# Строка, не прошедшая UserFields, возвращается как есть, а не
+# прерывает проверку всей пачки.
+USER_FIELDS_LIST = TypeAdapter(list[Annotated[
+    Union[UserFields, Any], Field(union_mode="left_to_right")]])
+
+
+def validate_users(rows: list
+                   ) -> tuple[dict[int, UserFields], dict[int, list[str]]]:
+    """
+    Пакетная проверка пользователей.
+
+    Вся пачка проверяется одним вызовом pydantic-core, и только
+    не прошедшие строки - повторно по одной проверками на Python.
+
+    Args:
+
+        rows: Данные пользователей
+
+    Returns:
+
+        Кортеж из словаря {номер строки: пользователь} и словаря
+        {номер строки: тексты ошибок}.
+    """
+    valid, errors = {}, {}
+    for number, user in enumerate(USER_FIELDS_LIST.validate_python(rows)):
+        if not isinstance(user, UserFields):
+            try:
+                user = UserInfo.from_checks(user)
+            except ValidationError as ex:
+                errors[number] = [error["msg"] for error in ex.errors()]
+                continue
+        valid[number] = user
+    return valid, errors
+
+
+class UserIds(BaseModel):
+    ids: list[int]
+
+
+class UserPatch(BaseModel):
+    """Частичное изменение: переданные поля проверяются как в UserInfo."""
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    age: Optional[int] = None
+    salary: Optional[Union[int, float]] = None
+    email: Optional[str] = None
+
+    @field_validator('first_name')
+    def validate_first_name(cls, value: Optional[str]) -> Optional[str]:
+        return (value if value is None
+                else _UserInfoChecks.validate_first_name(value))
+
+    @field_validator('last_name')
+    def validate_last_name(cls, value: Optional[str]) -> Optional[str]:
+        return (value if value is None
+                else _UserInfoChecks.validate_last_name(value))
+
+    @field_validator('age', mode="before")
+    def validate_age_type(cls, value):
+        return (value if value is None
+                else _UserInfoChecks.validate_age_type(value))
+
+    @field_validator('age', mode="after")
+    def validate_age_range(cls, value):
+        return (value if value is None
+                else _UserInfoChecks.validate_age_range(value))
+
+    @field_validator('salary', mode="before")
+    def validate_salary_type(cls, value):
+        return (value if value is None
+                else _UserInfoChecks.validate_salary_type(value))
+
+    @field_validator('salary', mode="after")
+    def validate_salary_range(cls, value):
+        return (value if value is None
+                else _UserInfoChecks.validate_salary_range(value))
+
+    @field_validator('email')
+    def validate_email(cls, value: Optional[str]) -> Optional[str]:
+        return (value if value is None
+                else _UserInfoChecks.validate_email(value))
+
+
+class UsersDelete(BaseModel):
+    """Удаление по списку ID либо по фильтрам."""
+    ids: Optional[list[int]] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    min_salary: Optional[float] = None
+    max_salary: Optional[float] = None
+    last_name_prefix: Optional[str] = None
+
+
+class UserOut(BaseModel):
+    """Пользователь в ответе API."""
+    id: int
+    first_name: str
+    last_name: str
+    age: int
+    salary: Optional[float] = None
+    email: Optional[str] = None
+
+
+class UserResponse(BaseModel):
+    message: Union[UserOut, str]
+    status_code: int
+
+
+class UsersFound(BaseModel):
+    users: dict[int, UserOut]
+    missing: list[int]
+
+
+class UsersResponse(BaseModel):
+    message: Union[UsersFound, str]
+    status_code: int
+
+
+class UsersPage(BaseModel):
+    users: list[UserOut]
+    next_cursor: Optional[int] = None
+
+
+class UsersPageResponse(BaseModel):
+    message: Union[UsersPage, str]
+    status_code: int
+
+
+class UserMatch(UserOut):
+    """Найденный пользователь с рангом совпадения (0..1)."""
+    score: float
+
+
+class UsersSearchResponse(BaseModel):
+    message: Union[list[UserMatch], str]
+    status_code: int
+
+
+class AgeBucketStats(BaseModel):
+    age_from: int
+    age_to: int
+    users: int
+    salary_avg: Optional[float] = None
+    salary_min: Optional[float] = None
+    salary_max: Optional[float] = None
+    salary_p50: Optional[float] = None
+    salary_p90: Optional[float] = None
+    salary_p99: Optional[float] = None
+
+
+class SalaryStats(BaseModel):
+    buckets: list[AgeBucketStats]
+    stale_since: Optional[float] = None
+    rebuilt_at: Optional[float] = None
+
+
+class SalaryStatsResponse(BaseModel):
+    message: Union[SalaryStats, str]
+    status_code: int
+
+
+class UpsertResult(BaseModel):
+    """Итог добавления или изменения пользователя по email."""
+    id: int
+    email: str
+    created: bool
+
+
+class UpsertResponse(BaseModel):
+    message: Union[UpsertResult, str]
+    status_code: int
+
+
+class MessageResponse(BaseModel):
+    message: str
+    status_code: int
+
+
+class TicketResponse(MessageResponse):
+    ticket: Optional[str] = None
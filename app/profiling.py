@@ -0,0 +1,174 @@
+"""
+Профилирование медленных запросов и обработчиков.
+
+Оба механизма включаются только настройками из config: если они
+выключены, обработчики событий и зависимости не регистрируются
+и ничего не стоят.
+
+Func:
+
+    install_slow_query_log: Журнал SQL-запросов дольше SLOW_QUERY_MS
+    profile_request: Зависимость, профилирующая обработку запроса
+    router_dependencies: Зависимости профилирования для APIRouter
+
+Notes:
+    Профиль сохраняется в PROFILE_DIR в формате pstats: его можно
+    открыть python -m pstats, snakeviz или flameprof (flamegraph).
+    cProfile замеряет весь поток цикла событий, поэтому в профиль
+    попадают и другие запросы, обрабатывавшиеся в то же время;
+    одновременно профилируется только один запрос.
+"""
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from typing import AsyncIterator
+
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import (SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN, PROFILE_ENABLED,
+                    PROFILE_HEADER, PROFILE_SAMPLE_RATE, PROFILE_DIR)
+
+
+logger = logging.getLogger(__name__)
+
+_SLOW_START = "slow_query_start"
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+_profiling = False
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    """
+    План запроса на отдельном курсоре того же соединения.
+
+    EXPLAIN ANALYZE выполняет запрос повторно, поэтому на PostgreSQL
+    он используется только для SELECT, для остальных - EXPLAIN.
+    На PostgreSQL план строится внутри точки сохранения, чтобы
+    ошибка EXPLAIN не прервала транзакцию запроса.
+    """
+    operation = (statement.split(None, 1) or [""])[0].upper()
+    if operation not in _EXPLAINABLE:
+        return ""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = ("EXPLAIN (ANALYZE, BUFFERS) "
+                  if operation in ("SELECT", "WITH") else "EXPLAIN ")
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return ""
+    cursor = conn.connection.cursor()
+    savepoint = dialect == "postgresql"
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(map(str, row))
+                             for row in cursor.fetchall())
+        finally:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters,
+                           context, executemany) -> None:
+    conn.info.setdefault(_SLOW_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters,
+                          context, executemany) -> None:
+    elapsed_ms = (time.perf_counter() - conn.info[_SLOW_START].pop()) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+    plan = ""
+    if SLOW_QUERY_EXPLAIN and not executemany:
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as ex:
+            plan = f"EXPLAIN не выполнен: {ex}"
+    logger.warning(
+        "Медленный SQL-запрос %.1f мс: %s", elapsed_ms,
+        re.sub(r"\s+", " ", statement).strip(),
+        extra={"duration_ms": round(elapsed_ms, 3),
+               "parameters": repr(parameters)[:1000],
+               "plan": plan})
+
+
+def _handle_error(context) -> None:
+    if context.connection is not None:
+        starts = context.connection.info.get(_SLOW_START)
+        if starts:
+            starts.pop()
+
+
+def install_slow_query_log(engine: AsyncEngine) -> None:
+    """
+    Журнал SQL-запросов дольше SLOW_QUERY_MS.
+
+    В журнал попадают текст запроса, параметры, время выполнения
+    и, если включён SLOW_QUERY_EXPLAIN, план запроса.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute",
+                          _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute",
+                     _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute",
+                     _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _profile_path(request: Request) -> str:
+    path = re.sub(r"[^\w.-]+", "_", request.url.path).strip("_")
+    return os.path.join(
+        PROFILE_DIR,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns()}"
+        f"-{request.method}-{path}.pstats")
+
+
+async def profile_request(request: Request) -> AsyncIterator[None]:
+    """
+    Зависимость, профилирующая обработку запроса.
+
+    Запрос профилируется, если у него есть заголовок PROFILE_HEADER
+    или он попал в выборку PROFILE_SAMPLE_RATE. Для потоковых ответов
+    в профиль попадает только подготовка ответа, без отдачи тела.
+    """
+    global _profiling
+    sampled = (request.headers.get(PROFILE_HEADER)
+               or random.random() < PROFILE_SAMPLE_RATE)
+    if not sampled or _profiling:
+        yield
+        return
+    _profiling = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _profiling = False
+        path = _profile_path(request)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        await asyncio.to_thread(profiler.dump_stats, path)
+        logger.info("Профиль запроса %s %s сохранён в %s",
+                    request.method, request.url.path, path)
+
+
+def router_dependencies() -> list:
+    """
+    Зависимости профилирования для APIRouter.
+
+    Returns:
+
+        [Depends(profile_request)], если PROFILE_ENABLED, иначе [].
+    """
+    return [Depends(profile_request)] if PROFILE_ENABLED else []
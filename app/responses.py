@@ -0,0 +1,34 @@
+"""
+Классы HTTP-ответов приложения.
+
+Classes:
+
+    FastJSONResponse: JSON-ответ с сериализацией через orjson
+
+Notes:
+    orjson - необязательная зависимость: без неё FastJSONResponse
+    работает как обычный JSONResponse (стандартный json).
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ с сериализацией через orjson.
+
+    orjson в несколько раз быстрее стандартного json и сразу отдаёт
+    bytes. Ключи-числа (ID в словаре пользователей) сериализуются
+    строками, как и в стандартном json.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -8,26 +8,103 @@ Args:
 Func:
 
     get_user: Получение инфо о пользователе из базы
+    get_users: Получение инфо о нескольких пользователях из базы
+    list_users: Постраничный список пользователей с фильтрами
+    search_users: Нечёткий поиск по имени, фамилии и почте
+    salary_stats: Статистика зарплат по корзинам возраста
+    export_users: Потоковая выгрузка всех пользователей в NDJSON/CSV
     add_user: Добавление пользователя в базу
+    add_user_status: Статус заявки на отложенное добавление пользователя
+    add_users: Пакетное добавление пользователей в базу
+    upsert_user: Добавление или изменение пользователя по email
+    upsert_users: Пакетное добавление или изменение по email
     update_user: Изменение информации о пользователе
+    update_users: Пакетное изменение информации о пользователях
     delete_user: Удаление пользователя из базы данных
+    delete_users: Пакетное удаление пользователей из базы данных
 """
-from fastapi import APIRouter, Depends
+import csv
+import io
+import json
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Literal
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
-from app.models.model import UserInfo
-from app.database.FDataBase import (get_session, get_one_user,
-                                    add_one_user, update_user_info,
-                                    delete_one_user)
+from app import profiling
+from app.models.model import (UserInfo, UserIds, UserPatch, UsersDelete,
+                              UserResponse, UsersResponse, UsersPageResponse,
+                              UsersSearchResponse, SalaryStatsResponse,
+                              MessageResponse, TicketResponse,
+                              UpsertResponse,
+                              validate_users)
+from app.responses import FastJSONResponse
+from app.database.FDataBase import (get_session, get_session_factory,
+                                    get_one_user, get_user_version,
+                                    get_many_users,
+                                    get_users_page, stream_users,
+                                    add_one_user, add_many_users,
+                                    upsert_users as upsert_many_users,
+                                    update_user_info, update_many_users,
+                                    delete_one_user, delete_many_users,
+                                    USER_FIELDS)
+from app.database import search
+from app.database.stats import get_salary_stats
+from app.database.write_behind import write_behind
+from config import (BULK_BATCH_SIZE, BATCH_READ_MAX_IDS, LIST_PAGE_SIZE,
+                    LIST_PAGE_MAX, EXPORT_CHUNK_ROWS, SEARCH_LIMIT,
+                    SEARCH_MAX_LIMIT)
 
 
-router_user = APIRouter(prefix="/user")
+router_user = APIRouter(prefix="/user",
+                        default_response_class=FastJSONResponse,
+                        dependencies=profiling.router_dependencies())
 
 
-@router_user.get("/get_user/{user_id}")
-async def get_user(user_id: int,
+def _cache_headers(version: int, updated_at: float) -> dict:
+    """Заголовки ETag и Last-Modified по версии пользователя."""
+    return {"ETag": f'"{version}"',
+            "Last-Modified": formatdate(updated_at, usegmt=True)}
+
+
+def _etag_versions(header: str, weak: bool = True) -> list[int]:
+    """
+    Версии из заголовка If-Match/If-None-Match ("3", W/"4").
+
+    Без weak слабые теги (W/) пропускаются: If-Match сравнивает
+    теги строго (RFC 9110, 13.1.1).
+    """
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/") and not weak:
+            continue
+        tag = tag.removeprefix("W/").strip('"')
+        if tag.isdigit():
+            versions.append(int(tag))
+    return versions
+
+
+def _not_modified(request: Request, version: int, updated_at: float) -> bool:
+    """Проверка If-None-Match, а без него - If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return (if_none_match.strip() == "*"
+                or version in _etag_versions(if_none_match))
+    try:
+        since = parsedate_to_datetime(request.headers["if-modified-since"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and int(updated_at) <= since.timestamp()
+
+
+@router_user.get("/get_user/{user_id}", response_model=UserResponse)
+async def get_user(user_id: int, request: Request, response: Response,
                    session: AsyncSession = Depends(get_session)
-                   ) -> dict | str:
+                   ) -> dict:
     """
     Получение информации о пользователе.
 
@@ -41,16 +118,231 @@ async def get_user(user_id: int,
         'message': dict{инфо о пользователе} | str(ненахождение пользователя),
         'status_code': int(статус код)
         }
+
+    Notes:
+        Ответ содержит ETag (версия пользователя) и Last-Modified.
+        Если версия совпадает с If-None-Match (или пользователь не
+        менялся после If-Modified-Since), возвращается 304 без тела:
+        читается только версия, без загрузки и сериализации строки.
     """
+    if ("if-none-match" in request.headers
+            or "if-modified-since" in request.headers):
+        version = await get_user_version(user_id=user_id, session=session)
+        if version is not None and _not_modified(request, *version):
+            return Response(status_code=304, headers=_cache_headers(*version))
     user = await get_one_user(user_id=user_id, session=session)
     if isinstance(user, dict):
+        if "version" in user:
+            response.headers.update(
+                _cache_headers(user["version"], user["updated_at"]))
         return {"message": user, "status_code": 200}
     else:
         return {"message": user, "status_code": 404}
 
 
-@router_user.post("/add_user")
-async def add_user(data: UserInfo,
+@router_user.get("/get_users", response_model=UsersResponse)
+async def get_users(ids: list[int] = Query(),
+                    session: AsyncSession = Depends(get_session)
+                    ) -> dict:
+    """
+    Получение информации о нескольких пользователях.
+
+    Args:
+
+        ids: ID пользователей (?ids=1&ids=2)
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'users': dict{ID: dict{инфо о пользователе}},
+            'missing': list[int](ID, которых нет в базе)
+            } | str(превышение лимита ID),
+        'status_code': int(статус код)
+        }
+    """
+    if len(ids) > BATCH_READ_MAX_IDS:
+        return {"message": ("Слишком много ID в запросе, максимум "
+                            f"{BATCH_READ_MAX_IDS}!"),
+                "status_code": 422}
+    users = await get_many_users(user_ids=ids, session=session)
+    return {"message": users, "status_code": 200}
+
+
+@router_user.post("/get_users", response_model=UsersResponse)
+async def get_users_by_body(data: UserIds,
+                            session: AsyncSession = Depends(get_session)
+                            ) -> dict:
+    """
+    Получение информации о нескольких пользователях.
+
+    То же, что GET /get_users, но ID передаются в теле запроса:
+    {"ids": [1, 2]}.
+    """
+    return await get_users(ids=data.ids, session=session)
+
+
+@router_user.get("/list_users", response_model=UsersPageResponse)
+async def list_users(cursor: int = 0,
+                     limit: int = Query(LIST_PAGE_SIZE, ge=1),
+                     min_age: int | None = None, max_age: int | None = None,
+                     min_salary: float | None = None,
+                     max_salary: float | None = None,
+                     last_name_prefix: str | None = None,
+                     session: AsyncSession = Depends(get_session)
+                     ) -> dict:
+    """
+    Постраничный список пользователей с фильтрами.
+
+    Args:
+
+        cursor: next_cursor предыдущей страницы (0 - первая страница)
+        limit: Размер страницы (не больше LIST_PAGE_MAX)
+        min_age, max_age: Диапазон возраста
+        min_salary, max_salary: Диапазон заработной платы
+        last_name_prefix: Начало фамилии
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'users': list[dict{инфо о пользователе}],
+            'next_cursor': int | None(cursor следующей страницы)
+            },
+        'status_code': int(статус код)
+        }
+    """
+    page = await get_users_page(
+        cursor=cursor, limit=min(limit, LIST_PAGE_MAX),
+        min_age=min_age, max_age=max_age,
+        min_salary=min_salary, max_salary=max_salary,
+        last_name_prefix=last_name_prefix, session=session)
+    return {"message": page, "status_code": 200}
+
+
+@router_user.get("/search_users", response_model=UsersSearchResponse)
+async def search_users(q: str = Query(min_length=2, max_length=100),
+                       limit: int = Query(SEARCH_LIMIT, ge=1),
+                       session: AsyncSession = Depends(get_session)
+                       ) -> dict:
+    """
+    Нечёткий поиск пользователей по имени, фамилии и почте.
+
+    Args:
+
+        q: Часть имени, фамилии или электронной почты (можно с опечаткой)
+        limit: Количество результатов (не больше SEARCH_MAX_LIMIT)
+
+    Returns:
+
+        dict{
+        'message': list[dict{инфо о пользователе, 'score': float(ранг)}],
+        'status_code': int(статус код)
+        }
+    """
+    users = await search.search_users(q, min(limit, SEARCH_MAX_LIMIT),
+                                      session=session)
+    return {"message": users, "status_code": 200}
+
+
+@router_user.get("/salary_stats", response_model=SalaryStatsResponse)
+async def salary_stats(session: AsyncSession = Depends(get_session)
+                       ) -> dict:
+    """
+    Статистика зарплат по корзинам возраста из сводки user_stats.
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'buckets': list[dict{age_from, age_to, users, salary_avg,
+                                 salary_min, salary_max, salary_p50,
+                                 salary_p90, salary_p99}],
+            'stale_since': float | None(сводка не учитывает часть
+                изменений с этого времени),
+            'rebuilt_at': float | None(время полной перестройки)
+            },
+        'status_code': int(статус код)
+        }
+
+    Notes:
+        Процентили считаются по логарифмической гистограмме
+        (USER_STATS_SALARY_BUCKETS корзин на порядок), минимум,
+        максимум, среднее и количество - точные.
+    """
+    return {"message": await get_salary_stats(session), "status_code": 200}
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson",
+                      "csv": "text/csv; charset=utf-8"}
+
+
+async def _encode_rows(chunks: AsyncIterator[list[dict]],
+                       export_format: str) -> AsyncIterator[bytes]:
+    """Кодирование порций строк в NDJSON или CSV."""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=("id", *USER_FIELDS))
+        writer.writeheader()
+        async for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    else:
+        async for rows in chunks:
+            yield "".join(json.dumps(row, ensure_ascii=False) + "\n"
+                          for row in rows).encode()
+
+
+async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Потоковое сжатие gzip."""
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router_user.get("/export_users")
+async def export_users(
+        export_format: Literal["ndjson", "csv"] = Query("ndjson",
+                                                        alias="format"),
+        gzip: bool = False,
+        session_factory: sessionmaker = Depends(get_session_factory)
+) -> StreamingResponse:
+    """
+    Потоковая выгрузка всех пользователей.
+
+    Таблица читается серверным курсором порциями по EXPORT_CHUNK_ROWS,
+    каждая порция сразу отправляется клиенту, поэтому расход памяти
+    не зависит от размера таблицы, а медленный клиент притормаживает
+    чтение из базы.
+
+    Args:
+
+        format: Формат выгрузки: ndjson или csv
+        gzip: Сжимать ли ответ (Content-Encoding: gzip)
+
+    Returns:
+
+        Поток строк NDJSON или CSV.
+    """
+    body = _encode_rows(stream_users(session_factory, EXPORT_CHUNK_ROWS),
+                        export_format)
+    headers = {"Content-Disposition":
+               f'attachment; filename="users.{export_format}"'}
+    if gzip:
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, headers=headers,
+                             media_type=EXPORT_MEDIA_TYPES[export_format])
+
+
+@router_user.post("/add_user", response_model=TicketResponse,
+                  response_model_exclude_none=True)
+async def add_user(data: UserInfo, response: Response,
                    session: AsyncSession = Depends(get_session)
                    ) -> dict:
     """
@@ -68,19 +360,267 @@ async def add_user(data: UserInfo,
 
         dict{
         'message': str(добавление/ошибка добавления пользователя в базу),
-        'status_code': int(статус код)
+        'status_code': int(статус код),
+        'ticket': str(номер заявки, только при отложенной записи)
         }
+
+    Notes:
+        При включённой отложенной записи (WRITE_BEHIND_ENABLED)
+        пользователь ставится в очередь: ответ 202 с номером заявки
+        или 429, если очередь заполнена. Email уникален: повторное
+        добавление - HTTP 409 (для повторов - upsert_user).
     """
+    if write_behind.running:
+        ticket = write_behind.submit(
+            {"first_name": data.first_name, "last_name": data.last_name,
+             "age": int(data.age), "salary": float(data.salary),
+             "email": data.email})
+        if ticket is None:
+            response.status_code = 429
+            response.headers["Retry-After"] = "1"
+            return {"message": "Очередь записи заполнена, повторите позже!",
+                    "status_code": 429}
+        response.status_code = 202
+        return {"message": "Пользователь поставлен в очередь на добавление!",
+                "status_code": 202, "ticket": ticket}
     new_user = await add_one_user(first_name=data.first_name,
                                   last_name=data.last_name, age=int(data.age),
                                   salary=float(data.salary), email=data.email,
                                   session=session)
+    if new_user["status_code"] == 409:
+        response.status_code = 409
     return {"message": new_user['message'],
             "status_code": new_user["status_code"]}
 
 
-@router_user.put("/update_user/{user_id}")
-async def update_user(user_id: int, data: UserInfo,
+@router_user.get("/add_user_status/{ticket}")
+async def add_user_status(ticket: str) -> dict:
+    """
+    Статус заявки на отложенное добавление пользователя.
+
+    Args:
+
+        ticket: Номер заявки из ответа add_user
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'status': str(pending/inserted/rejected/failed),
+            'errors': list[str](для rejected и failed)
+            } | str(заявка не найдена),
+        'status_code': int(статус код)
+        }
+    """
+    status = write_behind.status(ticket)
+    if status is None:
+        return {"message": f"Заявка {ticket} не найдена!",
+                "status_code": 404}
+    return {"message": status, "status_code": 200}
+
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+
+
+async def _read_rows(request: Request) -> AsyncIterator[tuple[int, object]]:
+    """
+    Чтение строк тела запроса: JSON-массива или NDJSON-потока.
+
+    NDJSON читается по мере поступления, не загружая тело целиком.
+    Строки, которые не удалось разобрать, отдаются как исключение.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith(NDJSON_TYPES):
+        rows = await request.json()
+        if not isinstance(rows, list):
+            raise ValueError("Ожидается массив пользователей!")
+        for number, row in enumerate(rows):
+            yield number, row
+        return
+
+    number, tail = 0, b""
+    async for chunk in request.stream():
+        *lines, tail = (tail + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield number, _parse_line(line)
+                number += 1
+    if tail.strip():
+        yield number, _parse_line(tail)
+
+
+def _parse_line(line: bytes) -> object:
+    """Разбор одной строки NDJSON."""
+    try:
+        return json.loads(line)
+    except ValueError as ex:
+        return ex
+
+
+def _validate_rows(rows: list[tuple[int, object]]
+                   ) -> tuple[list[tuple[int, dict]], list[dict]]:
+    """Валидация пачки строк моделью UserInfo."""
+    rejected = [{"row": number, "errors": ["Неверный JSON"]}
+                for number, row in rows if isinstance(row, ValueError)]
+    rows = [(number, row) for number, row in rows
+            if not isinstance(row, ValueError)]
+    users, errors = validate_users([row for _, row in rows])
+    for index, messages in errors.items():
+        rejected.append({"row": rows[index][0], "errors": messages})
+    rejected.sort(key=lambda item: item["row"])
+    valid = [(rows[index][0], {"first_name": data.first_name,
+                               "last_name": data.last_name,
+                               "age": int(data.age),
+                               "salary": float(data.salary),
+                               "email": data.email})
+             for index, data in users.items()]
+    return valid, rejected
+
+
+@router_user.post("/add_users")
+async def add_users(request: Request,
+                    session: AsyncSession = Depends(get_session)
+                    ) -> dict:
+    """
+    Пакетное добавление пользователей в базу данных.
+
+    Принимает JSON-массив пользователей или NDJSON-поток
+    (Content-Type: application/x-ndjson). Строки валидируются и
+    записываются пачками по BULK_BATCH_SIZE, каждая пачка -
+    в своей транзакции. Ошибочные строки не прерывают загрузку.
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'inserted': int(количество добавленных пользователей),
+            'rejected': list[dict{'row': int, 'errors': list[str]}]
+            },
+        'status_code': int(статус код)
+        }
+    """
+    report = {"inserted": 0, "rejected": []}
+    batch = []
+
+    async def flush() -> None:
+        valid, rejected = _validate_rows(batch)
+        report["rejected"].extend(rejected)
+        if valid:
+            result = await add_many_users(valid, session=session)
+            report["inserted"] += result["inserted"]
+            report["rejected"].extend(result["rejected"])
+        batch.clear()
+
+    try:
+        async for row in _read_rows(request):
+            batch.append(row)
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush()
+    except json.JSONDecodeError:
+        return {"message": "Неверный JSON", "status_code": 422}
+    except ValueError as ex:
+        return {"message": str(ex), "status_code": 422}
+    await flush()
+    report["rejected"].sort(key=lambda error: error["row"])
+    return {"message": report, "status_code": 200}
+
+
+@router_user.put("/upsert_user", response_model=UpsertResponse)
+async def upsert_user(data: UserInfo, response: Response,
+                      session: AsyncSession = Depends(get_session)
+                      ) -> dict:
+    """
+    Добавление пользователя или изменение пользователя с тем же email.
+
+    Args:
+
+        first_name: Имя пользователя
+        last_name: Фамилия пользователя
+        age: Количество полных лет пользователя
+        salary: Заработная плата пользователя
+        email: Электронная почта пользователя
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'id': int(ID пользователя),
+            'email': str(электронная почта),
+            'created': bool(True - добавлен, False - изменён)
+            },
+        'status_code': int(201 - добавлен, 200 - изменён)
+        }
+
+    Notes:
+        Запись - один запрос INSERT ... ON CONFLICT (email) DO UPDATE,
+        повтор запроса безопасен: дубликат не появится.
+    """
+    [result] = await upsert_many_users(
+        [{"first_name": data.first_name, "last_name": data.last_name,
+          "age": int(data.age), "salary": float(data.salary),
+          "email": data.email}],
+        session=session)
+    status_code = 201 if result["created"] else 200
+    response.status_code = status_code
+    return {"message": result, "status_code": status_code}
+
+
+@router_user.put("/upsert_users")
+async def upsert_users(request: Request,
+                       session: AsyncSession = Depends(get_session)
+                       ) -> dict:
+    """
+    Пакетное добавление или изменение пользователей по email.
+
+    Принимает JSON-массив пользователей или NDJSON-поток, как
+    add_users. Каждая пачка из BULK_BATCH_SIZE строк - один запрос
+    INSERT ... ON CONFLICT (email) DO UPDATE в своей транзакции.
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'created': int(количество добавленных пользователей),
+            'updated': int(количество изменённых пользователей),
+            'users': list[dict{'row', 'id', 'email', 'created'}],
+            'rejected': list[dict{'row': int, 'errors': list[str]}]
+            },
+        'status_code': int(статус код)
+        }
+    """
+    report = {"created": 0, "updated": 0, "users": [], "rejected": []}
+    batch = []
+
+    async def flush() -> None:
+        valid, rejected = _validate_rows(batch)
+        report["rejected"].extend(rejected)
+        if valid:
+            results = await upsert_many_users([row for _, row in valid],
+                                              session=session)
+            for (number, _), result in zip(valid, results):
+                report["users"].append({"row": number, **result})
+            for result in {result["id"]: result for result in results
+                           }.values():
+                report["created" if result["created"] else "updated"] += 1
+        batch.clear()
+
+    try:
+        async for row in _read_rows(request):
+            batch.append(row)
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush()
+    except json.JSONDecodeError:
+        return {"message": "Неверный JSON", "status_code": 422}
+    except ValueError as ex:
+        return {"message": str(ex), "status_code": 422}
+    await flush()
+    report["rejected"].sort(key=lambda error: error["row"])
+    return {"message": report, "status_code": 200}
+
+
+@router_user.put("/update_user/{user_id}", response_model=MessageResponse)
+async def update_user(user_id: int, data: UserInfo, request: Request,
+                      response: Response,
                       session: AsyncSession = Depends(get_session)
                       ) -> dict:
     """
@@ -101,17 +641,33 @@ async def update_user(user_id: int, data: UserInfo,
         'message': str(изменениие информации/ненахождение пользователя в базе),
         'status_code': int(статус код)
         }
+
+    Notes:
+        С заголовком If-Match пользователь изменяется, только если
+        его версия совпадает с ETag (слабые теги W/ не совпадают),
+        иначе ответ - HTTP 412. Новый ETag возвращается в заголовке
+        ответа. If-Match: * для несуществующего пользователя -
+        HTTP 412. Email другого пользователя - HTTP 409.
     """
-    new_info = await update_user_info(user_id=user_id,
-                                      first_name=data.first_name,
-                                      last_name=data.last_name, age=data.age,
-                                      salary=data.salary, email=data.email,
-                                      session=session)
+    if_match = request.headers.get("if-match")
+    match_any = if_match is not None and if_match.strip() == "*"
+    new_info = await update_user_info(
+        user_id=user_id, first_name=data.first_name,
+        last_name=data.last_name, age=data.age, salary=data.salary,
+        email=data.email,
+        expected_versions=(None if if_match is None or match_any
+                           else _etag_versions(if_match, weak=False)),
+        match_any=match_any, session=session)
+    if new_info["status_code"] == 200:
+        response.headers.update(
+            _cache_headers(new_info["version"], new_info["updated_at"]))
+    elif new_info["status_code"] in (409, 412):
+        response.status_code = new_info["status_code"]
     return {"message": new_info['message'],
             "status_code": new_info["status_code"]}
 
 
-@router_user.delete("/delete_user/{user_id}")
+@router_user.delete("/delete_user/{user_id}", response_model=MessageResponse)
 async def delete_user(user_id: int,
                       session: AsyncSession = Depends(get_session)
                       ) -> dict:
@@ -132,3 +688,70 @@ async def delete_user(user_id: int,
     delete_user = await delete_one_user(user_id=user_id, session=session)
     return {"message": delete_user['message'],
             "status_code": delete_user["status_code"]}
+
+
+@router_user.put("/update_users")
+async def update_users(data: list[UserPatch], response: Response,
+                       session: AsyncSession = Depends(get_session)
+                       ) -> dict:
+    """
+    Пакетное изменение информации о пользователях.
+
+    Args:
+
+        data: Список изменений: ID пользователя и изменяемые поля,
+            например [{"id": 1, "salary": 30000}]
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'updated': int(количество изменённых пользователей),
+            'missing': list[int](ID, которых нет в базе)
+            } | str(email занят другим пользователем, HTTP 409),
+        'status_code': int(статус код)
+        }
+    """
+    result = await update_many_users(
+        [patch.model_dump(exclude_none=True) for patch in data],
+        session=session)
+    if result.get("status_code") == 409:
+        response.status_code = 409
+        return result
+    return {"message": result, "status_code": 200}
+
+
+@router_user.delete("/delete_users")
+async def delete_users(data: UsersDelete,
+                       session: AsyncSession = Depends(get_session)
+                       ) -> dict:
+    """
+    Пакетное удаление пользователей.
+
+    Args:
+
+        ids: Список ID пользователей
+        min_age, max_age: Диапазон возраста
+        min_salary, max_salary: Диапазон заработной платы
+        last_name_prefix: Начало фамилии
+
+        Нужно указать ids либо хотя бы один фильтр.
+
+    Returns:
+
+        dict{
+        'message': dict{
+            'deleted': int(количество удалённых пользователей),
+            'missing': list[int](ID из ids, которых нет в базе)
+            } | str(не указаны ни ID, ни фильтры),
+        'status_code': int(статус код)
+        }
+    """
+    filters = data.model_dump(exclude={"ids"})
+    if data.ids is None and all(value in (None, "")
+                                for value in filters.values()):
+        return {"message": "Нужно указать ID или хотя бы один фильтр!",
+                "status_code": 422}
+    result = await delete_many_users(user_ids=data.ids, **filters,
+                                     session=session)
+    return {"message": result, "status_code": 200}
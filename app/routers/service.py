@@ -0,0 +1,241 @@
+"""
+Служебные обработчики routers приложения.
+
+Args:
+
+    router_service: Роутеры пути /service
+    router_metrics: Роутер выгрузки метрик /metrics
+
+Func:
+
+    live: Проверка, что процесс жив
+    ready: Проверка готовности принимать запросы
+    cache_stats: Счётчики кэша пользователей
+    pool_stats: Состояние пула соединений с базой данных
+    replica_stats: Состояние реплик для чтения
+    write_behind_stats: Счётчики очереди отложенной записи
+    admission_stats: Счётчики контроля нагрузки
+    coalescing_stats: Счётчики объединения одновременных чтений
+    metrics: Метрики приложения в формате Prometheus
+"""
+from typing import Iterator
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import PlainTextResponse
+
+from app import metrics as app_metrics
+from app.admission import admission
+from app.database.cache import user_cache
+from app.database.FDataBase import engine
+from app.database import pool
+from app.database.replicas import replica_set
+from app.database.single_flight import user_reads
+from app.database.startup import ping
+from app.database.write_behind import write_behind
+from app.database.pool import InstrumentedPool
+
+
+router_service = APIRouter(prefix="/service")
+router_metrics = APIRouter()
+
+
+@router_service.get("/live")
+async def live() -> dict:
+    """
+    Проверка, что процесс жив (liveness), без обращения к базе.
+
+    Returns:
+
+        dict{
+        'message': str(ok),
+        'status_code': int(статус код)
+        }
+    """
+    return {"message": "ok", "status_code": 200}
+
+
+@router_service.get("/ready")
+async def ready(request: Request, response: Response) -> dict:
+    """
+    Проверка готовности принимать запросы (readiness).
+
+    Готовность наступает после подготовки схемы и прогрева пула
+    при запуске и пропадает при остановке или недоступности базы.
+
+    Returns:
+
+        dict{
+        'message': str(ok/причина неготовности),
+        'status_code': int(статус код)
+        }
+    """
+    if not getattr(request.app.state, "ready", False):
+        message = "Приложение запускается или останавливается!"
+    elif not await ping():
+        message = "База данных недоступна!"
+    else:
+        return {"message": "ok", "status_code": 200}
+    response.status_code = 503
+    return {"message": message, "status_code": 503}
+
+
+@router_service.get("/cache_stats")
+async def cache_stats() -> dict:
+    """
+    Счётчики кэша пользователей.
+
+    Returns:
+
+        dict{
+        'message': dict{hits, misses, evictions, expirations, size, ...},
+        'status_code': int(статус код)
+        }
+    """
+    return {"message": await user_cache.stats(), "status_code": 200}
+
+
+@router_service.get("/pool_stats")
+async def pool_stats() -> dict:
+    """
+    Состояние пула соединений с базой данных.
+
+    Returns:
+
+        dict{
+        'message': dict{size, checked_out, overflow, waiting,
+                        timeouts, wait_time(гистограмма)},
+        'status_code': int(статус код)
+        }
+    """
+    return {"message": pool.pool_stats(engine), "status_code": 200}
+
+
+@router_service.get("/replica_stats")
+async def replica_stats() -> dict:
+    """
+    Состояние реплик для чтения.
+
+    Returns:
+
+        dict{
+        'message': list[dict{name, healthy, load(занятые соединения)}],
+        'status_code': int(статус код)
+        }
+    """
+    return {"message": replica_set.stats(), "status_code": 200}
+
+
+@router_service.get("/write_behind_stats")
+async def write_behind_stats() -> dict:
+    """
+    Счётчики очереди отложенной записи пользователей.
+
+    Returns:
+
+        dict{
+        'message': dict{running, queued, max_size, batches,
+                        inserted, rejected, failed},
+        'status_code': int(статус код)
+        }
+    """
+    return {"message": write_behind.stats(), "status_code": 200}
+
+
+@router_service.get("/admission_stats")
+async def admission_stats() -> dict:
+    """
+    Счётчики контроля нагрузки на обработчики /user.
+
+    Returns:
+
+        dict{
+        'message': dict{read, write, routes: dict{маршрут: ...}}
+            с limit, active, waiting, admitted, queued, rejected,
+            timeouts у каждого бюджета,
+        'status_code': int(статус код)
+        }
+    """
+    return {"message": admission.stats(), "status_code": 200}
+
+
+@router_service.get("/coalescing_stats")
+async def coalescing_stats() -> dict:
+    """
+    Счётчики объединения одновременных чтений пользователя по ID.
+
+    Returns:
+
+        dict{
+        'message': dict{calls(запросы к базе), shared(чтения,
+                        получившие результат чужого запроса),
+                        bypassed, in_flight},
+        'status_code': int(статус код)
+        }
+    """
+    return {"message": user_reads.stats(), "status_code": 200}
+
+
+def _collect_pool() -> Iterator[app_metrics.Metric]:
+    """Метрики пула соединений основного движка."""
+    stats = pool.pool_stats(engine)
+    for name, documentation in (
+            ("checked_out", "Выданные соединения"),
+            ("checked_in", "Свободные соединения в пуле"),
+            ("overflow", "Соединения сверх POOL_SIZE"),
+            ("waiting", "Запросы, ожидающие соединение")):
+        if name in stats:
+            gauge = app_metrics.Gauge(f"db_pool_{name}", documentation,
+                                      register=False)
+            gauge.set(stats[name])
+            yield gauge
+    if isinstance(engine.pool, InstrumentedPool):
+        timeouts = app_metrics.Counter(
+            "db_pool_timeouts_total", "Таймауты ожидания соединения",
+            register=False)
+        timeouts.inc(amount=engine.pool.metrics.timeouts)
+        wait_time = app_metrics.HistogramMetric(
+            "db_pool_checkout_wait_seconds", "Время ожидания соединения",
+            register=False)
+        wait_time.values[()] = engine.pool.metrics.wait_time
+        yield from (timeouts, wait_time)
+
+
+def _collect_cache() -> Iterator[app_metrics.Metric]:
+    """Счётчики кэша пользователей."""
+    for name in ("hits", "misses", "evictions"):
+        if hasattr(user_cache, name):
+            counter = app_metrics.Counter(
+                f"user_cache_{name}_total", f"Кэш пользователей: {name}",
+                register=False)
+            counter.inc(amount=getattr(user_cache, name))
+            yield counter
+
+
+def _collect_coalescing() -> Iterator[app_metrics.Metric]:
+    """Счётчики объединения чтений пользователей."""
+    for name, documentation in (
+            ("calls", "Чтения пользователя, выполненные запросом к базе"),
+            ("shared", "Чтения, объединённые с запросом в полёте")):
+        counter = app_metrics.Counter(
+            f"user_reads_{name}_total", documentation, register=False)
+        counter.inc(amount=getattr(user_reads, name))
+        yield counter
+
+
+app_metrics.register_collector(_collect_pool)
+app_metrics.register_collector(_collect_coalescing)
+app_metrics.register_collector(_collect_cache)
+
+
+@router_metrics.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Метрики приложения в формате Prometheus.
+
+    Returns:
+
+        Текст в формате Prometheus (text/plain; version=0.0.4).
+    """
+    return PlainTextResponse(
+        app_metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,91 @@
+"""
+Запуск приложения в нескольких процессах.
+
+Func:
+
+    server_options: Параметры uvicorn из config
+    main: Запуск сервера
+
+Notes:
+    Супервизор uvicorn сам приложение не импортирует, а воркеры
+    запускаются через spawn: каждый заново импортирует app.main
+    и создаёт свои движки и пулы соединений. При запуске через
+    fork (например, gunicorn --preload) пулы сбрасываются в дочернем
+    процессе, см. app.database.pool.
+
+    SIGHUP перезапускает воркеры по одному, SIGTTIN/SIGTTOU добавляют
+    и убирают воркер, упавший воркер запускается заново. SIGTERM
+    и SIGINT останавливают сервер, давая запросам
+    SERVER_GRACEFUL_TIMEOUT секунд.
+
+    uvloop и httptools используются, если установлены.
+
+    С несколькими воркерами каждый пишет журнал в свой файл с PID
+    в имени (LOG_PER_PROCESS), если не задано иное.
+
+Запуск:
+
+    python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import importlib.util
+import os
+
+import uvicorn
+
+from config import (SERVER_HOST, SERVER_PORT, WEB_CONCURRENCY,
+                    SERVER_BACKLOG, SERVER_KEEPALIVE,
+                    SERVER_GRACEFUL_TIMEOUT, SERVER_MAX_REQUESTS)
+
+
+APP = "app.main:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(workers: int = WEB_CONCURRENCY, host: str = SERVER_HOST,
+                   port: int = SERVER_PORT) -> dict:
+    """
+    Параметры uvicorn из config.
+
+    Args:
+
+        workers: Количество процессов-воркеров
+        host: Адрес, на котором слушает сервер
+        port: Порт сервера
+
+    Returns:
+
+        Именованные аргументы uvicorn.run.
+    """
+    return {"host": host,
+            "port": port,
+            "workers": max(workers, 1),
+            "loop": "uvloop" if _installed("uvloop") else "asyncio",
+            "http": "httptools" if _installed("httptools") else "h11",
+            "backlog": SERVER_BACKLOG,
+            "timeout_keep_alive": SERVER_KEEPALIVE,
+            "timeout_graceful_shutdown": SERVER_GRACEFUL_TIMEOUT,
+            "limit_max_requests": SERVER_MAX_REQUESTS or None,
+            "proxy_headers": True,
+            "server_header": False,
+            "access_log": False}
+
+
+def main() -> None:
+    """Запуск сервера с параметрами командной строки поверх config."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    if args.workers > 1:
+        # Воркеры наследуют окружение и пишут журнал каждый в свой файл.
+        os.environ.setdefault("LOG_PER_PROCESS", "1")
+    uvicorn.run(APP, **server_options(args.workers, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Нагрузочный бенчмарк API /user.
+
+Для каждой операции (get, add, update, delete) замеряет пропускную
+способность и задержки p50/p95/p99 при заданной конкурентности
+и размере набора данных. Результат сохраняется в JSON вместе с
+коммитом и параметрами запуска, чтобы сравнивать коммиты между собой.
+
+Режимы:
+
+    * по умолчанию приложение app вызывается в процессе через
+      httpx.ASGITransport (как в tests/conftest.py), база - из --db-uri,
+      таблицы в ней пересоздаются;
+    * --url http://localhost:8000 - нагрузка на запущенный uvicorn,
+      база - та, что настроена у сервера (DATABASE_URI, например
+      sqlite+aiosqlite:///bench.db).
+
+Запуск:
+
+    python -m benchmarks.bench_api --db-uri sqlite+aiosqlite:///bench.db
+    python -m benchmarks.bench_api --db-uri "$DATABASE_TEST_URI" \\
+        --concurrency 32 --dataset 50000 --requests 5000 \\
+        --output bench_output.json
+    python -m benchmarks.bench_api --compare bench_output.json
+
+Notes:
+    --compare печатает изменение метрик относительно прошлого
+    результата и завершается с кодом 1, если p95 какой-либо
+    операции вырос больше, чем на --threshold процентов.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    create_async_engine)
+from sqlalchemy.orm import sessionmaker
+
+from app.database.FDataBase import Base, get_session, get_session_factory
+from app.main import app
+from config import DATABASE_TEST_URI
+
+
+OPERATIONS = ("get", "add", "update", "delete")
+SEED_BATCH = 1000
+
+
+def make_user(number: int) -> dict:
+    return {"first_name": f"Name{number}", "last_name": f"Last{number}",
+            "age": 18 + number % 60, "salary": 1000.0 + number % 5000,
+            "email": f"bench_{number}_{random.random():.8f}@mail.ru"}
+
+
+def percentile(ordered: list[float], value: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * value), len(ordered) - 1)]
+
+
+async def use_database(uri: str) -> AsyncEngine:
+    """Подмена сессий приложения сессиями бенчмарка."""
+    engine = create_async_engine(uri)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession,
+                           expire_on_commit=False)
+
+    async def _get_bench_session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _get_bench_session
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    return engine
+
+
+async def seed(client: AsyncClient, dataset: int) -> list[int]:
+    """Загрузка набора данных и получение ID пользователей."""
+    for start in range(0, dataset, SEED_BATCH):
+        rows = [make_user(number)
+                for number in range(start, min(start + SEED_BATCH, dataset))]
+        response = await client.post("/user/add_users", json=rows)
+        response.raise_for_status()
+    ids, cursor = [], 0
+    while cursor is not None:
+        page = (await client.get("/user/list_users",
+                                 params={"cursor": cursor, "limit": 1000})
+                ).json()["message"]
+        ids.extend(user["id"] for user in page["users"])
+        cursor = page["next_cursor"]
+    return ids
+
+
+def make_request(operation: str, ids: list[int], deletable: list[int],
+                 counter: itertools.count) -> tuple[str, str, dict | None]:
+    number = next(counter)
+    if operation == "get":
+        return "GET", f"/user/get_user/{random.choice(ids)}", None
+    if operation == "add":
+        return "POST", "/user/add_user", make_user(number)
+    if operation == "update":
+        return ("PUT", f"/user/update_user/{random.choice(ids)}",
+                make_user(number))
+    return "DELETE", f"/user/delete_user/{deletable.pop()}", None
+
+
+async def run_operation(client: AsyncClient, operation: str,
+                        ids: list[int], deletable: list[int],
+                        requests: int, concurrency: int) -> dict:
+    """Выполнение requests запросов одной операции в concurrency потоков."""
+    latencies, errors = [], 0
+    counter = itertools.count(10 ** 9)
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            method, url, body = make_request(operation, ids, deletable,
+                                             counter)
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if (response.status_code != 200
+                    or response.json().get("status_code") != 200):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "max_ms": round(latencies[-1] if latencies else 0.0, 3)}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    engine = None
+    if args.url:
+        client = AsyncClient(base_url=args.url, timeout=60)
+    else:
+        engine = await use_database(args.db_uri)
+        client = AsyncClient(transport=ASGITransport(app=app),
+                             base_url="http://bench", timeout=60)
+    async with client:
+        ids = await seed(client, args.dataset)
+        random.shuffle(ids)
+        deletable = ids[:args.requests] if "delete" in args.ops else []
+        ids = ids[len(deletable):] or deletable
+        results = {}
+        for operation in OPERATIONS:
+            if operation in args.ops:
+                results[operation] = await run_operation(
+                    client, operation, ids, deletable, args.requests,
+                    args.concurrency)
+    if engine is not None:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+    return {"commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "target": args.url or args.db_uri.split("://")[0],
+            "dataset": args.dataset,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "results": results}
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Печать изменений относительно baseline, True - без регрессий."""
+    ok = True
+    for operation, metrics in current["results"].items():
+        old = baseline["results"].get(operation)
+        if old is None:
+            continue
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            change = ((metrics[metric] - old[metric]) / old[metric] * 100
+                      if old[metric] else 0.0)
+            print(f"{operation:>7} {metric:>15}: {old[metric]:>10} -> "
+                  f"{metrics[metric]:>10} ({change:+.1f}%)")
+            if metric == "p95_ms" and change > threshold:
+                ok = False
+    return ok
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк API /user")
+    parser.add_argument("--db-uri", default=DATABASE_TEST_URI,
+                        help="база для режима в процессе "
+                             "(PostgreSQL или sqlite+aiosqlite)")
+    parser.add_argument("--url", help="адрес запущенного uvicorn")
+    parser.add_argument("--dataset", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="количество запросов на операцию")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS,
+                        default=list(OPERATIONS))
+    parser.add_argument("--output", help="файл для результата в JSON")
+    parser.add_argument("--compare", help="прошлый результат в JSON")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="допустимый рост p95 в процентах")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if "delete" in args.ops and args.dataset < 2 * args.requests:
+        parser.error("для delete нужно --dataset >= 2 * --requests")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    random.seed(args.seed)
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            if not compare(result, json.load(file), args.threshold):
+                sys.exit(1)
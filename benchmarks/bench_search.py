@@ -0,0 +1,177 @@
+"""
+Замер времени поиска пользователей на большой таблице.
+
+Сравниваются:
+
+    * ilike_scan: ILIKE '%запрос%' по трём полям без триграммных
+      индексов (то, что делали вручную во внешнем инструменте);
+    * search_users: поиск приложения в режиме search_mode: trigram -
+      PostgreSQL с pg_trgm по GIN-индексам ix_users_*_trgm (они
+      строятся после загрузки, время - trigram_index_build_s, а
+      trigram_plan_uses_index показывает, выбрал ли их планировщик),
+      ilike - PostgreSQL без pg_trgm, memory - TrigramIndex;
+    * fallback_index: TrigramIndex в памяти процесса - время
+      построения и время запроса.
+
+Для каждого способа - задержки запросов p50/p95 в миллисекундах
+по набору запросов с опечатками и фрагментами почты. Для замера
+индексного пути нужен PostgreSQL с contrib, например образ
+postgres:15.
+
+Запуск:
+
+    python -m benchmarks.bench_search --users 1000000
+
+Notes:
+    По умолчанию используется тестовая база (DATABASE_TEST_URI),
+    таблицы в ней пересоздаются.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import search
+from app.database.FDataBase import Base, User, USER_COLUMNS, escape_like
+from config import DATABASE_TEST_URI
+
+
+FIRST_NAMES = ("Ivan", "Pyotr", "Sergey", "Anna", "Maria", "Olga", "Dmitry",
+               "Elena", "Nikolay", "Tatiana", "Alexey", "Natalia", "Yuri",
+               "Svetlana", "Mikhail", "Irina", "Andrey", "Ekaterina")
+LAST_NAMES = ("Ivanov", "Petrov", "Sidorov", "Smirnov", "Kuznetsov", "Popov",
+              "Vasiliev", "Sokolov", "Mikhailov", "Novikov", "Fedorov",
+              "Morozov", "Volkov", "Alekseev", "Lebedev", "Semenov")
+DOMAINS = ("mail.ru", "gmail.com", "yandex.ru", "inbox.ru")
+QUERIES = ("Kuznecov", "Mihail", "Sveta", "lebedev7", "novikov12345",
+           "Ekaterina Morozova", "yandex", "olga.sokolova9")
+
+
+def make_user(number: int, rng: random.Random) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {"first_name": first, "last_name": last,
+            "age": rng.randint(18, 80),
+            "salary": float(rng.randint(1000, 300000)),
+            "email": f"{first}.{last}{number}@{rng.choice(DOMAINS)}".lower()}
+
+
+TRIGRAM_INDEXES = [index for index in User.__table__.indexes
+                   if index.name.endswith("_trgm")]
+
+
+async def seed(engine, users: int, chunk: int = 10000) -> None:
+    """Загрузка пользователей без триграммных индексов."""
+    rng = random.Random(7)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for index in TRIGRAM_INDEXES:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    for start in range(0, users, chunk):
+        async with engine.begin() as conn:
+            await conn.execute(User.__table__.insert(), [
+                make_user(number, rng)
+                for number in range(start, min(start + chunk, users))])
+    await analyze(engine)
+
+
+async def analyze(engine) -> None:
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE users"))
+
+
+async def build_trigram_indexes(engine) -> float:
+    """Создание GIN-индексов ix_users_*_trgm, время в секундах."""
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        for index in TRIGRAM_INDEXES:
+            await conn.run_sync(index.create)
+    await analyze(engine)
+    return round(time.perf_counter() - start, 1)
+
+
+async def plan_uses_index(session: AsyncSession, limit: int) -> bool:
+    """Выбирает ли планировщик для search_users индексы *_trgm."""
+    statement = search._trigram_query(QUERIES[0], limit).compile(
+        dialect=session.bind.dialect,
+        compile_kwargs={"literal_binds": True})
+    plan = (await session.execute(text(f"EXPLAIN {statement}"))).scalars()
+    return any("_trgm" in line for line in plan)
+
+
+async def ilike_scan(session: AsyncSession, query: str,
+                     limit: int) -> list:
+    pattern = f"%{escape_like(query)}%"
+    result = await session.execute(
+        select(*USER_COLUMNS).where(or_(
+            *(User.__table__.c[column].ilike(pattern, escape="\\")
+              for column in search.SEARCH_COLUMNS))).limit(limit))
+    return result.all()
+
+
+def summary(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {"p50_ms": round(ordered[len(ordered) // 2], 2),
+            "p95_ms": round(ordered[int(len(ordered) * 0.95)], 2),
+            "mean_ms": round(statistics.fmean(ordered), 2)}
+
+
+async def measure(function, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            await function(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return summary(latencies)
+
+
+async def main(uri: str, users: int, repeat: int, limit: int) -> dict:
+    engine = create_async_engine(uri)
+    factory = sessionmaker(engine, class_=AsyncSession,
+                           expire_on_commit=False)
+    start = time.perf_counter()
+    await seed(engine, users)
+    results = {"users": users,
+               "seed_s": round(time.perf_counter() - start, 1)}
+    async with factory() as session:
+        results["ilike_scan"] = await measure(
+            lambda query: ilike_scan(session, query, limit), repeat)
+        results["search_mode"] = await search._search_mode(session)
+        if results["search_mode"] == "trigram":
+            await session.commit()
+            results["trigram_index_build_s"] = await build_trigram_indexes(
+                engine)
+            results["trigram_plan_uses_index"] = await plan_uses_index(
+                session, limit)
+        results["search_users"] = await measure(
+            lambda query: search.search_users(query, limit, session),
+            repeat)
+        start = time.perf_counter()
+        rows = (await session.execute(select(*USER_COLUMNS))).mappings()
+        index = search.TrigramIndex(rows)
+        results["fallback_build_s"] = round(time.perf_counter() - start, 1)
+
+        async def fallback(query: str) -> list:
+            return index.search(query, limit)
+        results["fallback_index"] = await measure(fallback, repeat)
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--db-uri", default=DATABASE_TEST_URI)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.db_uri, args.users, args.repeat,
+                                      args.limit)), indent=2))
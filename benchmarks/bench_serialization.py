@@ -0,0 +1,123 @@
+"""
+Сравнение чтения и сериализации ответа get_user.
+
+Сравниваются два способа:
+
+    * orm_stdlib: прежний путь - select(User) с созданием ORM-объекта,
+      словарь из атрибутов, jsonable_encoder и JSONResponse (json);
+    * columns_orjson: select(*USER_COLUMNS) по столбцам таблицы, проверка
+      модели ответа UserResponse и FastJSONResponse (orjson).
+
+Для каждого способа отдельно замеряются чтение из базы
+(read_us) и сериализация готового ответа (serialize_us).
+
+Запуск:
+
+    python -m benchmarks.bench_serialization --users 1000 --repeat 5000
+
+Notes:
+    По умолчанию используется тестовая база (DATABASE_TEST_URI),
+    таблицы в ней пересоздаются.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.FDataBase import Base, User, USER_COLUMNS
+from app.models.model import UserResponse
+from app.responses import FastJSONResponse
+from config import DATABASE_TEST_URI
+
+
+async def read_orm(session: AsyncSession, user_id: int) -> dict:
+    result = await session.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    return {"id": user.id, "first_name": user.first_name,
+            "last_name": user.last_name, "age": user.age,
+            "salary": user.salary, "email": user.email}
+
+
+async def read_columns(session: AsyncSession, user_id: int) -> dict:
+    result = await session.execute(
+        select(*USER_COLUMNS).where(User.__table__.c.id == user_id))
+    return result.one_or_none()._asdict()
+
+
+def serialize_stdlib(user: dict) -> bytes:
+    content = jsonable_encoder({"message": user, "status_code": 200})
+    return JSONResponse(content).body
+
+
+def serialize_orjson(user: dict) -> bytes:
+    content = UserResponse.model_validate(
+        {"message": user, "status_code": 200}).model_dump(mode="json")
+    return FastJSONResponse(content).body
+
+
+async def seed(engine, users: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(User.__table__.insert(), [
+            {"first_name": f"Name{i}", "last_name": f"Last{i}", "age": 30,
+             "salary": 1000.0, "email": f"user{i}@mail.ru"}
+            for i in range(users)])
+
+
+async def measure(factory, read, serialize, ids: list[int]) -> dict:
+    """Время чтения и сериализации каждого ответа в микросекундах."""
+    reads, serializations = [], []
+    async with factory() as session:
+        for user_id in ids:
+            start = time.perf_counter()
+            user = await read(session, user_id)
+            middle = time.perf_counter()
+            serialize(user)
+            end = time.perf_counter()
+            reads.append((middle - start) * 10 ** 6)
+            serializations.append((end - middle) * 10 ** 6)
+            session.expunge_all()
+    return {"read_us": summary(reads),
+            "serialize_us": summary(serializations)}
+
+
+def summary(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {"mean": round(statistics.fmean(ordered), 2),
+            "p50": round(ordered[len(ordered) // 2], 2),
+            "p95": round(ordered[int(len(ordered) * 0.95)], 2)}
+
+
+async def main(uri: str, users: int, repeat: int) -> dict:
+    engine = create_async_engine(uri)
+    factory = sessionmaker(engine, class_=AsyncSession,
+                           expire_on_commit=False)
+    await seed(engine, users)
+    ids = [i % users + 1 for i in range(repeat)]
+    await measure(factory, read_columns, serialize_orjson, ids[:100])
+    results = {
+        "orm_stdlib": await measure(factory, read_orm, serialize_stdlib,
+                                    ids),
+        "columns_orjson": await measure(factory, read_columns,
+                                        serialize_orjson, ids),
+    }
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--db-uri", default=DATABASE_TEST_URI)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.db_uri, args.users, args.repeat)),
+                     indent=2))
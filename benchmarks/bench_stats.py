@@ -0,0 +1,100 @@
+"""
+Сравнение статистики зарплат из сводки и по всей таблице.
+
+Сравниваются:
+
+    * on_demand: агрегация по всей таблице users при каждом запросе
+      (в PostgreSQL - percentile_cont, в остальных базах - без
+      процентилей);
+    * summary: get_salary_stats - чтение сводки user_stats;
+    * rebuild_s: полная перестройка сводки (python -m
+      app.database.stats rebuild).
+
+Запуск:
+
+    python -m benchmarks.bench_stats --users 1000000
+
+Notes:
+    По умолчанию используется тестовая база (DATABASE_TEST_URI),
+    таблицы в ней пересоздаются.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.FDataBase import Base, User
+from app.database.stats import get_salary_stats, rebuild_stats
+from config import DATABASE_TEST_URI, USER_STATS_AGE_BUCKET
+
+
+async def seed(engine, users: int, chunk: int = 10000) -> None:
+    rng = random.Random(3)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    for start in range(0, users, chunk):
+        async with engine.begin() as conn:
+            await conn.execute(User.__table__.insert(), [
+                {"first_name": "Name", "last_name": "Last",
+                 "age": rng.randint(18, 80),
+                 "salary": round(rng.lognormvariate(11, 0.6), 2),
+                 "email": f"user{number}@mail.ru"}
+                for number in range(start, min(start + chunk, users))])
+
+
+async def on_demand(session: AsyncSession) -> list:
+    bucket = func.floor(User.age / USER_STATS_AGE_BUCKET)
+    columns = [bucket, func.count(), func.avg(User.salary),
+               func.min(User.salary), func.max(User.salary)]
+    if session.bind.dialect.name == "postgresql":
+        columns += [func.percentile_cont(rank).within_group(User.salary)
+                    for rank in (0.5, 0.9, 0.99)]
+    result = await session.execute(
+        select(*columns).group_by(bucket).order_by(bucket))
+    return result.all()
+
+
+async def measure(function, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await function()
+        latencies.append((time.perf_counter() - start) * 1000)
+    ordered = sorted(latencies)
+    return {"p50_ms": round(ordered[len(ordered) // 2], 2),
+            "mean_ms": round(statistics.fmean(ordered), 2)}
+
+
+async def main(uri: str, users: int, repeat: int) -> dict:
+    engine = create_async_engine(uri)
+    factory = sessionmaker(engine, class_=AsyncSession,
+                           expire_on_commit=False)
+    await seed(engine, users)
+    results = {"users": users}
+    async with factory() as session:
+        start = time.perf_counter()
+        await rebuild_stats(session)
+        results["rebuild_s"] = round(time.perf_counter() - start, 2)
+        results["on_demand"] = await measure(
+            lambda: on_demand(session), repeat)
+        results["summary"] = await measure(
+            lambda: get_salary_stats(session), repeat)
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--db-uri", default=DATABASE_TEST_URI)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.db_uri, args.users, args.repeat)),
+                     indent=2))
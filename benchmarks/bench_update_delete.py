@@ -0,0 +1,120 @@
+"""
+Сравнение задержки изменения и удаления пользователя.
+
+Сравниваются два способа:
+
+    * select_then_write: прежний путь - SELECT пользователя,
+      изменение ORM-объекта (session.delete) и commit;
+    * single_statement: UPDATE/DELETE ... RETURNING одним запросом
+      (update_user_info и delete_one_user).
+
+Запуск:
+
+    python -m benchmarks.bench_update_delete --users 2000 --repeat 500
+
+Notes:
+    По умолчанию используется тестовая база (DATABASE_TEST_URI),
+    таблицы в ней пересоздаются.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.FDataBase import (Base, User, update_user_info,
+                                    delete_one_user)
+from config import DATABASE_TEST_URI
+
+
+async def legacy_update(session: AsyncSession, user_id: int,
+                        salary: float) -> None:
+    result = await session.execute(select(User).filter_by(id=user_id))
+    user = result.scalar_one_or_none()
+    user.salary = salary
+    await session.commit()
+
+
+async def legacy_delete(session: AsyncSession, user_id: int) -> None:
+    result = await session.execute(select(User).filter_by(id=user_id))
+    await session.delete(result.scalar_one_or_none())
+    await session.commit()
+
+
+async def single_update(session: AsyncSession, user_id: int,
+                        salary: float) -> None:
+    await update_user_info(user_id=user_id, salary=salary, session=session)
+
+
+async def single_delete(session: AsyncSession, user_id: int) -> None:
+    await delete_one_user(user_id=user_id, session=session)
+
+
+async def seed(engine, users: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(User.__table__.insert(), [
+            {"first_name": f"Name{i}", "last_name": f"Last{i}", "age": 30,
+             "salary": 1000.0, "email": f"user{i}@mail.ru"}
+            for i in range(users)])
+
+
+async def measure(factory, operation, ids: list[int], *args) -> list[float]:
+    """Задержка каждой операции в миллисекундах (новая сессия на вызов)."""
+    latencies = []
+    for user_id in ids:
+        async with factory() as session:
+            start = time.perf_counter()
+            await operation(session, user_id, *args)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summary(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {"count": len(ordered),
+            "mean_ms": round(statistics.fmean(ordered), 3),
+            "p50_ms": round(ordered[len(ordered) // 2], 3),
+            "p95_ms": round(ordered[int(len(ordered) * 0.95)], 3)}
+
+
+async def main(uri: str, users: int, repeat: int) -> dict:
+    engine = create_async_engine(uri)
+    factory = sessionmaker(engine, class_=AsyncSession,
+                           expire_on_commit=False)
+    await seed(engine, users)
+    update_ids = [i % users + 1 for i in range(repeat)]
+    results = {
+        "update": {
+            "select_then_write": summary(await measure(
+                factory, legacy_update, update_ids, 2000.0)),
+            "single_statement": summary(await measure(
+                factory, single_update, update_ids, 3000.0)),
+        },
+        "delete": {
+            "select_then_write": summary(await measure(
+                factory, legacy_delete, list(range(1, repeat + 1)))),
+            "single_statement": summary(await measure(
+                factory, single_delete,
+                list(range(repeat + 1, 2 * repeat + 1)))),
+        },
+    }
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--db-uri", default=DATABASE_TEST_URI)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    if args.users < 2 * args.repeat:
+        parser.error("--users должно быть не меньше 2 * --repeat")
+    print(json.dumps(asyncio.run(main(args.db_uri, args.users, args.repeat)),
+                     indent=2))
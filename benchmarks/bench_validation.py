@@ -0,0 +1,79 @@
+"""
+Сравнение стоимости проверки пользователя.
+
+Сравниваются:
+
+    * python_validators: прежняя модель с семью field_validator
+      на Python (_UserInfoChecks);
+    * user_info: UserInfo - ограничения pydantic-core и повторная
+      проверка на Python только для отклонённых данных;
+    * user_fields: UserFields - только ограничения pydantic-core;
+    * batch_*: пачка строк через _UserInfoChecks по одной
+      и через validate_users (TypeAdapter по списку UserFields).
+
+Результат - время на один объект в микросекундах для корректных
+данных и для пачки с долей --invalid некорректных строк.
+
+Запуск:
+
+    python -m benchmarks.bench_validation --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import timeit
+
+from pydantic import ValidationError
+
+from app.models.model import (UserFields, UserInfo, _UserInfoChecks,
+                              validate_users)
+
+
+def make_rows(rows: int, invalid: float) -> list[dict]:
+    every = round(1 / invalid) if invalid else 0
+    return [{"first_name": "Ka" if every and i % every == 0 else f"Name{i}",
+             "last_name": f"Last{i}", "age": 18 + i % 60,
+             "salary": 1000.0 + i, "email": f"user{i}@mail.ru"}
+            for i in range(rows)]
+
+
+def validate_one_by_one(rows: list[dict]) -> None:
+    for row in rows:
+        try:
+            _UserInfoChecks.model_validate(row)
+        except ValidationError:
+            pass
+
+
+def per_object(function, rows: int, repeat: int) -> float:
+    """Лучшее из пяти замеров, микросекунд на один объект."""
+    best = min(timeit.repeat(function, number=repeat, repeat=5))
+    return round(best / repeat / rows * 10 ** 6, 3)
+
+
+def main(rows: int, repeat: int, invalid: float) -> dict:
+    user = make_rows(1, 0)[0]
+    valid_rows = make_rows(rows, 0)
+    mixed_rows = make_rows(rows, invalid)
+    results = {"single": {}, "batch_valid": {}, "batch_mixed": {}}
+    for name, model in (("python_validators", _UserInfoChecks),
+                        ("user_info", UserInfo),
+                        ("user_fields", UserFields)):
+        results["single"][name] = per_object(
+            lambda: model.model_validate(user), 1, repeat * rows)
+    for key, data in (("batch_valid", valid_rows),
+                      ("batch_mixed", mixed_rows)):
+        results[key]["python_validators"] = per_object(
+            lambda: validate_one_by_one(data), rows, repeat)
+        results[key]["validate_users"] = per_object(
+            lambda: validate_users(data), rows, repeat)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--invalid", type=float, default=0.1,
+                        help="доля некорректных строк в пачке")
+    args = parser.parse_args()
+    print(json.dumps(main(args.rows, args.repeat, args.invalid), indent=2))
@@ -8,12 +8,136 @@ Args:
     DB_PASS: Пароль пользователя PostgreSQL
     DB_HOST: Хост базы данных
     DB_NAME: Название базы данных PostgreSQL
+    DATABASE_URI: Полный адрес базы, заменяет DB_* (например,
+        sqlite+aiosqlite:///bench.db для бенчмарков)
+
+    * Реплики для чтения:
+    DATABASE_REPLICA_URIS: Адреса реплик через запятую (пусто - без реплик)
+    REPLICA_SELECTION: Выбор реплики: round_robin или least_busy
+    REPLICA_HEALTH_INTERVAL: Интервал проверки реплик в секундах
+    REPLICA_HEALTH_TIMEOUT: Время ожидания ответа реплики в секундах
+    READ_YOUR_WRITES_SECONDS: Сколько секунд после записи клиент читает
+        с основной базы (0 - выкл.)
 
     * Подключение к тестовой базе:
     TEST_DB_USER: Пользователь PostgreSQL
     TEST_DB_PASS: Пароль пользователя PostgreSQL
     TEST_DB_HOST: Хост базы данных
     TEST_DB_NAME: Название базы данных PostgreSQL
+    DATABASE_TEST_URI: Полный адрес тестовой базы, заменяет TEST_DB_*
+
+    * Пул соединений:
+    POOL_SIZE: Количество постоянных соединений
+    POOL_MAX_OVERFLOW: Количество дополнительных соединений сверх POOL_SIZE
+    POOL_TIMEOUT: Время ожидания свободного соединения в секундах
+    POOL_RECYCLE: Время жизни соединения в секундах (-1 - без ограничения)
+    POOL_PRE_PING: Проверка соединения перед выдачей (1/true/yes)
+    PREPARED_STATEMENT_CACHE_SIZE: Размер кэша подготовленных
+        выражений asyncpg на одно соединение
+
+    * Журналирование:
+    LOG_LEVEL: Уровень журналирования (DEBUG, INFO, WARNING, ...)
+    LOG_FILE: Файл журнала ("-" - stderr)
+    LOG_PER_PROCESS: Свой файл журнала у каждого процесса: к имени
+        LOG_FILE добавляется PID (1/true/yes); python -m app.serve
+        включает его, если воркеров больше одного
+    LOG_FORMAT: Формат записей: json или text
+    LOG_MAX_BYTES: Размер файла журнала, после которого он ротируется
+    LOG_BACKUP_COUNT: Количество хранимых старых файлов журнала
+    LOG_QUEUE_SIZE: Размер очереди записей, сверх него записи отбрасываются
+    LOG_SAMPLE_RATE: В журнал попадает одна из N частых записей
+
+    * Профилирование:
+    SLOW_QUERY_MS: Порог журнала медленных SQL-запросов в мс (0 - выкл.)
+    SLOW_QUERY_EXPLAIN: Добавлять план запроса в журнал (0/false/no - нет)
+    PROFILE_ENABLED: Профилирование обработчиков /user (1/true/yes)
+    PROFILE_HEADER: Заголовок запроса, включающий профилирование
+    PROFILE_SAMPLE_RATE: Доля запросов, профилируемых без заголовка
+    PROFILE_DIR: Каталог для профилей в формате pstats
+
+    * Метрики:
+    METRICS_ENABLED: Замер запросов и SQL для /metrics (0/false/no - выкл.)
+
+    * Пакетная загрузка пользователей:
+    BULK_BATCH_SIZE: Количество строк в одной транзакции
+
+    * Отложенная запись пользователей (POST /user/add_user):
+    WRITE_BEHIND_ENABLED: Ставить пользователей в очередь и отвечать 202
+        (1/true/yes)
+    WRITE_BEHIND_QUEUE_SIZE: Размер очереди, сверх него ответ 429
+    WRITE_BEHIND_BATCH_SIZE: Максимум пользователей в одной вставке
+    WRITE_BEHIND_FLUSH_INTERVAL: Сколько секунд ждать наполнения пачки
+    WRITE_BEHIND_TICKET_TTL: Сколько секунд хранить статус заявки
+    WRITE_BEHIND_DRAIN_TIMEOUT: Время на запись очереди при остановке
+
+    * Пакетное чтение пользователей:
+    BATCH_READ_CHUNK: Количество ID в одном запросе к базе
+    BATCH_READ_MAX_IDS: Максимальное количество ID в одном HTTP-запросе
+
+    * Постраничный список пользователей:
+    LIST_PAGE_SIZE: Размер страницы по умолчанию
+    LIST_PAGE_MAX: Максимальный размер страницы
+
+    * Сводка по возрасту и зарплате (GET /user/salary_stats):
+    USER_STATS_ENABLED: Вести сводку user_stats при записи
+        (по умолчанию включено, 0/false/no - выключить)
+    USER_STATS_AGE_BUCKET: Ширина корзины возраста в годах
+    USER_STATS_SALARY_BUCKETS: Корзин зарплаты на десятичный порядок
+        (точность процентилей); после изменения корзин нужна
+        перестройка: python -m app.database.stats rebuild
+    USER_STATS_MAX_STALENESS: Через сколько секунд после отметки
+        сводки устаревшей она перестраивается полностью
+
+    * Поиск пользователей:
+    SEARCH_LIMIT: Количество результатов по умолчанию
+    SEARCH_MAX_LIMIT: Максимальное количество результатов
+
+    * Выгрузка пользователей:
+    EXPORT_CHUNK_ROWS: Количество строк в одной порции выгрузки
+
+    * Кэш пользователей:
+    USER_CACHE_ENABLED: Включение кэша (1/true/yes)
+    USER_CACHE_BACKEND: Хранилище кэша: memory (в процессе) или redis
+    REDIS_URL: Адрес Redis для USER_CACHE_BACKEND=redis
+    USER_CACHE_SIZE: Максимальное количество записей
+    USER_CACHE_TTL: Время жизни записи в секундах
+    USER_CACHE_NEGATIVE_TTL: Время жизни записи об отсутствующем пользователе
+
+    * Контроль нагрузки на обработчики /user:
+    ADMISSION_ENABLED: Ограничение одновременных запросов и отказ 503
+        при перегрузке базы (1/true/yes)
+    ADMISSION_READ_LIMIT: Одновременных запросов на чтение (GET, HEAD)
+    ADMISSION_WRITE_LIMIT: Одновременных запросов на запись (меньше
+        размера пула, чтобы чтение не ждало соединений за записью)
+    ADMISSION_ROUTE_LIMITS: Ограничения отдельных маршрутов через
+        запятую, например "GET /user/export_users=2,PUT /user/upsert_users=1"
+    ADMISSION_QUEUE_SIZE: Сколько запросов ждёт свободного места в
+        очереди чтения или записи, сверх него - отказ 503
+    ADMISSION_QUEUE_TIMEOUT: Сколько секунд запрос ждёт в очереди
+    ADMISSION_MAX_POOL_WAITING: Отказ, если столько запросов уже ждут
+        соединения пула
+    ADMISSION_MAX_POOL_WAIT: Отказ, если соединения пула ждут дольше
+        стольких секунд
+    ADMISSION_RETRY_AFTER: Значение Retry-After в ответе 503 (секунды)
+
+    * Запуск приложения:
+    STARTUP_SCHEMA_MODE: create - создать недостающие таблицы,
+        verify - сверить ревизию alembic с последней миграцией,
+        skip - не проверять схему
+    STARTUP_WARMUP_CONNECTIONS: Сколько соединений пула открыть
+        и прогреть до готовности (0 - без прогрева)
+    READY_CHECK_TIMEOUT: Время ожидания ответа базы в /service/ready
+
+    * Запуск сервера (python -m app.serve):
+    SERVER_HOST: Адрес, на котором слушает сервер
+    SERVER_PORT: Порт сервера
+    WEB_CONCURRENCY: Количество процессов-воркеров (по умолчанию по
+        числу CPU)
+    SERVER_BACKLOG: Размер очереди входящих соединений
+    SERVER_KEEPALIVE: Сколько секунд держать keep-alive соединение
+    SERVER_GRACEFUL_TIMEOUT: Время на завершение запросов при остановке
+    SERVER_MAX_REQUESTS: Перезапуск воркера после стольких запросов
+        (0 - без перезапуска)
 
 Notes:
     Достаёт переменные из окружения.
@@ -31,7 +155,20 @@ DB_PASS = os.environ.get("DB_PASS")
 DB_HOST = os.environ.get("DB_HOST")
 DB_NAME = os.environ.get("DB_NAME")
 
-DATABASE_URI = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
+DATABASE_URI = (
+    os.environ.get("DATABASE_URI")
+    or f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}")
+
+# Реплики для чтения
+DATABASE_REPLICA_URIS = [
+    uri.strip()
+    for uri in os.environ.get("DATABASE_REPLICA_URIS", "").split(",")
+    if uri.strip()]
+REPLICA_SELECTION = os.environ.get("REPLICA_SELECTION", "round_robin")
+REPLICA_HEALTH_INTERVAL = float(os.environ.get("REPLICA_HEALTH_INTERVAL", 5))
+REPLICA_HEALTH_TIMEOUT = float(os.environ.get("REPLICA_HEALTH_TIMEOUT", 2))
+READ_YOUR_WRITES_SECONDS = float(
+    os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
 
 # Подключение к тестовой базе данных
 TEST_DB_USER = os.environ.get("TEST_DB_USER")
@@ -39,4 +176,125 @@ TEST_DB_PASS = os.environ.get("TEST_DB_PASS")
 TEST_DB_HOST = os.environ.get("TEST_DB_HOST")
 TEST_DB_NAME = os.environ.get("TEST_DB_NAME")
 
-DATABASE_TEST_URI = f"postgresql+asyncpg://{TEST_DB_USER}:{TEST_DB_PASS}@{TEST_DB_HOST}/{TEST_DB_NAME}"  # noqa: E501
+DATABASE_TEST_URI = (
+    os.environ.get("DATABASE_TEST_URI")
+    or f"postgresql+asyncpg://{TEST_DB_USER}:{TEST_DB_PASS}@{TEST_DB_HOST}/{TEST_DB_NAME}")  # noqa: E501
+
+# Пул соединений
+POOL_SIZE = int(os.environ.get("POOL_SIZE", 5))
+POOL_MAX_OVERFLOW = int(os.environ.get("POOL_MAX_OVERFLOW", 10))
+POOL_TIMEOUT = float(os.environ.get("POOL_TIMEOUT", 30))
+POOL_RECYCLE = int(os.environ.get("POOL_RECYCLE", -1))
+POOL_PRE_PING = os.environ.get(
+    "POOL_PRE_PING", "").lower() in ("1", "true", "yes")
+PREPARED_STATEMENT_CACHE_SIZE = int(
+    os.environ.get("PREPARED_STATEMENT_CACHE_SIZE", 100))
+
+# Журналирование
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.environ.get("LOG_FILE", "project.log")
+LOG_PER_PROCESS = os.environ.get(
+    "LOG_PER_PROCESS", "").lower() in ("1", "true", "yes")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+LOG_SAMPLE_RATE = int(os.environ.get("LOG_SAMPLE_RATE", 100))
+
+# Профилирование
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 0))
+SLOW_QUERY_EXPLAIN = os.environ.get(
+    "SLOW_QUERY_EXPLAIN", "true").lower() not in ("0", "false", "no")
+PROFILE_ENABLED = os.environ.get(
+    "PROFILE_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "X-Profile")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Метрики
+METRICS_ENABLED = os.environ.get(
+    "METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Пакетная загрузка пользователей
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", 1000))
+
+# Отложенная запись пользователей
+WRITE_BEHIND_ENABLED = os.environ.get(
+    "WRITE_BEHIND_ENABLED", "").lower() in ("1", "true", "yes")
+WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", 10000))
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", 500))
+WRITE_BEHIND_FLUSH_INTERVAL = float(
+    os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", 0.05))
+WRITE_BEHIND_TICKET_TTL = float(
+    os.environ.get("WRITE_BEHIND_TICKET_TTL", 300))
+WRITE_BEHIND_DRAIN_TIMEOUT = float(
+    os.environ.get("WRITE_BEHIND_DRAIN_TIMEOUT", 30))
+
+# Пакетное чтение пользователей
+BATCH_READ_CHUNK = int(os.environ.get("BATCH_READ_CHUNK", 1000))
+BATCH_READ_MAX_IDS = int(os.environ.get("BATCH_READ_MAX_IDS", 10000))
+
+# Постраничный список пользователей
+LIST_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", 100))
+LIST_PAGE_MAX = int(os.environ.get("LIST_PAGE_MAX", 1000))
+
+# Сводка по возрасту и зарплате
+USER_STATS_ENABLED = os.environ.get(
+    "USER_STATS_ENABLED", "true").lower() not in ("0", "false", "no")
+USER_STATS_AGE_BUCKET = int(os.environ.get("USER_STATS_AGE_BUCKET", 10))
+USER_STATS_SALARY_BUCKETS = int(
+    os.environ.get("USER_STATS_SALARY_BUCKETS", 50))
+USER_STATS_MAX_STALENESS = float(
+    os.environ.get("USER_STATS_MAX_STALENESS", 60))
+
+# Поиск пользователей
+SEARCH_LIMIT = int(os.environ.get("SEARCH_LIMIT", 20))
+SEARCH_MAX_LIMIT = int(os.environ.get("SEARCH_MAX_LIMIT", 100))
+
+# Выгрузка пользователей
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 1000))
+
+# Кэш пользователей
+USER_CACHE_ENABLED = os.environ.get(
+    "USER_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+USER_CACHE_BACKEND = os.environ.get("USER_CACHE_BACKEND", "memory")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 60))
+USER_CACHE_NEGATIVE_TTL = float(os.environ.get("USER_CACHE_NEGATIVE_TTL", 5))
+
+# Контроль нагрузки на обработчики /user
+ADMISSION_ENABLED = os.environ.get(
+    "ADMISSION_ENABLED", "").lower() in ("1", "true", "yes")
+ADMISSION_READ_LIMIT = int(
+    os.environ.get("ADMISSION_READ_LIMIT", POOL_SIZE + POOL_MAX_OVERFLOW))
+ADMISSION_WRITE_LIMIT = int(os.environ.get("ADMISSION_WRITE_LIMIT", POOL_SIZE))
+ADMISSION_ROUTE_LIMITS = {
+    route.strip(): int(limit)
+    for route, _, limit in (
+        item.rpartition("=")
+        for item in os.environ.get("ADMISSION_ROUTE_LIMITS", "").split(",")
+        if item.strip())}
+ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", 100))
+ADMISSION_QUEUE_TIMEOUT = float(
+    os.environ.get("ADMISSION_QUEUE_TIMEOUT", 1))
+ADMISSION_MAX_POOL_WAITING = int(
+    os.environ.get("ADMISSION_MAX_POOL_WAITING", POOL_SIZE))
+ADMISSION_MAX_POOL_WAIT = float(
+    os.environ.get("ADMISSION_MAX_POOL_WAIT", 0.5))
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", 1))
+
+# Запуск приложения
+STARTUP_SCHEMA_MODE = os.environ.get("STARTUP_SCHEMA_MODE", "create")
+STARTUP_WARMUP_CONNECTIONS = int(
+    os.environ.get("STARTUP_WARMUP_CONNECTIONS", POOL_SIZE))
+READY_CHECK_TIMEOUT = float(os.environ.get("READY_CHECK_TIMEOUT", 2))
+
+# Запуск сервера
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+SERVER_BACKLOG = int(os.environ.get("SERVER_BACKLOG", 2048))
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 0))
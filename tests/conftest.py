@@ -5,7 +5,9 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from config import DATABASE_TEST_URI
-from app.database.FDataBase import Base, get_session, User
+from app.database.FDataBase import (Base, get_session, get_session_factory,
+                                    User)
+from app.database.cache import user_cache
 from app.main import app
 
 
@@ -39,8 +41,10 @@ async def db_override_get_db(db_session):
         yield db_session
 
     app.dependency_overrides[get_session] = _get_test_db
+    app.dependency_overrides[get_session_factory] = lambda: test_async_session
     yield
     app.dependency_overrides[get_session] = None
+    app.dependency_overrides[get_session_factory] = None
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -71,3 +75,14 @@ async def add_data_to_db(db_session):
     for user in users:
         await db_session.delete(user)
     await db_session.commit()
+
+
+@pytest_asyncio.fixture(scope="function")
+async def enabled_user_cache():
+    """Фикстура, включает пустой кэш пользователей на время теста."""
+    enabled = user_cache.enabled
+    await user_cache.clear()
+    user_cache.enabled = True
+    yield user_cache
+    user_cache.enabled = enabled
+    await user_cache.clear()
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app import admission as admission_module
+from app.admission import (AdmissionControl, AdmissionMiddleware,
+                           ConcurrencyLimiter, Overloaded)
+from app.database.FDataBase import engine
+
+
+@pytest.mark.asyncio
+async def test_limiter_queue() -> None:
+    """Тестирование очереди, её переполнения и таймаута."""
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1)
+    await limiter.acquire(timeout=1)
+    waiting = asyncio.create_task(limiter.acquire(timeout=1))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded) as ex:
+        await limiter.acquire(timeout=1)
+    assert ex.value.reason == "queue_full"
+
+    limiter.release()
+    await waiting
+    assert limiter.active == 1
+    with pytest.raises(Overloaded) as ex:
+        await limiter.acquire(timeout=0.01)
+    assert ex.value.reason == "queue_timeout"
+    limiter.release()
+    assert limiter.stats() == {"limit": 1, "active": 0, "waiting": 0,
+                               "admitted": 2, "queued": 2, "rejected": 1,
+                               "timeouts": 1}
+
+
+@pytest.mark.asyncio
+async def test_limiter_cancelled_waiter() -> None:
+    """Тестирование отмены ожидающего запроса."""
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1)
+    await limiter.acquire(timeout=1)
+    waiting = asyncio.create_task(limiter.acquire(timeout=1))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    limiter.release()
+    assert limiter.stats()["active"] == limiter.stats()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_pressure(monkeypatch) -> None:
+    """Тестирование отказа при перегрузке пула."""
+    control = AdmissionControl(max_pool_waiting=3, max_pool_wait=0.5)
+    assert control.pool_pressure(engine.pool) is None
+    monkeypatch.setattr(engine.pool.metrics, "waiting", 3)
+    assert control.pool_pressure(engine.pool) == "pool_waiting"
+    monkeypatch.setattr(engine.pool.metrics, "waiting", 0)
+    monkeypatch.setitem(engine.pool.metrics.waiting_since, -1, 0.0)
+    assert control.pool_pressure(engine.pool) == "pool_wait"
+    with pytest.raises(Overloaded):
+        async with control.slot("GET", "/user/get_user/{user_id}"):
+            pass
+    assert control.budgets["read"].active == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_budgets(monkeypatch) -> None:
+    """Тестирование отдельных бюджетов чтения и записи и ответа 503."""
+    control = AdmissionControl(read_limit=5, write_limit=1,
+                               route_limits={"GET /slow": 1},
+                               queue_size=0, queue_timeout=1)
+    monkeypatch.setattr(admission_module, "admission", control)
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.api_route("/slow", methods=["GET", "POST"])
+    async def slow() -> dict:
+        await release.wait()
+        return {"message": "ok", "status_code": 200}
+
+    @app.get("/fast")
+    async def fast() -> dict:
+        return {"message": "ok", "status_code": 200}
+
+    app.add_middleware(AdmissionMiddleware, routes=app.routes)
+
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url="http://test") as client:
+        writing = asyncio.create_task(client.post("/slow"))
+        reading = asyncio.create_task(client.get("/slow"))
+        while (control.budgets["write"].active == 0
+               or control.routes["GET /slow"].active == 0):
+            await asyncio.sleep(0.001)
+
+        response = await client.post("/slow")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert response.json()["status_code"] == 503
+        response = await client.get("/slow")
+        assert response.status_code == 503
+        response = await client.get("/fast")
+        assert response.status_code == 200
+
+        release.set()
+        assert (await writing).status_code == 200
+        assert (await reading).status_code == 200
+    stats = control.stats()
+    assert stats["write"]["rejected"] == stats["routes"]["GET /slow"][
+        "rejected"] == 1
+    assert stats["read"]["active"] == stats["write"]["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_streaming(monkeypatch) -> None:
+    """Тестирование: место занято, пока отправляется потоковое тело."""
+    control = AdmissionControl(route_limits={"GET /export/{kind}": 1},
+                               queue_size=0, queue_timeout=1)
+    monkeypatch.setattr(admission_module, "admission", control)
+    streaming, release = asyncio.Event(), asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/export/{kind}")
+    async def export(kind: str) -> StreamingResponse:
+        async def body():
+            yield b"first\n"
+            streaming.set()
+            await release.wait()
+            yield b"last\n"
+        return StreamingResponse(body())
+
+    app.add_middleware(AdmissionMiddleware, routes=app.routes)
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url="http://test") as client:
+        exporting = asyncio.create_task(client.get("/export/users"))
+        await streaming.wait()
+        response = await client.get("/export/users")
+        assert response.status_code == 503
+        release.set()
+        response = await exporting
+        assert response.status_code == 200
+        assert response.text == "first\nlast\n"
+    assert control.stats()["routes"]["GET /export/{kind}"] == {
+        "limit": 1, "active": 0, "waiting": 0, "admitted": 1, "queued": 0,
+        "rejected": 1, "timeouts": 0}
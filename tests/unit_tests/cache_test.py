@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.database.cache import CACHE_MISS, MemoryCache, RedisCache
+
+
+@pytest.mark.asyncio
+async def test_cache_lru_eviction() -> None:
+    """Тестирование вытеснения самой давно использованной записи."""
+    cache = MemoryCache(max_size=2, ttl=60, negative_ttl=1)
+    await cache.set(1, "one")
+    await cache.set(2, "two")
+    assert await cache.get(1) == "one"
+    await cache.set(3, "three")
+    assert await cache.get(2) is CACHE_MISS
+    assert await cache.get(1) == "one"
+    assert await cache.get(3) == "three"
+    stats = await cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl() -> None:
+    """Тестирование устаревания записей."""
+    cache = MemoryCache(max_size=10, ttl=60, negative_ttl=0.01)
+    await cache.set(1, "one")
+    await cache.set(2, "нет", ttl=cache.negative_ttl)
+    await asyncio.sleep(0.02)
+    assert await cache.get(1) == "one"
+    assert await cache.get(2) is CACHE_MISS
+    assert (await cache.stats())["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_disabled() -> None:
+    """Тестирование выключенного кэша."""
+    cache = MemoryCache(max_size=10, ttl=60, negative_ttl=1, enabled=False)
+    await cache.set(1, "one")
+    assert await cache.get(1) is CACHE_MISS
+    assert (await cache.stats())["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_shared_between_workers() -> None:
+    """Тестирование общего кэша в Redis для двух воркеров."""
+    server = FakeServer()
+    worker_1 = RedisCache(FakeAsyncRedis(server=server), ttl=60,
+                          negative_ttl=0.01)
+    worker_2 = RedisCache(FakeAsyncRedis(server=server), ttl=60,
+                          negative_ttl=0.01)
+
+    await worker_1.set(1, {"id": 1, "email": "jack_niklson@gmail.com"})
+    assert (await worker_2.get(1))["email"] == "jack_niklson@gmail.com"
+
+    await worker_2.invalidate(1)
+    assert await worker_1.get(1) is CACHE_MISS
+
+    await worker_1.set(2, "Пользователя нет в базе!",
+                       ttl=worker_1.negative_ttl)
+    assert await worker_2.get(2) == "Пользователя нет в базе!"
+    await asyncio.sleep(0.05)
+    assert await worker_2.get(2) is CACHE_MISS
+
+    assert (await worker_1.stats())["misses"] == 1
+    assert (await worker_2.stats())["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_generation() -> None:
+    """Тестирование отказа от записи, сброшенной другим воркером."""
+    server = FakeServer()
+    worker_1 = RedisCache(FakeAsyncRedis(server=server), ttl=60,
+                          negative_ttl=1)
+    worker_2 = RedisCache(FakeAsyncRedis(server=server), ttl=60,
+                          negative_ttl=1)
+
+    # worker_1 начал чтение версии 1, worker_2 записал версию 2.
+    generation = await worker_1.generation(1)
+    await worker_2.invalidate(1)
+    await worker_1.set(1, {"version": 1}, generation=generation)
+    assert await worker_2.get(1) is CACHE_MISS
+
+    generation = await worker_1.generation(1)
+    await worker_1.set(1, {"version": 2}, generation=generation)
+    assert await worker_2.get(1) == {"version": 2}
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_unavailable() -> None:
+    """Тестирование работы кэша при недоступном Redis."""
+    server = FakeServer()
+    cache = RedisCache(FakeAsyncRedis(server=server), ttl=60,
+                       negative_ttl=1)
+    server.connected = False
+    await cache.clear()
+    await cache.set(1, "one")
+    assert await cache.get(1) is CACHE_MISS
+    await cache.invalidate(1)
+    assert (await cache.stats())["errors"] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_user_cached(client, add_data_to_db,
+                               enabled_user_cache) -> None:
+    """Тестирование кэширования и инвалидации при изменении."""
+    await client.get("/user/get_user/1")
+    await client.get("/user/get_user/1")
+    await client.get("/user/get_user/999")
+    await client.get("/user/get_user/999")
+    stats = (await client.get("/service/cache_stats")).json()['message']
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+
+    await client.put("/user/update_user/1", json={
+        "first_name": "Karl", "last_name": "Nilson", "age": 25,
+        "salary": 20000, "email": "karl_little_cat@gmail.com"})
+    response = await client.get("/user/get_user/1")
+    assert response.json()['message']['email'] == "karl_little_cat@gmail.com"
+
+    await client.delete("/user/delete_user/1")
+    response = await client.get("/user/get_user/1")
+    assert response.json()['status_code'] == 404
+
+
+@pytest.mark.asyncio
+async def test_add_users_invalidates_cache(client, add_data_to_db,
+                                           enabled_user_cache) -> None:
+    """Тестирование сброса кэша "нет в базе" при пакетном добавлении."""
+    for user_id in range(3, 10):
+        response = await client.get(f"/user/get_user/{user_id}")
+        assert response.json()['status_code'] == 404
+
+    await client.post("/user/add_users", json=[
+        {"first_name": "Mikle", "last_name": "Karlson", "age": 27,
+         "salary": 10000, "email": "mikle_little_cat@gmail.com"}])
+    # Пачка с занятым email вставляется построчно.
+    await client.post("/user/add_users", json=[
+        {"first_name": "Karl", "last_name": "Nilson", "age": 25,
+         "salary": 20000, "email": "karl_little_cat@gmail.com"},
+        {"first_name": "Karl", "last_name": "Nilson", "age": 25,
+         "salary": 20000, "email": "mikle_little_cat@gmail.com"}])
+
+    response = await client.get("/user/list_users")
+    users = response.json()['message']['users']
+    assert len(users) == 4
+    for user in users:
+        response = await client.get(f"/user/get_user/{user['id']}")
+        assert response.json()['message']['email'] == user['email']
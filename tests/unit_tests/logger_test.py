@@ -0,0 +1,77 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+from app.logger import (JsonFormatter, NonBlockingQueueHandler,
+                        SamplingFilter, log_handler)
+
+
+def make_record(msg: str, *args, **extra) -> logging.LogRecord:
+    record = logging.makeLogRecord(
+        {"name": "test", "levelno": logging.INFO, "levelname": "INFO",
+         "msg": msg, "args": args})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter() -> None:
+    """Тестирование записи в формате JSON с полями из extra."""
+    line = JsonFormatter().format(
+        make_record("Пользователь ID: %s", 7, user_id=7))
+    data = json.loads(line)
+    assert data["message"] == "Пользователь ID: 7"
+    assert data["level"] == "INFO"
+    assert data["user_id"] == 7
+
+
+def test_sampling_filter() -> None:
+    """Тестирование прореживания помеченных записей."""
+    sampling = SamplingFilter(rate=10)
+    passed = [sampling.filter(make_record("Нет ID: %s", n, sample=True))
+              for n in range(25)]
+    assert passed.count(True) == 3
+    assert all(sampling.filter(make_record("Обычная запись"))
+               for _ in range(5))
+
+
+def test_queue_handler_does_not_block() -> None:
+    """Тестирование отбрасывания записей при полной очереди."""
+    handler = NonBlockingQueueHandler(queue.Queue(2))
+    for n in range(5):
+        handler.handle(make_record("Запись %s", n))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert handler.queue.get().msg == "Запись 0"
+
+
+def test_logging_pipeline(tmp_path) -> None:
+    """Тестирование записи в файл через поток QueueListener."""
+    handler = NonBlockingQueueHandler(queue.Queue(100))
+    file_handler = logging.FileHandler(tmp_path / "test.log",
+                                       encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(handler.queue, file_handler)
+    logger = logging.getLogger("tests.logger_pipeline")
+    logger.addHandler(handler)
+    listener.start()
+    try:
+        logger.warning("Ошибка %s", "чтения")
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+        file_handler.close()
+    lines = (tmp_path / "test.log").read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["message"] == "Ошибка чтения"
+
+
+def test_log_handler(tmp_path) -> None:
+    """Тестирование файла журнала процесса и вывода в stderr."""
+    handler = log_handler(str(tmp_path / "project.log"), per_process=True)
+    handler.close()
+    assert handler.baseFilename == str(
+        tmp_path / f"project.{os.getpid()}.log")
+    assert isinstance(handler, logging.handlers.RotatingFileHandler)
+    assert log_handler("-").stream is sys.stderr
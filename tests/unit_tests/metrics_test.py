@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import text
+
+from app import metrics
+from app.database.pool import build_engine
+from config import DATABASE_TEST_URI
+
+
+def test_histogram() -> None:
+    """Тестирование накопленных счётчиков гистограммы."""
+    histogram = metrics.Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+
+
+def test_render_format() -> None:
+    """Тестирование текстового формата Prometheus."""
+    counter = metrics.Counter("test_total", "Тест", ("route",),
+                              register=False)
+    counter.inc('/a"b')
+    histogram = metrics.HistogramMetric("test_seconds", "Тест",
+                                        buckets=(0.5,), register=False)
+    histogram.observe(0.1)
+    lines = counter.render() + histogram.render()
+    assert "# TYPE test_total counter" in lines
+    assert 'test_total{route="/a\\"b"} 1' in lines
+    assert 'test_seconds_bucket{le="0.5"} 1' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 1' in lines
+    assert "test_seconds_count 1" in lines
+
+
+@pytest.mark.asyncio
+async def test_instrument_engine() -> None:
+    """Тестирование замера времени SQL-запросов."""
+    engine = build_engine(DATABASE_TEST_URI)
+    metrics.instrument_engine(engine)
+    before = metrics.db_statement_duration.values.get(("SELECT",))
+    before = before.count if before else 0
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await engine.dispose()
+    assert metrics.db_statement_duration.values[("SELECT",)].count > before
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client, add_data_to_db) -> None:
+    """Тестирование выгрузки метрик по шаблону пути."""
+    await client.get("/user/get_user/1")
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert ('http_requests_total{method="GET",'
+            'route="/user/get_user/{user_id}",status="200"}') in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert "db_pool_checked_out" in body
+    assert "user_cache_hits_total" in body
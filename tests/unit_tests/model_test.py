@@ -0,0 +1,53 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.model import UserInfo, _UserInfoChecks, validate_users
+
+
+USER = {"first_name": "Mikle", "last_name": "Karlson", "age": 27,
+        "salary": 10000, "email": "mikle_little_cat@gmail.com"}
+
+
+def outcome(model, data) -> tuple:
+    try:
+        return "ok", model.model_validate(data).model_dump()
+    except ValidationError as ex:
+        return "error", [(error["loc"], error["msg"]) for error in ex.errors()]
+
+
+@pytest.mark.parametrize(
+        "changes",
+        [
+            {},
+            {"first_name": "Ka"},
+            {"last_name": "Ni", "email": "karl_little_catcom"},
+            {"first_name": 123},
+            {"age": "25"},
+            {"age": 25.0},
+            {"age": 25.5},
+            {"age": True},
+            {"age": -1},
+            {"age": 121},
+            {"salary": 10000.5},
+            {"salary": "20000"},
+            {"salary": -1},
+            {"email": "karl@mail.ru\n"},
+            {"email": "карл@почта.рф"},
+            {"email": "karl\u0301@mail.ru"},
+        ])
+def test_user_info_matches_checks(changes: dict) -> None:
+    """Тестирование совпадения UserInfo с проверками на Python."""
+    data = {**USER, **changes}
+    assert outcome(UserInfo, data) == outcome(_UserInfoChecks, data)
+
+
+def test_validate_users() -> None:
+    """Тестирование пакетной проверки с ошибками в части строк."""
+    rows = [USER, {**USER, "first_name": "Ka"}, {**USER, "age": 25.0},
+            "not a user"]
+    valid, errors = validate_users(rows)
+    assert list(valid) == [0, 2]
+    assert valid[2].age == 25
+    assert errors[1] == [
+        "Value error, Длина имени должна быть не менее 3 символов"]
+    assert list(errors) == [1, 3]
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.database import pool
+from app.database.pool import build_engine, pool_stats
+from config import DATABASE_TEST_URI
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics() -> None:
+    """Тестирование метрик пула соединений."""
+    engine = build_engine(DATABASE_TEST_URI, pool_size=1, max_overflow=0)
+    waiting = []
+
+    async def query() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            waiting.append(pool_stats(engine)["waiting"])
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(query() for _ in range(3)))
+    stats = pool_stats(engine)
+    await engine.dispose()
+    assert max(waiting) >= 1
+    assert stats["checked_out"] == 0
+    assert stats["waiting"] == 0
+    assert stats["wait_time"]["count"] == 3
+    assert stats["wait_time"]["sum"] >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_endpoint(client) -> None:
+    """Тестирование отдачи метрик пула."""
+    response = await client.get("/service/pool_stats")
+    data = response.json()
+    assert data['status_code'] == 200
+    assert "wait_time" in data['message']
+
+
+@pytest.mark.asyncio
+async def test_reset_pools_after_fork() -> None:
+    """Тестирование сброса пулов движков в дочернем процессе."""
+    engine = build_engine(DATABASE_TEST_URI)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    old_pool = engine.pool
+    assert old_pool.checkedin() == 1
+
+    pool._reset_pools_after_fork()
+    assert engine.pool is not old_pool
+    assert engine.pool.checkedin() == 0
+    # Соединение родителя не закрыто и остаётся в прежнем пуле.
+    assert old_pool.checkedin() == 1
+    old_pool.dispose()
+    await engine.dispose()
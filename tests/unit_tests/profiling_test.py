@@ -0,0 +1,54 @@
+import logging
+import pstats
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app import profiling
+from app.database.pool import build_engine
+from config import DATABASE_TEST_URI
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(monkeypatch, caplog) -> None:
+    """Тестирование журнала медленных запросов с планом запроса."""
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0)
+    engine = build_engine(DATABASE_TEST_URI)
+    profiling.install_slow_query_log(engine)
+    with caplog.at_level(logging.WARNING, logger="app.profiling"):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT id FROM users WHERE id = :id"),
+                               {"id": 1})
+            await conn.execute(text("SELECT 1"))
+    await engine.dispose()
+    record = next(record for record in caplog.records
+                  if "FROM users" in record.getMessage())
+    assert record.plan
+    assert not record.plan.startswith("EXPLAIN не выполнен")
+    assert "1" in record.parameters
+
+
+@pytest.mark.asyncio
+async def test_profile_request(monkeypatch, tmp_path) -> None:
+    """Тестирование профилирования запроса по заголовку."""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    router = APIRouter(dependencies=[Depends(profiling.profile_request)])
+
+    @router.get("/ping")
+    async def ping() -> dict:
+        return {"message": sum(range(1000))}
+
+    app = FastAPI()
+    app.include_router(router)
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url="http://test") as client:
+        await client.get("/ping")
+        assert list(tmp_path.iterdir()) == []
+        response = await client.get("/ping",
+                                    headers={profiling.PROFILE_HEADER: "1"})
+    assert response.json() == {"message": 499500}
+    profiles = list(tmp_path.iterdir())
+    assert len(profiles) == 1
+    assert pstats.Stats(str(profiles[0])).total_calls > 0
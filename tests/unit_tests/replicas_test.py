@@ -0,0 +1,73 @@
+import pytest
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app.database import FDataBase
+from app.database.cache import CACHE_MISS
+from app.database.replicas import ReplicaSet
+from config import DATABASE_TEST_URI
+
+
+BROKEN_URI = "sqlite+aiosqlite:////nonexistent/dir/replica.db"
+
+
+def make_request(method: str, cookie: str = "") -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": method, "headers": headers})
+
+
+@pytest.mark.asyncio
+async def test_replica_selection() -> None:
+    """Тестирование выбора реплик и исключения недоступной."""
+    replicas = ReplicaSet([DATABASE_TEST_URI, DATABASE_TEST_URI, BROKEN_URI])
+    first, second, broken = replicas.replicas
+    assert [replicas.choose() for _ in range(3)] == [first, second, broken]
+
+    await replicas.check(timeout=5)
+    assert not broken.healthy
+    assert {replicas.choose() for _ in range(4)} == {first, second}
+
+    replicas.selection = "least_busy"
+    async with first.engine.connect():
+        assert replicas.choose() is second
+    await replicas.stop()
+
+
+@pytest.mark.asyncio
+async def test_session_routing(monkeypatch) -> None:
+    """Тестирование чтения с реплики и чтения своих записей."""
+    replicas = ReplicaSet([DATABASE_TEST_URI])
+    monkeypatch.setattr(FDataBase, "replica_set", replicas)
+    replica = replicas.replicas[0]
+
+    factory = FDataBase.get_session_factory(make_request("GET"))
+    assert factory is replica.session_factory
+
+    response = Response()
+    assert FDataBase._session_factory(
+        make_request("POST"), response) is FDataBase.AsyncSessionLocal
+    cookie = response.headers["set-cookie"].split(";")[0]
+    assert cookie.startswith(FDataBase.READ_YOUR_WRITES_COOKIE)
+    assert FDataBase.get_session_factory(
+        make_request("GET", cookie)) is FDataBase.AsyncSessionLocal
+
+    replica.healthy = False
+    assert FDataBase.get_session_factory(
+        make_request("GET")) is FDataBase.AsyncSessionLocal
+    await replicas.stop()
+
+
+@pytest.mark.asyncio
+async def test_replica_read_not_cached(monkeypatch, add_data_to_db,
+                                       enabled_user_cache) -> None:
+    """Тестирование: чтение с реплики не попадает в кэш."""
+    replicas = ReplicaSet([DATABASE_TEST_URI])
+    monkeypatch.setattr(FDataBase, "replica_set", replicas)
+    async with AsyncSession(replicas.replicas[0].engine) as session:
+        await FDataBase.get_one_user(1, session=session)
+    assert await enabled_user_cache.get(1) is CACHE_MISS
+
+    await FDataBase.get_one_user(1, session=add_data_to_db)
+    assert (await enabled_user_cache.get(1))["first_name"] == "Jack"
+    await replicas.stop()
@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+from app import responses
+from app.responses import FastJSONResponse
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_json_response(monkeypatch, use_orjson) -> None:
+    """Тестирование сериализации с orjson и без него."""
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+    content = {"message": {"users": {1: {"first_name": "Иван"}},
+                           "missing": [2]},
+               "status_code": 200}
+    body = FastJSONResponse(content).body
+    assert json.loads(body) == {
+        "message": {"users": {"1": {"first_name": "Иван"}}, "missing": [2]},
+        "status_code": 200}
+    assert "Иван".encode() in body
@@ -0,0 +1,78 @@
+import pytest
+
+from app.database import search
+from app.database.search import TrigramIndex, trigrams
+
+
+USERS = [
+    {"id": 1, "first_name": "Ivan", "last_name": "Petrov", "age": 30,
+     "salary": 1000.0, "email": "ivan.petrov@mail.ru"},
+    {"id": 2, "first_name": "Ivanna", "last_name": "Sidorova", "age": 25,
+     "salary": 2000.0, "email": None},
+    {"id": 3, "first_name": "Pyotr", "last_name": "Ivanov", "age": 40,
+     "salary": 3000.0, "email": "pyotr@gmail.com"},
+    {"id": 4, "first_name": "Maria", "last_name": "Kuznetsova", "age": 35,
+     "salary": 4000.0, "email": "kuz@yandex.ru"},
+]
+
+
+def test_trigrams() -> None:
+    """Тестирование триграмм по правилам pg_trgm."""
+    assert trigrams("Word") == {"  w", " wo", "wor", "ord", "rd "}
+    assert trigrams("a_b") == {"  a", " a ", "  b", " b "}
+    assert trigrams("") == set()
+
+
+def test_trigram_index() -> None:
+    """Тестирование ранжирования и порога поиска в памяти."""
+    index = TrigramIndex(USERS)
+    found = index.search("ivan", 10)
+    assert [user["id"] for user in found] == [1, 2, 3]
+    assert found[0]["score"] == 1.0
+    assert found[0]["email"] == "ivan.petrov@mail.ru"
+
+    # Опечатка находится по доле общих триграмм.
+    assert [user["id"] for user in index.search("Kuznecova", 10)] == [4]
+    # Подстрока внутри слова находится даже при низком ранге.
+    found = index.search("etro", 10)
+    assert [user["id"] for user in found] == [1]
+    assert found[0]["score"] < 0.6
+
+    assert len(index.search("ivan", 2)) == 2
+    assert index.search("zzz", 10) == []
+
+
+@pytest.mark.asyncio
+async def test_search_users(client, add_data_to_db) -> None:
+    """Тестирование поиска пользователей через API."""
+    # PostgreSQL без pg_trgm ищет только по подстроке.
+    fuzzy = await search._search_mode(add_data_to_db) != "ilike"
+    response = await client.get("/user/search_users",
+                                params={"q": "Niklsn" if fuzzy else "kls"})
+    assert response.status_code == 200
+    users = response.json()["message"]
+    assert [user["first_name"] for user in users] == ["Jack"]
+    assert 0 < users[0]["score"] <= 1
+
+    response = await client.get("/user/search_users",
+                                params={"q": "mail.ru"})
+    assert [user["first_name"]
+            for user in response.json()["message"]] == ["Mindi"]
+
+    # Индекс перестраивается после изменения таблицы.
+    response = await client.put(
+        "/user/update_user/2",
+        json={"first_name": "Mindi", "last_name": "Nikolson", "age": 22,
+              "salary": 55000, "email": "mindi_star@mail.ru"})
+    assert response.json()["status_code"] == 200
+    response = await client.get("/user/search_users",
+                                params={"q": "Niklson", "limit": 1})
+    assert [user["first_name"]
+            for user in response.json()["message"]] == ["Jack"]
+    response = await client.get("/user/search_users",
+                                params={"q": "Nikolson"})
+    assert {user["first_name"] for user in response.json()["message"]} == (
+        {"Jack", "Mindi"} if fuzzy else {"Mindi"})
+
+    response = await client.get("/user/search_users", params={"q": "a"})
+    assert response.status_code == 422
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.database import FDataBase
+from app.database.single_flight import SingleFlight, user_reads
+from app.main import app
+from tests import conftest
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shared() -> None:
+    """Тестирование одного запроса на одновременные вызовы."""
+    flight, release, calls = SingleFlight(), asyncio.Event(), []
+
+    async def read() -> dict:
+        calls.append(1)
+        await release.wait()
+        return {"id": 1}
+
+    readers = [asyncio.create_task(flight.do(1, read)) for _ in range(10)]
+    await asyncio.sleep(0)
+    readers[0].cancel()
+    release.set()
+    results = await asyncio.gather(*readers[1:])
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 1, "shared": 9, "bypassed": 0,
+                              "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_error() -> None:
+    """Тестирование передачи исключения всем ожидающим."""
+    flight = SingleFlight()
+
+    async def fail() -> None:
+        await asyncio.sleep(0)
+        raise ValueError("нет соединения")
+
+    results = await asyncio.gather(*(flight.do(1, fail) for _ in range(3)),
+                                   return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        await flight.do(1, fail)
+    assert flight.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_forget() -> None:
+    """Тестирование чтения после записи: новый запрос, старый не в кэш."""
+    flight, release, versions = SingleFlight(), asyncio.Event(), iter([1, 2])
+
+    async def read() -> tuple[int, bool]:
+        version = next(versions)
+        await release.wait()
+        return version, flight.is_current(1)
+
+    before = asyncio.create_task(flight.do(1, read))
+    await asyncio.sleep(0)
+    flight.forget(1)
+    after = asyncio.create_task(flight.do(1, read))
+    await asyncio.sleep(0)
+    release.set()
+    assert await before == (1, False)
+    assert await after == (2, True)
+
+
+@pytest.mark.asyncio
+async def test_get_user_coalesced(client, add_data_to_db,
+                                  enabled_user_cache) -> None:
+    """Тестирование объединения одновременных GET /user/get_user."""
+    calls, shared = user_reads.calls, user_reads.shared
+    responses = await asyncio.gather(*(client.get("/user/get_user/1")
+                                       for _ in range(20)))
+    assert {response.json()["message"]["email"]
+            for response in responses} == {"jack_niklson@gmail.com"}
+    assert user_reads.calls - calls + user_reads.shared - shared == 20
+    assert user_reads.calls - calls < 20
+
+    reading = asyncio.create_task(
+        FDataBase.get_one_user(2, session=add_data_to_db))
+    await asyncio.sleep(0)
+    response = await client.put("/user/update_user/2", json={
+        "first_name": "Mindi", "last_name": "Stars", "age": 23,
+        "salary": 55000, "email": "mindi_star@mail.ru"})
+    assert response.json()["status_code"] == 200
+    await reading
+    response = await client.get("/user/get_user/2")
+    assert response.json()["message"]["age"] == 23
+
+
+@pytest.mark.asyncio
+async def test_get_user_single_connection(client, add_data_to_db) -> None:
+    """Тестирование условного GET с пулом из одного соединения."""
+    engine = create_async_engine(
+        conftest.test_engine.url, poolclass=AsyncAdaptedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=1)
+
+    async def get_session():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    app.dependency_overrides[FDataBase.get_session] = get_session
+    try:
+        response = await client.get("/user/get_user/1",
+                                    headers={"If-None-Match": '"7"'})
+    finally:
+        app.dependency_overrides[FDataBase.get_session] = None
+        await engine.dispose()
+    assert response.status_code == 200
+    assert response.json()["message"]["first_name"] == "Jack"
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import event, text
+
+from app.database import startup
+from app.database.pool import build_engine
+from app.main import app
+from app.routers import service
+from config import DATABASE_TEST_URI
+from tests import conftest
+
+
+@pytest.mark.asyncio
+async def test_verify_schema() -> None:
+    """Тестирование сверки ревизии схемы с последней миграцией."""
+    engine = conftest.test_engine
+    with pytest.raises(RuntimeError):
+        await startup.verify_schema(engine)
+
+    (head,) = startup.alembic_heads()
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+        await conn.execute(text(
+            "INSERT INTO alembic_version VALUES ('0000')"))
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        await startup.verify_schema(engine)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE alembic_version SET version_num = "
+                                ":head"), {"head": head})
+    await startup.verify_schema(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE alembic_version"))
+
+
+@pytest.mark.asyncio
+async def test_warm_up() -> None:
+    """Тестирование прогрева пула соединений."""
+    engine = build_engine(DATABASE_TEST_URI)
+    await startup.warm_up(engine, connections=3)
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_failed_connection() -> None:
+    """Тестирование возврата соединений, если одно не открылось."""
+    engine = build_engine(DATABASE_TEST_URI)
+    attempts = []
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def fail_first(*args) -> None:
+        attempts.append(args)
+        if len(attempts) == 1:
+            raise ConnectionError("соединение не открылось")
+
+    with pytest.raises(ConnectionError):
+        await startup.warm_up(engine, connections=3)
+    assert engine.pool.checkedout() == 0
+    assert engine.pool.checkedin() == 2
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_live_and_ready(client, monkeypatch) -> None:
+    """Тестирование проверок liveness и readiness."""
+    monkeypatch.setattr(service, "ping",
+                        lambda: startup.ping(conftest.test_engine))
+    response = await client.get("/service/live")
+    assert response.json() == {"message": "ok", "status_code": 200}
+
+    monkeypatch.setattr(app.state, "ready", False, raising=False)
+    response = await client.get("/service/ready")
+    assert response.status_code == 503
+
+    monkeypatch.setattr(app.state, "ready", True)
+    response = await client.get("/service/ready")
+    assert response.status_code == 200
+    assert response.json()["message"] == "ok"
+
+    broken = build_engine("sqlite+aiosqlite:////nonexistent/dir/main.db")
+    monkeypatch.setattr(service, "ping", lambda: startup.ping(broken))
+    response = await client.get("/service/ready")
+    assert response.status_code == 503
+    await broken.dispose()
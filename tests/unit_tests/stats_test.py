@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from app.database.FDataBase import mark_stats_dirty
+from app.database.stats import StatsRefresher, get_salary_stats, rebuild_stats
+from tests import conftest
+
+
+def make_user(number: int, age: int, salary: float) -> dict:
+    return {"first_name": f"Name{number}", "last_name": f"Last{number}",
+            "age": age, "salary": salary, "email": f"user{number}@mail.ru"}
+
+
+@pytest.mark.asyncio
+async def test_stats_incremental(client, db_session) -> None:
+    """Тестирование изменения сводки одиночными запросами."""
+    for number, (age, salary) in enumerate(
+            [(25, 1000), (27, 1000.5), (29, 5000), (41, 70000)], 1):
+        response = await client.post("/user/add_user",
+                                     json=make_user(number, age, salary))
+        assert response.json()["status_code"] == 200
+    response = await client.put("/user/update_user/4",
+                                json=make_user(4, 33, 3000))
+    assert response.json()["status_code"] == 200
+    response = await client.delete("/user/delete_user/1")
+    assert response.json()["status_code"] == 200
+
+    incremental = await get_salary_stats(db_session)
+    assert incremental["rebuilt_at"] is None
+    assert incremental["stale_since"] is None
+    bucket_20, bucket_30 = incremental["buckets"]
+    assert (bucket_20["age_from"], bucket_20["age_to"]) == (20, 29)
+    assert bucket_20["users"] == 2
+    assert bucket_20["salary_min"] == 1000.5
+    assert bucket_20["salary_max"] == 5000
+    assert bucket_20["salary_avg"] == 3000.25
+    assert bucket_30["users"] == 1
+    assert bucket_30["salary_p50"] == 3000
+
+    assert await rebuild_stats(db_session)
+    rebuilt = await get_salary_stats(db_session)
+    assert rebuilt["buckets"] == incremental["buckets"]
+    assert rebuilt["rebuilt_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_stats_bulk_incremental(client, db_session) -> None:
+    """Тестирование изменения сводки пакетными запросами."""
+    response = await client.post(
+        "/user/add_users", json=[make_user(number, 30 + number, 1000)
+                                 for number in range(5)])
+    assert response.json()["message"]["inserted"] == 5
+    response = await client.put("/user/update_users", json=[
+        {"id": 1, "salary": 2000}, {"id": 2, "age": 45, "salary": 500}])
+    assert response.json()["message"]["updated"] == 2
+    response = await client.put("/user/upsert_users", json=[
+        make_user(3, 50, 9000), make_user(7, 36, 1500)])
+    assert response.json()["message"]["created"] == 1
+    response = await client.request("DELETE", "/user/delete_users",
+                                    json={"ids": [4, 5]})
+    assert response.json()["message"]["deleted"] == 2
+
+    incremental = await get_salary_stats(db_session)
+    assert incremental["stale_since"] is None
+    assert [bucket["users"] for bucket in incremental["buckets"]] == [3, 1]
+    assert incremental["buckets"][0]["salary_max"] == 2000
+    assert await rebuild_stats(db_session)
+    assert (await get_salary_stats(db_session))["buckets"] == incremental[
+        "buckets"]
+
+
+@pytest.mark.asyncio
+async def test_stats_bulk_refresh(client, db_session) -> None:
+    """Тестирование сводки после удаления по фильтрам и перестройки."""
+    response = await client.post(
+        "/user/add_users", json=[make_user(number, 30 + number, 1000)
+                                 for number in range(5)])
+    assert response.json()["message"]["inserted"] == 5
+    response = await client.request("DELETE", "/user/delete_users",
+                                    json={"min_age": 33})
+    assert response.json()["message"]["deleted"] == 2
+    stats = await get_salary_stats(db_session)
+    assert stats["stale_since"] is None
+    assert [bucket["users"] for bucket in stats["buckets"]] == [3]
+
+    await mark_stats_dirty(db_session)
+    await db_session.commit()
+    stats = await get_salary_stats(db_session)
+    assert stats["stale_since"] is not None
+
+    refresher = StatsRefresher(max_staleness=0)
+    assert await refresher.refresh(conftest.test_async_session)
+    assert not await refresher.refresh(conftest.test_async_session)
+
+    response = await client.get("/user/salary_stats")
+    stats = response.json()["message"]
+    assert stats["stale_since"] is None
+    assert [bucket["users"] for bucket in stats["buckets"]] == [3]
+    assert stats["buckets"][0]["salary_max"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_stats_percentiles(client, db_session) -> None:
+    """Тестирование точности процентилей по гистограмме."""
+    rng = random.Random(1)
+    salaries = sorted(round(rng.lognormvariate(11, 0.6), 2)
+                      for _ in range(1000))
+    response = await client.post(
+        "/user/add_users", json=[make_user(number, 40, salary)
+                                 for number, salary in enumerate(salaries)])
+    assert response.json()["message"]["inserted"] == len(salaries)
+    await rebuild_stats(db_session)
+
+    (bucket,) = (await get_salary_stats(db_session))["buckets"]
+    assert bucket["salary_min"] == salaries[0]
+    assert bucket["salary_max"] == salaries[-1]
+    for name, rank in (("salary_p50", 0.5), ("salary_p90", 0.9),
+                       ("salary_p99", 0.99)):
+        exact = salaries[round(rank * (len(salaries) - 1))]
+        assert bucket[name] == pytest.approx(exact, rel=0.05)
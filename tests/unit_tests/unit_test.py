@@ -1,4 +1,9 @@
+import json
+
 import pytest
+from sqlalchemy import func, select
+
+from app.database.FDataBase import User, _insert_users
 
 
 @pytest.mark.parametrize(
@@ -139,3 +144,253 @@ async def test_delete_user(client, add_data_to_db,
         assert data['message'] == f"Пользователь с ID: {user_id} не найден!"
     else:
         assert data['message'] == f"Пользователь с ID: {user_id} удалён!"
+
+
+@pytest.mark.asyncio
+async def test_add_users(client, add_data_to_db) -> None:
+    """Тестирование пакетного добавления пользователей (JSON-массив)."""
+    data_request = [
+        {"first_name": "Mikle", "last_name": "Karlson", "age": 27,
+         "salary": 10000, "email": "mikle_little_cat@gmail.com"},
+        {"first_name": "Ka", "last_name": "Nilson", "age": 25,
+         "salary": 20000, "email": "karl_little_cat@gmail.com"},
+        {"first_name": "Karl", "last_name": "Nilson", "age": 25,
+         "salary": 20000, "email": "karl_little_cat@gmail.com"},
+    ]
+    response = await client.post("/user/add_users", json=data_request)
+    data = response.json()
+    assert data['status_code'] == 200
+    assert data['message']['inserted'] == 2
+    assert data['message']['rejected'] == [
+        {"row": 1,
+         "errors": [
+             "Value error, Длина имени должна быть не менее 3 символов"]}
+    ]
+    response = await client.get("/user/get_user/4")
+    assert response.json()['message']['email'] == "karl_little_cat@gmail.com"
+
+
+@pytest.mark.asyncio
+async def test_add_users_ndjson(client, add_data_to_db) -> None:
+    """Тестирование пакетного добавления пользователей (NDJSON)."""
+    content = (
+        '{"first_name": "Mikle", "last_name": "Karlson", "age": 27, '
+        '"salary": 10000, "email": "mikle_little_cat@gmail.com"}\n'
+        '{"first_name": "Karl"\n'
+        '\n'
+        '{"first_name": "Karl", "last_name": "Nilson", "age": 25, '
+        '"salary": 20000, "email": "karl_little_cat@gmail.com"}'
+    )
+    response = await client.post(
+        "/user/add_users", content=content.encode(),
+        headers={"Content-Type": "application/x-ndjson"})
+    data = response.json()
+    assert data['status_code'] == 200
+    assert data['message']['inserted'] == 2
+    assert data['message']['rejected'] == [
+        {"row": 1, "errors": ["Неверный JSON"]}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_insert_users_rollback(db_session) -> None:
+    """Тестирование отката пачки, вставленной COPY (PostgreSQL)."""
+    if db_session.bind.dialect.driver != "asyncpg":
+        pytest.skip("COPY используется только с asyncpg")
+    await _insert_users(db_session, [
+        {"first_name": "Mikle", "last_name": "Karlson", "age": 27,
+         "salary": 10000, "email": "mikle_little_cat@gmail.com"}])
+    await db_session.rollback()
+    assert await db_session.scalar(
+        select(func.count()).select_from(User)) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_users(client, add_data_to_db) -> None:
+    """Тестирование получения нескольких пользователей."""
+    response = await client.get("/user/get_users?ids=1&ids=999&ids=2")
+    data = response.json()
+    assert data['status_code'] == 200
+    assert data['message']['users']['1']['email'] == "jack_niklson@gmail.com"
+    assert data['message']['users']['2']['email'] == "mindi_star@mail.ru"
+    assert data['message']['missing'] == [999]
+
+    response = await client.post("/user/get_users", json={"ids": [2, 3]})
+    data = response.json()
+    assert list(data['message']['users']) == ['2']
+    assert data['message']['missing'] == [3]
+
+
+@pytest.mark.asyncio
+async def test_list_users(client, add_data_to_db) -> None:
+    """Тестирование постраничного списка пользователей."""
+    response = await client.get("/user/list_users?limit=1")
+    data = response.json()
+    assert data['status_code'] == 200
+    assert [user['id'] for user in data['message']['users']] == [1]
+    assert data['message']['next_cursor'] == 1
+
+    response = await client.get("/user/list_users?limit=1&cursor=1")
+    data = response.json()
+    assert [user['id'] for user in data['message']['users']] == [2]
+    assert data['message']['next_cursor'] is None
+
+
+@pytest.mark.parametrize(
+        "query, ids",
+        [
+            ("min_age=30", [1]),
+            ("max_age=30", [2]),
+            ("min_salary=100000&max_salary=300000", [1]),
+            ("last_name_prefix=Sta", [2]),
+            ("last_name_prefix=St%25", []),
+            ("min_age=30&last_name_prefix=Sta", []),
+        ])
+@pytest.mark.asyncio
+async def test_list_users_filters(client, add_data_to_db,
+                                  query: str, ids: list[int]) -> None:
+    """Тестирование фильтров списка пользователей."""
+    response = await client.get(f"/user/list_users?{query}")
+    data = response.json()
+    assert [user['id'] for user in data['message']['users']] == ids
+
+
+@pytest.mark.parametrize("gzip", [False, True])
+@pytest.mark.asyncio
+async def test_export_users(client, add_data_to_db, gzip: bool) -> None:
+    """Тестирование выгрузки пользователей в NDJSON."""
+    response = await client.get(f"/user/export_users?gzip={gzip}")
+    assert response.status_code == 200
+    assert (response.headers.get("content-encoding") == "gzip") is gzip
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['email'] for row in rows] == [
+        "jack_niklson@gmail.com", "mindi_star@mail.ru"]
+
+
+@pytest.mark.asyncio
+async def test_export_users_csv(client, add_data_to_db) -> None:
+    """Тестирование выгрузки пользователей в CSV."""
+    response = await client.get("/user/export_users?format=csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,first_name,last_name,age,salary,email"
+    assert lines[1].startswith("1,Jack,Niklson,37,")
+    assert len(lines) == 3
+
+
+@pytest.mark.asyncio
+async def test_update_users(client, add_data_to_db) -> None:
+    """Тестирование пакетного изменения пользователей."""
+    response = await client.put("/user/update_users", json=[
+        {"id": 1, "salary": 300000},
+        {"id": 2, "salary": 60000, "last_name": "Moons"},
+        {"id": 999, "salary": 1},
+    ])
+    data = response.json()
+    assert data['status_code'] == 200
+    assert data['message'] == {"updated": 2, "missing": [999]}
+    response = await client.put("/user/update_users", json=[
+        {"id": 1}, {"id": 2, "age": 23}])
+    assert response.json()['message'] == {"updated": 1, "missing": []}
+    users = (await client.get("/user/get_users?ids=1&ids=2")).json()
+    assert users['message']['users']['1']['salary'] == 300000
+    assert users['message']['users']['2']['last_name'] == "Moons"
+
+    response = await client.put("/user/update_users",
+                                json=[{"id": 1, "age": 125}])
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['msg'] == (
+        "Value error, Возраст должен быть в пределах от 0 до 120")
+
+
+@pytest.mark.parametrize(
+        "data_request, deleted, missing, left",
+        [
+            ({"ids": [1, 999]}, 1, [999], [2]),
+            ({"min_age": 30}, 1, [], [2]),
+            ({"last_name_prefix": "S", "max_salary": 100000}, 1, [], [1]),
+            ({"min_salary": 0}, 2, [], []),
+        ])
+@pytest.mark.asyncio
+async def test_delete_users(client, add_data_to_db, data_request: dict,
+                            deleted: int, missing: list[int],
+                            left: list[int]) -> None:
+    """Тестирование пакетного удаления пользователей."""
+    response = await client.request("DELETE", "/user/delete_users",
+                                    json=data_request)
+    data = response.json()
+    assert data['status_code'] == 200
+    assert data['message'] == {"deleted": deleted, "missing": missing}
+    users = (await client.get("/user/list_users")).json()
+    assert [user['id'] for user in users['message']['users']] == left
+
+
+@pytest.mark.asyncio
+async def test_delete_users_without_filters(client, add_data_to_db) -> None:
+    """Тестирование отказа в удалении без ID и фильтров."""
+    response = await client.request("DELETE", "/user/delete_users", json={})
+    assert response.json()['status_code'] == 422
+    users = (await client.get("/user/list_users")).json()
+    assert len(users['message']['users']) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_user_conditional(client, add_data_to_db) -> None:
+    """Тестирование ETag и ответа 304 на условный запрос."""
+    response = await client.get("/user/get_user/1")
+    etag = response.headers["etag"]
+    assert etag == '"1"'
+    assert "last-modified" in response.headers
+
+    response = await client.get("/user/get_user/1",
+                                headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = await client.get(
+        "/user/get_user/1",
+        headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert response.status_code == 304
+
+    await client.put("/user/update_users", json=[{"id": 1, "age": 40}])
+    response = await client.get("/user/get_user/1",
+                                headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"2"'
+    assert response.json()['message']['age'] == 40
+
+
+@pytest.mark.asyncio
+async def test_update_user_if_match(client, add_data_to_db) -> None:
+    """Тестирование изменения пользователя с проверкой версии."""
+    data_request = {"first_name": "Karl", "last_name": "Nilson", "age": 25,
+                    "salary": 20000, "email": "karl_little_cat@gmail.com"}
+    response = await client.put("/user/update_user/1", json=data_request,
+                                headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"2"'
+
+    response = await client.put("/user/update_user/1", json=data_request,
+                                headers={"If-Match": '"1"'})
+    assert response.status_code == 412
+    assert response.json()['status_code'] == 412
+    # If-Match сравнивает строго: слабый тег текущей версии не подходит.
+    response = await client.put("/user/update_user/1", json=data_request,
+                                headers={"If-Match": 'W/"2"'})
+    assert response.status_code == 412
+    response = await client.get("/user/get_user/1",
+                                headers={"If-None-Match": 'W/"2"'})
+    assert response.status_code == 304
+
+    response = await client.put("/user/update_user/999", json=data_request,
+                                headers={"If-Match": '"1"'})
+    assert response.json()['status_code'] == 404
+
+    # If-Match: * требует, чтобы пользователь существовал.
+    response = await client.put("/user/update_user/999", json=data_request,
+                                headers={"If-Match": "*"})
+    assert response.status_code == 412
+    assert response.json()['status_code'] == 412
+    response = await client.put("/user/update_user/1", json=data_request,
+                                headers={"If-Match": "*"})
+    assert response.status_code == 200
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.database.FDataBase import upsert_users
+from tests import conftest
+
+
+def make_user(number: int, salary: float = 1000) -> dict:
+    return {"first_name": f"Name{number}", "last_name": f"Last{number}",
+            "age": 30, "salary": salary, "email": f"user{number}@mail.ru"}
+
+
+@pytest.mark.asyncio
+async def test_upsert_user(client) -> None:
+    """Тестирование добавления и изменения пользователя по email."""
+    response = await client.put("/user/upsert_user", json=make_user(1))
+    assert response.status_code == 201
+    created = response.json()["message"]
+    assert created["created"] is True
+
+    response = await client.put("/user/upsert_user",
+                                json=make_user(1, salary=2000))
+    assert response.status_code == 200
+    assert response.json()["message"] == {**created, "created": False}
+
+    response = await client.get(f"/user/get_user/{created['id']}")
+    assert response.json()["message"]["salary"] == 2000
+    assert response.headers["ETag"] == '"2"'
+    response = await client.get("/user/list_users")
+    assert len(response.json()["message"]["users"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_upsert_users_batch(client, add_data_to_db) -> None:
+    """Тестирование пакетного upsert с повтором email в пачке."""
+    rows = [make_user(1), {**make_user(2), "email": "mindi_star@mail.ru"},
+            make_user(3), {"first_name": "X"}, make_user(1, salary=3000)]
+    response = await client.put("/user/upsert_users", json=rows)
+    report = response.json()["message"]
+    assert (report["created"], report["updated"]) == (2, 1)
+    assert [user["row"] for user in report["users"]] == [0, 1, 2, 4]
+    assert report["users"][0]["id"] == report["users"][3]["id"]
+    assert report["users"][1] == {"row": 1, "id": 2, "created": False,
+                                  "email": "mindi_star@mail.ru"}
+    assert [error["row"] for error in report["rejected"]] == [3]
+
+    response = await client.get(f"/user/get_user/{report['users'][0]['id']}")
+    assert response.json()["message"]["salary"] == 3000
+    response = await client.get("/user/get_user/2")
+    assert response.json()["message"]["first_name"] == "Name2"
+
+
+@pytest.mark.asyncio
+async def test_upsert_concurrent(client) -> None:
+    """Тестирование одновременных upsert одного email."""
+    async def upsert(salary: float) -> list[dict]:
+        async with conftest.test_async_session() as session:
+            return await upsert_users([make_user(1, salary)],
+                                      session=session)
+
+    results = await asyncio.gather(*(upsert(1000 + number)
+                                     for number in range(5)))
+    assert len({result["id"] for [result] in results}) == 1
+    assert sum(result["created"] for [result] in results) == 1
+    response = await client.get("/user/list_users")
+    assert len(response.json()["message"]["users"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_email(client, add_data_to_db) -> None:
+    """Тестирование отказа при добавлении существующего email."""
+    user = {**make_user(1), "email": "jack_niklson@gmail.com"}
+    response = await client.post("/user/add_user", json=user)
+    assert response.status_code == 409
+    assert response.json()["status_code"] == 409
+
+    response = await client.post("/user/add_users", json=[user])
+    assert response.json()["message"]["rejected"] == [{
+        "row": 0, "errors": [
+            "Пользователь с email jack_niklson@gmail.com уже существует!"]}]
+
+    response = await client.put("/user/update_user/2", json=user)
+    assert response.status_code == 409
+    assert response.json()["status_code"] == 409
+    response = await client.get("/user/get_user/2")
+    assert response.json()["message"]["email"] == "mindi_star@mail.ru"
+
+    # После 409 следующие изменения (в PostgreSQL - через UPDATE с
+    # подзапросом прежних значений) проходят как обычно.
+    for age in (23, 24):
+        response = await client.put("/user/update_user/2", json={
+            **user, "email": "mindi_star@mail.ru", "age": age})
+        assert response.status_code == 200
+    response = await client.get("/user/get_user/2")
+    assert response.json()["message"]["age"] == 24
+
+
+@pytest.mark.asyncio
+async def test_update_users_duplicate_email(client, add_data_to_db) -> None:
+    """Тестирование пакетного изменения на занятый email."""
+    response = await client.put("/user/update_users", json=[
+        {"id": 1, "age": 40},
+        {"id": 2, "email": "jack_niklson@gmail.com"}])
+    assert response.status_code == 409
+    assert response.json() == {
+        "message": "Пользователь с email jack_niklson@gmail.com уже "
+                   "существует!", "status_code": 409}
+    response = await client.get("/user/get_user/1")
+    assert response.json()["message"]["age"] == 37
+
+    response = await client.put("/user/update_users",
+                                json=[{"id": 2, "age": 23}])
+    assert response.json()["message"] == {"updated": 1, "missing": []}
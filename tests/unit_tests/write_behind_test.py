@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database.FDataBase import User
+from app.database.write_behind import WriteBehindQueue
+from app.routers import router
+from tests import conftest
+
+
+USER = {"first_name": "Вася", "last_name": "Пупкин", "age": 30,
+        "salary": 1000.0, "email": "vasya@mail.ru"}
+
+
+@pytest.mark.asyncio
+async def test_add_user_write_behind(client, db_session, monkeypatch) -> None:
+    """Тестирование отложенного добавления пользователей пачкой."""
+    queue = WriteBehindQueue(max_size=10, batch_size=10, flush_interval=1)
+    monkeypatch.setattr(router, "write_behind", queue)
+    queue.start(conftest.test_async_session)
+
+    tickets = []
+    for number in range(3):
+        response = await client.post(
+            "/user/add_user",
+            json={**USER, "email": f"vasya{number}@mail.ru"})
+        assert response.status_code == 202
+        assert response.json()["status_code"] == 202
+        tickets.append(response.json()["ticket"])
+    response = await client.get(f"/user/add_user_status/{tickets[0]}")
+    assert response.json()["message"] == {"status": "pending"}
+
+    await queue.stop()
+    assert not queue.running
+    for ticket in tickets:
+        response = await client.get(f"/user/add_user_status/{ticket}")
+        assert response.json()["message"] == {"status": "inserted"}
+    assert queue.stats()["batches"] == 1
+    count = await db_session.scalar(select(func.count()).select_from(User))
+    assert count == 3
+
+    response = await client.get("/user/add_user_status/unknown")
+    assert response.json()["status_code"] == 404
+
+
+@pytest.mark.asyncio
+async def test_add_user_queue_full(client, monkeypatch) -> None:
+    """Тестирование отказа 429 при заполненной очереди."""
+    queue = WriteBehindQueue(max_size=1, batch_size=10, flush_interval=1)
+    monkeypatch.setattr(router, "write_behind", queue)
+    queue.start(conftest.test_async_session)
+
+    first = await client.post("/user/add_user", json=USER)
+    assert first.status_code == 202
+    # Фоновая задача забирает первую заявку и ждёт наполнения пачки.
+    await asyncio.sleep(0)
+    second = await client.post("/user/add_user",
+                               json={**USER, "email": "two@mail.ru"})
+    third = await client.post("/user/add_user",
+                              json={**USER, "email": "three@mail.ru"})
+    assert second.status_code == 202
+    assert third.status_code == 429
+    assert third.headers["retry-after"] == "1"
+    assert "ticket" not in third.json()
+    await queue.stop()
+    assert queue.stats()["inserted"] == 2